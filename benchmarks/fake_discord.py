@@ -0,0 +1,367 @@
+"""
+Discord factice, en mémoire, pour rejouer des traces (benchmarks/replay.py).
+
+Les objets n'exposent que ce que les Cogs utilisent (membres, rôles, salons,
+messages, interactions). Chaque appel qui partirait vers l'API REST de Discord
+est compté par route dans `FakeRest` et peut être ralenti d'une latence simulée ;
+les requêtes gateway (Request Guild Members) sont comptées à part.
+"""
+import asyncio
+import importlib
+import inspect
+import itertools
+from collections import Counter
+from types import SimpleNamespace
+
+import discord
+from discord.ext import commands
+
+from core.outbound import OutboundScheduler
+
+
+class FakeRest:
+    """Compteur des appels REST (par route) avec latence simulée."""
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        self._ids = itertools.count(1_300_000_000_000_000_000)
+
+    async def call(self, route: str):
+        self.calls[route] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+
+def _not_found() -> discord.NotFound:
+    return discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Message")
+
+
+class FakeAvatar:
+    def __init__(self, user_id: int):
+        self.url = f"https://cdn.discordapp.com/avatars/{user_id}/fake.png"
+
+    def with_format(self, fmt: str) -> "FakeAvatar":
+        return self
+
+
+class FakeRole:
+    def __init__(self, guild: "FakeGuild", role_id: int, name: str):
+        self.guild = guild
+        self.id = role_id
+        self.name = name
+
+    @property
+    def members(self) -> list["FakeMember"]:
+        return [m for m in self.guild.all_members.values() if self in m.roles]
+
+    @property
+    def mention(self) -> str:
+        return f"<@&{self.id}>"
+
+
+class FakeMember:
+    def __init__(self, guild: "FakeGuild", user_id: int, status: discord.Status = discord.Status.online):
+        self.guild = guild
+        self.id = user_id
+        self.name = f"joueur{user_id % 100_000}"
+        self.global_name = None
+        self.nick: str | None = None
+        self.bot = False
+        self.status = status
+        self.roles: list[FakeRole] = []
+        self.display_avatar = FakeAvatar(user_id)
+        self.voice: SimpleNamespace | None = None
+
+    @property
+    def display_name(self) -> str:
+        return self.nick or self.name
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    def __str__(self) -> str:
+        return self.name
+
+    def get_role(self, role_id: int) -> FakeRole | None:
+        return next((role for role in self.roles if role.id == role_id), None)
+
+    def snapshot(self) -> "FakeMember":
+        """Copie superficielle (l'état « before » d'un événement de présence)."""
+        copy = object.__new__(FakeMember)
+        copy.__dict__.update(self.__dict__, roles=list(self.roles))
+        return copy
+
+    async def add_roles(self, *roles, reason=None):
+        await self.guild.rest.call("PUT /guilds/{guild}/members/{user}/roles/{role}")
+        self.roles.extend(role for role in roles if role not in self.roles)
+
+    async def remove_roles(self, *roles, reason=None):
+        await self.guild.rest.call("DELETE /guilds/{guild}/members/{user}/roles/{role}")
+        self.roles = [role for role in self.roles if role not in roles]
+
+    async def edit(self, *, nick=discord.utils.MISSING, reason=None, **fields):
+        await self.guild.rest.call("PATCH /guilds/{guild}/members/{user}")
+        if nick is not discord.utils.MISSING:
+            self.nick = nick
+
+
+class FakeMessage:
+    def __init__(self, channel: "FakeTextChannel", message_id: int, author, content: str | None = None,
+                 embeds: list | None = None, attachments: int = 0):
+        self.channel = channel
+        self.guild = channel.guild
+        self.id = message_id
+        self.author = author
+        self.content = content or ""
+        self.embeds = embeds or []
+        self.attachments = attachments
+
+    async def delete(self, *, delay=None):
+        await self.guild.rest.call("DELETE /channels/{channel}/messages/{message}")
+        if self.channel.messages.pop(self.id, None) is None:
+            raise _not_found()
+
+    async def edit(self, *, content=discord.utils.MISSING, embed=discord.utils.MISSING, attachments=discord.utils.MISSING, **fields):
+        await self.guild.rest.call("PATCH /channels/{channel}/messages/{message}")
+        if self.id not in self.channel.messages:
+            raise _not_found()
+        if content is not discord.utils.MISSING:
+            self.content = content
+        if embed is not discord.utils.MISSING:
+            self.embeds = [embed] if embed else []
+        if attachments is not discord.utils.MISSING:
+            self.attachments = len(attachments)
+        return self
+
+    async def add_reaction(self, emoji):
+        await self.guild.rest.call("PUT /channels/{channel}/messages/{message}/reactions/{emoji}/@me")
+
+    async def reply(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+class FakeTextChannel:
+    def __init__(self, guild: "FakeGuild", channel_id: int, name: str):
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.messages: dict[int, FakeMessage] = {}
+        self.sent_files = 0
+
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+
+    async def send(self, content=None, *, embed=None, file=None, files=None, view=None, **kwargs):
+        await self.guild.rest.call("POST /channels/{channel}/messages")
+        attachments = (1 if file else 0) + len(files or [])
+        self.sent_files += attachments
+        message = FakeMessage(self, self.guild.rest.next_id(), self.guild.me, content, [embed] if embed else [], attachments)
+        self.messages[message.id] = message
+        return message
+
+    def get_partial_message(self, message_id: int) -> FakeMessage:
+        return FakeMessage(self, message_id, None)
+
+    async def fetch_message(self, message_id: int) -> FakeMessage:
+        await self.guild.rest.call("GET /channels/{channel}/messages/{message}")
+        message = self.messages.get(message_id)
+        if message is None:
+            raise _not_found()
+        return message
+
+
+class FakeVoiceChannel:
+    def __init__(self, guild: "FakeGuild", channel_id: int, name: str):
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+
+
+class FakeGuild:
+    """
+    Serveur factice. Avec `lazy_cache=True`, seuls les membres déjà rencontrés sont
+    « en cache » : les autres passent par query_members, comme avec le profil lean.
+    """
+    def __init__(self, guild_id: int, rest: FakeRest, lazy_cache: bool = False):
+        self.id = guild_id
+        self.name = "Serveur factice"
+        self.rest = rest
+        self.lazy_cache = lazy_cache
+        self.chunked = not lazy_cache
+        self.all_members: dict[int, FakeMember] = {}
+        self._cached: set[int] = set()
+        self.roles: dict[int, FakeRole] = {}
+        self.channels: dict[int, FakeTextChannel | FakeVoiceChannel] = {}
+        self.me = FakeMember(self, guild_id - 1)
+        self.me.bot = True
+        self.gateway_requests = 0
+
+    def member(self, user_id: int) -> FakeMember:
+        """Membre du « serveur réel » (créé à la première apparition dans la trace)."""
+        member = self.all_members.get(user_id)
+        if member is None:
+            member = self.all_members[user_id] = FakeMember(self, user_id)
+        return member
+
+    def is_cached(self, user_id: int) -> bool:
+        return not self.lazy_cache or user_id in self._cached
+
+    @property
+    def members(self) -> list[FakeMember]:
+        return [m for uid, m in self.all_members.items() if self.is_cached(uid)]
+
+    def get_member(self, user_id: int) -> FakeMember | None:
+        return self.all_members.get(user_id) if self.is_cached(user_id) else None
+
+    def get_role(self, role_id: int) -> FakeRole | None:
+        return self.roles.get(role_id)
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    async def query_members(self, query=None, *, limit=5, user_ids=None, presences=False, cache=True):
+        self.gateway_requests += 1
+        if self.rest.latency:
+            await asyncio.sleep(self.rest.latency)
+        found = [self.all_members[uid] for uid in user_ids or [] if uid in self.all_members]
+        if cache:
+            self._cached.update(m.id for m in found)
+        return found
+
+    async def fetch_members(self, *, limit=1000, after=None):
+        await self.rest.call("GET /guilds/{guild}/members")
+        for member in list(self.all_members.values()):
+            yield member
+
+
+class FakeInteractionResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def send_message(self, content=None, **kwargs):
+        await self._interaction.guild.rest.call("POST /interactions/{interaction}/callback")
+        self._done = True
+
+    async def defer(self, **kwargs):
+        await self._interaction.guild.rest.call("POST /interactions/{interaction}/callback")
+        self._done = True
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        await self._interaction.guild.rest.call("POST /webhooks/{application}/{token}")
+
+
+class FakeInteraction:
+    def __init__(self, guild: FakeGuild, user: FakeMember, channel: FakeTextChannel, client):
+        self.id = guild.rest.next_id()
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.channel = channel
+        self.channel_id = channel.id if channel else None
+        self.client = client
+        self.command = None
+        self.extras: dict = {}
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup(self)
+
+
+class FakeBot:
+    """
+    Bot factice : charge de vraies extensions (setup / cog_load), distribue les événements
+    aux écouteurs des Cogs et appelle directement les callbacks des commandes slash.
+    """
+    def __init__(self, guild: FakeGuild, storage, http_client, presences: bool = True):
+        self.guild = guild
+        self.storage = storage
+        self.http_client = http_client
+        self.outbound = OutboundScheduler()
+        self.intents = SimpleNamespace(presences=presences, members=True)
+        self.user = guild.me
+        # Pas de rechargement à chaud pendant un rejeu : aucun état à reprendre
+        self.hot_reload = SimpleNamespace(take_state=lambda cog: None)
+        self.cogs: dict[str, commands.Cog] = {}
+        self.listeners: dict[str, list] = {}
+        self.app_commands: dict[str, tuple[commands.Cog, object]] = {}
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return asyncio.get_running_loop()
+
+    async def wait_until_ready(self):
+        return None
+
+    def get_cog(self, name: str):
+        return self.cogs.get(name)
+
+    def get_guild(self, guild_id: int):
+        return self.guild if guild_id == self.guild.id else None
+
+    def get_channel(self, channel_id: int):
+        return self.guild.get_channel(channel_id)
+
+    async def is_owner(self, user) -> bool:
+        return True
+
+    def add_view(self, view, *, message_id=None):
+        # Aucun clic n'est rejoué : la vue persistante n'a pas besoin d'être enregistrée
+        return None
+
+    async def load_extension(self, name: str):
+        module = importlib.import_module(name)
+        await module.setup(self)
+
+    async def add_cog(self, cog: commands.Cog):
+        await discord.utils.maybe_coroutine(cog.cog_load)
+        self.cogs[cog.__cog_name__] = cog
+        for event, method in cog.get_listeners():
+            self.listeners.setdefault(event, []).append(method)
+        for command in cog.walk_app_commands():
+            if isinstance(command, discord.app_commands.Command):
+                self.app_commands[command.qualified_name] = (cog, command)
+
+    async def dispatch(self, event: str, *args):
+        """Appelle tous les écouteurs `on_<event>` en parallèle et propage la première erreur."""
+        handlers = self.listeners.get(f"on_{event}", [])
+        results = await asyncio.gather(*(handler(*args) for handler in handlers), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            raise errors[0]
+
+    async def invoke(self, name: str, interaction: FakeInteraction, options: dict):
+        """Exécute une commande slash par son nom complet (les options utilisateur deviennent des membres)."""
+        entry = self.app_commands.get(name)
+        if entry is None:
+            return False
+        cog, command = entry
+        kwargs = {}
+        for param in command.parameters:
+            if param.name not in options:
+                continue
+            value = options[param.name]
+            if param.type in (discord.AppCommandOptionType.user, discord.AppCommandOptionType.mentionable):
+                value = self.guild.member(int(value))
+            kwargs[param.name] = value
+        interaction.command = command
+        await command.callback(cog, interaction, **kwargs)
+        return True
+
+    async def close(self):
+        for cog in self.cogs.values():
+            result = cog.cog_unload()
+            if inspect.isawaitable(result):
+                await result
+        await self.outbound.close()
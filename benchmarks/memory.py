@@ -0,0 +1,160 @@
+"""
+Empreinte mémoire du cache de la gateway selon la configuration (core/config.py).
+
+Chaque configuration est mesurée dans un processus séparé : un serveur
+synthétique (50 000 membres par défaut) est injecté dans l'état interne de
+discord.py exactement comme le ferait la gateway (GUILD_CREATE, chunking,
+PRESENCE_UPDATE), puis on relève la mémoire résidente (RSS) du processus.
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.memory
+    python -m benchmarks.memory --members 100000 -k lean
+    python -m benchmarks.memory --output memory.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks import synthetic
+
+# Configurations comparées : surcharges de l'environnement lues par GatewayConfig.from_env
+CONFIGURATIONS: dict[str, dict[str, str]] = {
+    "full": {"GATEWAY_PROFILE": "full"},
+    "full-sans-chunking": {"GATEWAY_PROFILE": "full", "CHUNK_GUILDS_AT_STARTUP": "0"},
+    "lean": {"GATEWAY_PROFILE": "lean"},
+    "lean-vocal": {"GATEWAY_PROFILE": "lean", "MEMBER_CACHE": "voice"},
+    "lean-sans-presences": {"GATEWAY_PROFILE": "lean", "INTENT_PRESENCES": "0"},
+}
+
+
+def rss_bytes() -> int:
+    """Mémoire résidente actuelle (Linux), à défaut le pic depuis le démarrage."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss est en octets sur macOS, en kilo-octets ailleurs
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+# - - - Côté processus enfant - - - #
+
+def measure_configuration(member_count: int, seed: int) -> dict:
+    """Construit le cache de discord.py pour la configuration de l'environnement courant."""
+    import discord
+    from discord.state import ConnectionState
+
+    from core.config import GatewayConfig
+
+    config = GatewayConfig.from_env()
+    payloads = synthetic.make_guild_payloads(synthetic.make_rng(seed), member_count)
+    options = config.client_kwargs()
+
+    gc.collect()
+    before = rss_bytes()
+    started = time.perf_counter()
+
+    state = ConnectionState(dispatch=lambda *args, **kwargs: None, handlers={}, hooks={}, http=None, **options)
+
+    # GUILD_CREATE : membres en vocal uniquement (grand serveur)
+    guild = discord.Guild(data=payloads["guild"], state=state)
+    state._add_guild(guild)
+
+    # Chunking : discord.py ne garde les membres reçus que si le cache "joined" est actif
+    if config.chunk_guilds_at_startup and state.member_cache_flags.joined:
+        for data in payloads["members"]:
+            guild._add_member(discord.Member(data=data, guild=guild, state=state))
+
+    # Flux de présences : ignorées pour les membres absents du cache
+    if options["intents"].presences:
+        for data in payloads["presences"]:
+            state.parse_presence_update(data)
+
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    after = rss_bytes()
+
+    return {
+        "config": config.describe(),
+        "members_cached": len(guild.members),
+        "users_cached": len(state._users),
+        "rss_before_mb": before / 1e6,
+        "rss_after_mb": after / 1e6,
+        "rss_delta_mb": (after - before) / 1e6,
+        "build_seconds": elapsed,
+    }
+
+
+# - - - Côté processus parent - - - #
+
+def run_configuration(name: str, args: argparse.Namespace) -> dict:
+    env = {key: value for key, value in os.environ.items() if key not in ("MEMBER_CACHE", "CHUNK_GUILDS_AT_STARTUP", "INTENT_PRESENCES")}
+    env.update(CONFIGURATIONS[name])
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.memory", "--child", "--members", str(args.members), "--seed", str(args.seed)],
+        env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        last_line = (proc.stderr.strip().splitlines() or ["erreur inconnue"])[-1]
+        return {"error": last_line}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Mémoire du cache gateway selon la configuration.")
+    parser.add_argument("-k", dest="filters", action="append", default=[], help="Ne mesure que les configurations contenant ce texte")
+    parser.add_argument("--members", type=int, default=50_000, help="Taille du serveur synthétique")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", type=Path, help="Écrit le rapport JSON dans ce fichier")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure_configuration(args.members, args.seed)))
+        return 0
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "members": args.members,
+            "timestamp": time.time(),
+        },
+        "results": {},
+    }
+
+    for name in CONFIGURATIONS:
+        if args.filters and not any(f in name for f in args.filters):
+            continue
+        result = run_configuration(name, args)
+        report["results"][name] = result
+        if "error" in result:
+            print(f"⏭️  {name:<22} échec : {result['error']}")
+            continue
+        print(
+            f"🧠 {name:<22} +{result['rss_delta_mb']:7.1f} Mo RSS  "
+            f"{result['members_cached']:>7} membres en cache  ({result['config']})"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=4, ensure_ascii=False), encoding="utf-8")
+        print(f"💾 Rapport écrit dans {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""
+Rejeu de traces gateway contre un Discord factice, entièrement hors-ligne.
+
+Les vrais Cogs (ReadyManager, ManageGames, SessionStats, Quoifeur) sont chargés
+dans un bot factice (benchmarks/fake_discord.py) ; les événements d'une trace
+enregistrée par cogs/trace.py, ou d'une trace synthétique, leur sont envoyés
+à vitesse accélérée. Le CDN Discord et SteamGridDB sont simulés par
+synthetic.FakeHttpClient.
+
+Rapport : débit, appels REST par route, requêtes CDN / SteamGridDB, rendus
+d'annonce par événement et latence de bout en bout (de l'instant prévu de
+l'événement à la fin de tous ses écouteurs).
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.replay                                   # trace synthétique
+    python -m benchmarks.replay --events 20000 --speed 0          # aussi vite que possible
+    python -m benchmarks.replay --trace traces/gateway.jsonl --speed 60 --game-data cogs/R2P/game_data.json
+    python -m benchmarks.replay --rest-latency 0.05 --output replay.json
+
+Les chronomètres des Cogs (5 min, 6 h...) gardent leur durée réelle : ils ne se
+déclenchent pas pendant un rejeu accéléré.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+
+from benchmarks import synthetic
+from core import runtime, trace
+from core.logs import setup_logging
+
+# Extensions chargées dans le bot factice
+EXTENSIONS = ["cogs.R2P.sessions", "cogs.R2P.ready", "cogs.R2P.manage_games", "cogs.fun"]
+
+READY_CHANNEL_ID = synthetic.GUILD_ID + 3
+READY_ROLE_ID = synthetic.GUILD_ID + 4
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+    return {"count": len(ordered), "p50": pick(50), "p95": pick(95), "p99": pick(99), "max": ordered[-1]}
+
+
+def load_trace(path: Path) -> list[dict]:
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return trace.sessions(events)
+
+
+# - - - Monde factice - - - #
+
+def build_world(events: list[dict], args):
+    from benchmarks.fake_discord import FakeBot, FakeGuild, FakeRest, FakeRole, FakeTextChannel, FakeVoiceChannel
+    from core.storage import Storage
+
+    rest = FakeRest(latency=args.rest_latency)
+    guild_ids = Counter(event["g"] for event in events if event.get("g"))
+    guild_id = guild_ids.most_common(1)[0][0] if guild_ids else synthetic.GUILD_ID
+    guild = FakeGuild(guild_id, rest, lazy_cache=args.lazy_cache)
+
+    guild.roles[READY_ROLE_ID] = FakeRole(guild, READY_ROLE_ID, "Ready to play")
+    guild.channels[READY_CHANNEL_ID] = FakeTextChannel(guild, READY_CHANNEL_ID, "lfg")
+    for event in events:
+        if event.get("ch") and event["ch"] not in guild.channels:
+            guild.channels[event["ch"]] = FakeTextChannel(guild, event["ch"], f"salon-{len(guild.channels)}")
+        for key in ("b", "a"):
+            channel_id = event.get(key) if event["k"] == trace.VOICE else None
+            if channel_id and channel_id not in guild.channels:
+                guild.channels[channel_id] = FakeVoiceChannel(guild, channel_id, f"vocal-{len(guild.channels)}")
+        guild.member(event["u"])
+
+    http_client = synthetic.FakeHttpClient(synthetic.make_rng(args.seed), latency=args.cdn_latency)
+    bot = FakeBot(guild, Storage(flush_delay=0.5), http_client)
+    return bot
+
+
+async def populate_game_data(user_ids: list[int], args):
+    """Bibliothèques : celles d'un vrai game_data.json (--game-data) ou des bibliothèques synthétiques."""
+    from cogs.R2P import game_data
+
+    if args.game_data:
+        return
+    rng = synthetic.make_rng(args.seed)
+    libraries, display_names = synthetic.make_game_data(rng, len(user_ids), args.games)
+    game_data.player_games.clear()
+    game_data.player_games.update({str(uid): games for uid, games in zip(user_ids, libraries.values())})
+    game_data.game_display_names.update(display_names)
+    game_data.rebuild_owner_index()
+
+
+# - - - Rejeu - - - #
+
+async def deliver(bot, event: dict):
+    """Transforme une ligne de trace en appel aux Cogs, comme le ferait discord.py."""
+    from benchmarks.fake_discord import FakeInteraction, FakeMessage
+    import discord
+
+    guild = bot.guild
+    member = guild.member(event["u"])
+    kind = event["k"]
+
+    if kind == trace.PRESENCE:
+        # discord.py ignore les présences des membres absents du cache
+        if not guild.is_cached(member.id):
+            return
+        before = member.snapshot()
+        member.status = discord.Status(event["s"])
+        await bot.dispatch("presence_update", before, member)
+
+    elif kind == trace.VOICE:
+        before = SimpleNamespace(channel=guild.get_channel(event["b"]) if event.get("b") else None)
+        after = SimpleNamespace(channel=guild.get_channel(event["a"]) if event.get("a") else None)
+        member.voice = after if after.channel else None
+        await bot.dispatch("voice_state_update", member, before, after)
+
+    elif kind == trace.MESSAGE:
+        if event.get("n") is not None:
+            member.nick = event["n"]
+        channel = guild.get_channel(event["ch"])
+        if event.get("b"):
+            member.bot = True
+        message = FakeMessage(channel, guild.rest.next_id(), member, event.get("c", ""))
+        await bot.dispatch("message", message)
+
+    elif kind == trace.INTERACTION:
+        interaction = FakeInteraction(guild, member, guild.get_channel(event.get("ch")), bot)
+        if not await bot.invoke(event["c"], interaction, event.get("o", {})):
+            raise LookupError(f"commande inconnue : /{event['c']}")
+
+
+async def replay(bot, events: list[dict], speed: float) -> dict:
+    loop = asyncio.get_running_loop()
+    latencies: dict[str, list[float]] = {}
+    errors: Counter[str] = Counter()
+    error_samples: dict[str, str] = {}
+
+    async def run(event: dict, due: float):
+        kind = event["k"] if event["k"] != trace.INTERACTION else f"/{event['c']}"
+        try:
+            await deliver(bot, event)
+        except Exception as e:
+            errors[kind] += 1
+            error_samples.setdefault(kind, f"{type(e).__name__}: {e}")
+        latencies.setdefault(kind, []).append(loop.time() - due)
+
+    started = loop.time()
+    tasks = []
+    for event in events:
+        due = started + (event["t"] / speed if speed else 0.0)
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        elif not speed:
+            # Sans cadence, on rend quand même la main pour que les tâches avancent
+            await asyncio.sleep(0)
+            due = loop.time()
+        tasks.append(asyncio.create_task(run(event, due)))
+    await asyncio.gather(*tasks)
+    wall = loop.time() - started
+
+    return {"wall_seconds": wall, "latencies": latencies, "errors": dict(errors), "error_samples": error_samples}
+
+
+def announcement_stage_count(stage: str) -> int:
+    from core.metrics import metrics
+
+    return sum(h.count for labels, h in metrics.collect("announcement_stage_seconds") if labels.get("stage") == stage)
+
+
+async def run_replay(events: list[dict], args) -> dict:
+    from core.metrics import metrics
+
+    os.environ["READY_CHANNEL_ID"] = str(READY_CHANNEL_ID)
+    os.environ["READY_ROLE_ID"] = str(READY_ROLE_ID)
+    os.environ.setdefault("STEAMGRIDDB_API_KEY", "replay")
+
+    bot = build_world(events, args)
+    for extension in EXTENSIONS:
+        await bot.load_extension(extension)
+    await populate_game_data(list(bot.guild.all_members), args)
+    # Démarrage : le ReadyManager vide la liste et publie l'annonce initiale
+    await bot.dispatch("ready")
+
+    rest_before = Counter(bot.guild.rest.calls)
+    renders_before, sends_before = announcement_stage_count("render"), announcement_stage_count("send")
+    result = await replay(bot, events, args.speed)
+
+    await bot.close()
+    await bot.storage.close()
+
+    rest_calls = bot.guild.rest.calls - rest_before
+    count = len(events)
+    renders = announcement_stage_count("render") - renders_before
+    announcements = announcement_stage_count("send") - sends_before
+
+    outbound = Counter()
+    for labels, counter in metrics.collect("outbound_requests_total"):
+        outbound[f"{labels['priority']}/{labels['result']}"] += counter.value
+
+    all_latencies = [value for values in result["latencies"].values() for value in values]
+    return {
+        "events": count,
+        "wall_seconds": result["wall_seconds"],
+        "events_per_sec": count / result["wall_seconds"] if result["wall_seconds"] else None,
+        "latency": {"all": percentiles(all_latencies), **{kind: percentiles(v) for kind, v in sorted(result["latencies"].items())}},
+        "rest_calls": dict(rest_calls.most_common()),
+        "rest_calls_total": sum(rest_calls.values()),
+        "rest_calls_per_event": sum(rest_calls.values()) / count if count else 0.0,
+        "gateway_member_requests": bot.guild.gateway_requests,
+        "asset_requests": dict(bot.http_client.calls_by_host),
+        "outbound": dict(outbound.most_common()),
+        "announcements": announcements,
+        "announcement_renders": renders,
+        "renders_per_event": renders / count if count else 0.0,
+        "errors": result["errors"],
+        "error_samples": result["error_samples"],
+    }
+
+
+# - - - Ligne de commande - - - #
+
+def print_report(report: dict):
+    print(f"▶️  {report['events']} événements en {report['wall_seconds']:.2f} s ({report['events_per_sec']:,.0f} événements/s)")
+    print("\n⏱️  Latence de bout en bout :")
+    for kind, stats in report["latency"].items():
+        if stats["count"]:
+            print(f"   {kind:<14} ×{stats['count']:<6} p50 {stats['p50'] * 1e3:8.2f} ms  p95 {stats['p95'] * 1e3:8.2f} ms  "
+                  f"p99 {stats['p99'] * 1e3:8.2f} ms  max {stats['max'] * 1e3:8.2f} ms")
+    print(f"\n🌐 Appels REST : {report['rest_calls_total']} ({report['rest_calls_per_event']:.3f} par événement)")
+    for route, calls in report["rest_calls"].items():
+        print(f"   {calls:>7}  {route}")
+    print(f"   {report['gateway_member_requests']:>7}  gateway : Request Guild Members")
+    print("\n🖼️  Visuels (CDN / SteamGridDB factices) :")
+    for host, calls in sorted(report["asset_requests"].items()):
+        print(f"   {calls:>7}  {host}")
+    print("\n📤 File sortante (priorité / résultat) :")
+    for key, count in report["outbound"].items():
+        print(f"   {count:>7g}  {key}")
+    print(f"\n📢 Annonces publiées : {report['announcements']}, rendus d'image : {report['announcement_renders']} "
+          f"({report['renders_per_event']:.3f} par événement)")
+    if report["errors"]:
+        print("\n❌ Erreurs :")
+        for kind, count in report["errors"].items():
+            print(f"   {kind:<14} ×{count}  ({report['error_samples'][kind]})")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rejeu de traces gateway contre un Discord factice.")
+    parser.add_argument("--trace", type=Path, help="Trace enregistrée (JSON Lines) ; sinon trace synthétique")
+    parser.add_argument("--events", type=int, default=5000, help="Taille de la trace synthétique")
+    parser.add_argument("--players", type=int, default=200, help="Joueurs de la trace synthétique")
+    parser.add_argument("--duration", type=float, default=3600.0, help="Durée (s) couverte par la trace synthétique")
+    parser.add_argument("--speed", type=float, default=600.0, help="Accélération (0 : aussi vite que possible)")
+    parser.add_argument("--games", type=int, default=2000, help="Catalogue des bibliothèques synthétiques")
+    parser.add_argument("--game-data", type=Path, help="game_data.json réel à utiliser pour les bibliothèques")
+    parser.add_argument("--rest-latency", type=float, default=0.0, help="Latence simulée (s) de l'API Discord")
+    parser.add_argument("--cdn-latency", type=float, default=0.0, help="Latence simulée (s) du CDN et de SteamGridDB")
+    parser.add_argument("--lazy-cache", action="store_true", help="Cache de membres partiel (profil lean)")
+    parser.add_argument("--profile", choices=list(runtime.PROFILES), default="default", help="Profil d'exécution (boucle et codec JSON)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", type=Path, help="Écrit le rapport JSON dans ce fichier")
+    parser.add_argument("--verbose", action="store_true", help="Affiche les journaux des Cogs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    if args.trace:
+        events = load_trace(args.trace)
+    else:
+        events = synthetic.make_trace(synthetic.make_rng(args.seed), args.players, args.events, args.duration)
+    if not events:
+        print("❌ Trace vide.")
+        return 1
+
+    # Les Cogs écrivent leurs fichiers en chemins relatifs : on travaille dans un dossier jetable
+    repo_root = Path.cwd()
+    # Les journaux des Cogs ne s'affichent qu'avec --verbose
+    log_listener = setup_logging({"LOG_FORMAT": "text", "LOG_LEVEL": "DEBUG"}) if args.verbose else None
+    if log_listener is None:
+        logging.disable(logging.CRITICAL)
+
+    runtime_description = runtime.RuntimeConfig.from_profile(args.profile).apply()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.game_data:
+            target = Path(workdir) / "cogs" / "R2P" / "game_data.json"
+            target.parent.mkdir(parents=True)
+            shutil.copy(repo_root / args.game_data, target)
+        os.chdir(workdir)
+        try:
+            report = asyncio.run(run_replay(events, args))
+        except ImportError as e:
+            print(f"❌ Dépendance manquante ({e.name}) : le rejeu exécute les vrais Cogs.")
+            return 1
+        finally:
+            os.chdir(repo_root)
+            if log_listener:
+                log_listener.stop()
+
+    report["meta"] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "trace": str(args.trace) if args.trace else "synthétique",
+        "speed": args.speed,
+        "rest_latency": args.rest_latency,
+        "cdn_latency": args.cdn_latency,
+        "lazy_cache": args.lazy_cache,
+        "runtime": runtime_description,
+        "seed": args.seed,
+        "timestamp": time.time(),
+    }
+    print_report(report)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=4, ensure_ascii=False), encoding="utf-8")
+        print(f"💾 Rapport écrit dans {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
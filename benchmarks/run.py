@@ -0,0 +1,489 @@
+"""
+Banc d'essai des chemins chauds du bot, entièrement hors-ligne.
+
+Utilisation (depuis la racine du dépôt) :
+    python -m benchmarks.run                              # tous les benchmarks
+    python -m benchmarks.run -k common -k parse           # filtre par nom
+    python -m benchmarks.run --output bench.json          # rapport JSON
+    python -m benchmarks.run --compare bench.json         # compare à un rapport précédent
+    python -m benchmarks.run --profile default --profile fast   # débit de chaque profil d'exécution
+
+La comparaison porte sur la médiane par opération : tout benchmark plus lent
+que la référence de plus de --threshold (15 % par défaut) est signalé comme
+régression et le code de sortie vaut 1.
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable
+
+from benchmarks import synthetic
+from core import runtime
+
+
+# - - - Enregistrement des benchmarks - - - #
+
+@dataclass
+class Case:
+    """Un benchmark prêt à tourner : la fonction mesurée et le nombre d'éléments traités par appel."""
+    func: Callable
+    items: int = 1
+    is_async: bool = False
+    teardown: Callable | None = None
+
+
+BENCHMARKS: dict[str, Callable[[argparse.Namespace], Case]] = {}
+
+
+def benchmark(name: str):
+    """Décorateur : enregistre une fabrique de Case sous le nom donné."""
+    def decorator(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return decorator
+
+
+class Skip(Exception):
+    """Levée par une fabrique quand une dépendance n'est pas disponible."""
+
+
+def _import(module: str, name: str):
+    """Importe `name` depuis `module`, ou ignore le benchmark si une dépendance manque."""
+    try:
+        return getattr(importlib.import_module(module), name)
+    except ImportError as e:
+        raise Skip(f"dépendance manquante ({e.name})")
+
+
+def _import_ready_manager():
+    return _import("cogs.R2P.ready", "ReadyManager")
+
+
+# - - - Benchmarks - - - #
+
+@benchmark("normalize_game_name")
+def bench_normalize(args) -> Case:
+    from cogs.R2P.game_data import normalize_game_name
+
+    titles = synthetic.make_catalog(synthetic.make_rng(args.seed), 1000)
+
+    def run():
+        for title in titles:
+            normalize_game_name(title)
+    return Case(run, items=len(titles))
+
+
+@benchmark("find_common_games")
+def bench_common_games(args) -> Case:
+    from cogs.R2P import game_data
+    ReadyManager = _import_ready_manager()
+
+    rng = synthetic.make_rng(args.seed)
+    libraries, display_names = synthetic.make_game_data(rng, args.players, args.games)
+    game_data.player_games.clear()
+    game_data.player_games.update(libraries)
+    game_data.game_display_names.clear()
+    game_data.game_display_names.update(display_names)
+
+    fake_cog = SimpleNamespace(ready_players=[int(uid) for uid in rng.sample(sorted(libraries), min(8, len(libraries)))])
+
+    def run():
+        ReadyManager.find_common_games(fake_cog)
+    return Case(run)
+
+
+@benchmark("lobby_voice_moves")
+def bench_lobby_voice_moves(args) -> Case:
+    """200 salons vocaux de 5 joueurs prêts : un déplacement ne recalcule que les deux salons concernés."""
+    from cogs.R2P import game_data
+    from cogs.R2P.lobbies import LobbyIndex
+
+    rng = synthetic.make_rng(args.seed)
+    libraries, display_names = synthetic.make_game_data(rng, max(args.players, 1_000), args.games)
+    game_data.player_games.clear()
+    game_data.player_games.update(libraries)
+    game_data.game_display_names.clear()
+    game_data.game_display_names.update(display_names)
+
+    user_ids = [int(uid) for uid in sorted(libraries)[:1_000]]
+    index = LobbyIndex()
+    for i, uid in enumerate(user_ids):
+        index.place(uid, i % 200)
+    for lobby in index.lobbies.values():
+        lobby.common_games()
+    moves = [(rng.choice(user_ids), rng.randrange(200)) for _ in range(1_000)]
+
+    def run():
+        for uid, channel_id in moves:
+            before = index.channel_of[uid]
+            if index.place(uid, channel_id):
+                for key in (before, channel_id):
+                    if key in index.lobbies:
+                        index.lobbies[key].common_games()
+    return Case(run, items=len(moves))
+
+
+@benchmark("catalog_dedup")
+def bench_catalog_dedup(args) -> Case:
+    """Dédoublonnage d'un catalogue de 100 000 titres dont 10 % de doublons (objectif : quelques secondes)."""
+    from cogs.R2P.dedup import find_duplicates
+
+    catalog = synthetic.make_noisy_catalog(synthetic.make_rng(args.seed), max(args.games, 100_000))
+
+    def run():
+        find_duplicates(catalog, {})
+    return Case(run, items=len(catalog))
+
+
+@benchmark("suggest_games")
+def bench_suggest_games(args) -> Case:
+    """/suggest sur un gros serveur : 20 000 jeux, 5 000 joueurs, 15 partenaires habituels (objectif < 100 ms)."""
+    from cogs.R2P import game_data
+
+    rng = synthetic.make_rng(args.seed)
+    libraries, display_names = synthetic.make_game_data(rng, max(args.players, 5_000), max(args.games, 20_000))
+    game_data.player_games.clear()
+    game_data.player_games.update(libraries)
+    game_data.game_display_names.clear()
+    game_data.game_display_names.update(display_names)
+    game_data.rebuild_owner_index()
+
+    user_ids = sorted(libraries)
+    caller = rng.choice(user_ids)
+    group = rng.sample(user_ids, 15)
+
+    def run():
+        game_data.suggest_games(caller, group)
+    return Case(run)
+
+
+def _data_path_case(args, func_name: str) -> Case:
+    from cogs.R2P import game_data
+
+    rng = synthetic.make_rng(args.seed)
+    libraries, display_names = synthetic.make_game_data(rng, args.players, args.games)
+    tmp = tempfile.TemporaryDirectory()
+    original_path = game_data.DATA_PATH
+    game_data.DATA_PATH = Path(tmp.name) / "game_data.json"
+
+    game_data.player_games.clear()
+    game_data.player_games.update(libraries)
+    game_data.game_display_names.clear()
+    game_data.game_display_names.update(display_names)
+    game_data.save_data()
+
+    def teardown():
+        game_data.DATA_PATH = original_path
+        tmp.cleanup()
+
+    return Case(getattr(game_data, func_name), items=len(libraries), teardown=teardown)
+
+
+@benchmark("load_data")
+def bench_load_data(args) -> Case:
+    return _data_path_case(args, "load_data")
+
+
+@benchmark("save_data")
+def bench_save_data(args) -> Case:
+    return _data_path_case(args, "save_data")
+
+
+@benchmark("storage_roundtrip")
+def bench_storage_roundtrip(args) -> Case:
+    """Écriture puis relecture par le service de stockage (codec JSON du profil actif)."""
+    from core.storage import Storage
+
+    rng = synthetic.make_rng(args.seed)
+    libraries, display_names = synthetic.make_game_data(rng, args.players, args.games)
+    data = {"player_libraries": {uid: sorted(games) for uid, games in libraries.items()}, "pretty_print_library": display_names}
+    tmp = tempfile.TemporaryDirectory()
+    path = Path(tmp.name) / "game_data.json"
+
+    def run():
+        Storage._write_batch([("game_data", path, data, 4)])
+        Storage._read("game_data", path, None)
+    return Case(run, items=len(libraries), teardown=tmp.cleanup)
+
+
+@benchmark("outbound_scheduler")
+def bench_outbound_scheduler(args) -> Case:
+    """2 000 appels sans latence à travers la file sortante (coût de la boucle d'événements)."""
+    from core.outbound import BucketPolicy, OutboundScheduler, Priority
+
+    calls = 2_000
+
+    async def noop():
+        return None
+
+    async def run():
+        scheduler = OutboundScheduler(max_queue=calls, policies={"bench": BucketPolicy(rate=10**9, per=1.0)})
+        await asyncio.gather(*(scheduler.run(Priority(n % 4), f"bench:{n % 50}", noop, ttl=None) for n in range(calls)))
+        await scheduler.close()
+    return Case(run, items=calls, is_async=True)
+
+
+@benchmark("parse_time")
+def bench_parse_time(args) -> Case:
+    ReadyManager = _import_ready_manager()
+    inputs = synthetic.make_time_inputs(synthetic.make_rng(args.seed), 1000)
+
+    def run():
+        for value in inputs:
+            ReadyManager.parse_time(None, value)
+    return Case(run, items=len(inputs))
+
+
+@benchmark("generate_lfg_image")
+def bench_lfg_image(args) -> Case:
+    ReadyManager = _import_ready_manager()
+    try:
+        rng = synthetic.make_rng(args.seed)
+        http_client = synthetic.FakeHttpClient(rng)
+    except ImportError as e:
+        raise Skip(f"dépendance manquante ({e.name})")
+
+    os.environ.setdefault("STEAMGRIDDB_API_KEY", "benchmark")
+    cog = ReadyManager(SimpleNamespace(http_client=http_client))
+    members = synthetic.make_members(4)
+    games = ["Lethal Company", "Deep Rock Galactic", "Hades"]
+
+    async def run():
+        buffer = await cog._generate_lfg_image(members, games)
+        buffer.getvalue()
+    return Case(run, is_async=True)
+
+
+def _mosaic_case(args, cold: bool) -> Case:
+    """Plus grande mosaïque : 15 avatars et 30 pochettes (objectif < 150 ms sur un cœur, vignettes en cache)."""
+    try:
+        from cogs.R2P import mosaic
+    except ImportError as e:
+        raise Skip(f"dépendance manquante ({e.name})")
+
+    rng = synthetic.make_rng(args.seed)
+    avatars = [(f"avatar:{n}", synthetic.make_png(rng, (256, 256))) for n in range(mosaic.MAX_AVATARS)]
+    covers = [(f"cover:{n}", synthetic.make_png(rng, (600, 900))) for n in range(mosaic.MAX_COVERS)]
+
+    def run():
+        if cold:
+            # Tout est décodé et mis à l'échelle à chaque rendu
+            mosaic.thumbnails.clear()
+            mosaic.render_lfg_image(avatars, covers, 3, 12)
+        else:
+            mosaic.render_lfg_image([(key, None) for key, _ in avatars], [(key, None) for key, _ in covers], 3, 12)
+
+    if not cold:
+        mosaic.thumbnails.clear()
+        mosaic.render_lfg_image(avatars, covers)
+    return Case(run, items=len(avatars) + len(covers))
+
+
+@benchmark("lfg_mosaic")
+def bench_lfg_mosaic(args) -> Case:
+    return _mosaic_case(args, cold=False)
+
+
+@benchmark("lfg_mosaic_cold")
+def bench_lfg_mosaic_cold(args) -> Case:
+    return _mosaic_case(args, cold=True)
+
+
+@benchmark("quoifeur_classifier")
+def bench_quoifeur_classifier(args) -> Case:
+    classer_message = _import("cogs.fun", "classer_message")
+    messages = synthetic.make_messages(synthetic.make_rng(args.seed), 10_000)
+
+    def run():
+        for content in messages:
+            classer_message(content)
+    return Case(run, items=len(messages))
+
+
+# - - - Mesure - - - #
+
+def measure(case: Case, repeat: int, warmup: int, budget: float) -> dict:
+    """Exécute le benchmark et retourne les statistiques par opération (en secondes)."""
+    loop = asyncio.new_event_loop() if case.is_async else None
+
+    def call():
+        if loop:
+            loop.run_until_complete(case.func())
+        else:
+            case.func()
+
+    try:
+        for _ in range(warmup):
+            call()
+
+        samples = []
+        started = time.perf_counter()
+        while len(samples) < repeat:
+            t0 = time.perf_counter()
+            call()
+            samples.append(time.perf_counter() - t0)
+            # On s'arrête plus tôt sur les benchmarks lents (au moins 3 mesures)
+            if len(samples) >= 3 and time.perf_counter() - started > budget:
+                break
+    finally:
+        if loop:
+            loop.close()
+
+    samples.sort()
+    median = statistics.median(samples)
+    return {
+        "runs": len(samples),
+        "items": case.items,
+        "min": samples[0],
+        "median": median,
+        "mean": statistics.fmean(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "stdev": statistics.pstdev(samples),
+        "items_per_sec": case.items / median if median else None,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Liste les benchmarks dont la médiane a augmenté de plus de `threshold` par rapport à la référence."""
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or "median" not in before or "median" not in result:
+            continue
+        ratio = result["median"] / before["median"] if before["median"] else 1.0
+        result["vs_baseline"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append(f"{name} : {ratio:.2f}x plus lent ({before['median'] * 1e3:.3f} ms -> {result['median'] * 1e3:.3f} ms)")
+    return regressions
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks hors-ligne des chemins chauds du bot.")
+    parser.add_argument("-k", dest="filters", action="append", default=[], help="Ne lance que les benchmarks contenant ce texte")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--players", type=int, default=500, help="Nombre de joueurs synthétiques")
+    parser.add_argument("--games", type=int, default=2000, help="Taille du catalogue synthétique")
+    parser.add_argument("--repeat", type=int, default=30, help="Nombre maximum de mesures par benchmark")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--budget", type=float, default=5.0, help="Durée maximale (s) par benchmark")
+    parser.add_argument("--output", type=Path, help="Écrit le rapport JSON dans ce fichier")
+    parser.add_argument("--compare", type=Path, help="Rapport JSON de référence")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Ralentissement toléré avant de signaler une régression")
+    parser.add_argument("--profile", dest="profiles", action="append", choices=list(runtime.PROFILES),
+                        help="Profil d'exécution (répétable : les résultats de chaque profil sont comparés)")
+    args = parser.parse_args(argv)
+    args.profiles = list(dict.fromkeys(args.profiles or ["default"]))
+    return args
+
+
+def run_profile(args, report: dict, suffix: str):
+    """Lance les benchmarks sélectionnés avec le profil d'exécution déjà installé."""
+    for name, factory in BENCHMARKS.items():
+        if args.filters and not any(f in name for f in args.filters):
+            continue
+        # Les print() des fonctions mesurées ne doivent pas inonder le terminal
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            try:
+                case = factory(args)
+            except Skip as e:
+                case = None
+                skip_reason = str(e)
+
+            if case:
+                try:
+                    result = measure(case, args.repeat, args.warmup, args.budget)
+                finally:
+                    if case.teardown:
+                        case.teardown()
+
+        if case is None:
+            report["results"][name + suffix] = {"skipped": skip_reason}
+            print(f"⏭️  {name + suffix:<24} ignoré : {skip_reason}")
+            continue
+
+        report["results"][name + suffix] = result
+        rate = f"{result['items_per_sec']:,.0f} éléments/s" if case.items > 1 else ""
+        print(f"⏱️  {name + suffix:<24} médiane {result['median'] * 1e3:9.3f} ms  p95 {result['p95'] * 1e3:9.3f} ms  {rate}")
+
+
+def print_profile_comparison(report: dict, profiles: list[str]):
+    """Débit de chaque benchmark par profil, rapporté au premier profil."""
+    reference = profiles[0]
+    print(f"\n📊 Débit par profil (par rapport à {reference}) :")
+    for name in BENCHMARKS:
+        base = report["results"].get(f"{name}@{reference}", {})
+        if "median" not in base:
+            continue
+        cells = []
+        for profile in profiles:
+            result = report["results"].get(f"{name}@{profile}", {})
+            if "median" not in result:
+                cells.append(f"{profile} -")
+                continue
+            cells.append(f"{profile} {result['items'] / result['median']:>12,.0f}/s ×{base['median'] / result['median']:.2f}")
+        print(f"   {name:<24} " + "   ".join(cells))
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "players": args.players,
+            "games": args.games,
+            "timestamp": time.time(),
+            "profiles": {},
+        },
+        "results": {},
+    }
+
+    # Les journaux des fonctions mesurées ne doivent ni inonder le terminal ni fausser les mesures
+    logging.disable(logging.CRITICAL)
+
+    for profile in args.profiles:
+        description = runtime.RuntimeConfig.from_profile(profile).apply()
+        report["meta"]["profiles"][profile] = description
+        if len(args.profiles) > 1:
+            print(f"\n⚙️  {description}")
+        run_profile(args, report, "" if len(args.profiles) == 1 else f"@{profile}")
+
+    if len(args.profiles) > 1:
+        print_profile_comparison(report, args.profiles)
+
+    exit_code = 0
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print("\n❌ Régressions détectées :")
+            for line in regressions:
+                print(f"   - {line}")
+            exit_code = 1
+        else:
+            print(f"\n✅ Aucune régression au-delà de {args.threshold:.0%}.")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=4, ensure_ascii=False), encoding="utf-8")
+        print(f"💾 Rapport écrit dans {args.output}")
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""
+Générateurs de données synthétiques pour les benchmarks.
+
+Tout est dérivé d'une graine : deux exécutions avec la même graine produisent
+exactement les mêmes joueurs, le même catalogue et les mêmes bibliothèques.
+"""
+import asyncio
+import io
+import itertools
+import json
+import random
+import string
+import zlib
+from collections import Counter
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+# Morceaux utilisés pour fabriquer des titres de jeux crédibles
+_WORDS = [
+    "Dark", "Souls", "Lethal", "Company", "Hollow", "Knight", "Deep", "Rock", "Galactic",
+    "Valorant", "Minecraft", "Stardew", "Valley", "Hades", "Portal", "Left", "Dead", "Rocket",
+    "League", "Among", "Us", "Terraria", "Phasmophobia", "Sea", "Thieves", "Monster", "Hunter",
+    "Elden", "Ring", "Baldur's", "Gate", "Overcooked", "Risk", "Rain", "Dont", "Starve",
+]
+_SUFFIXES = ["", "", "", " 2", " 3", " II", " Remastered", ": Édition Deluxe", " GOTY", " Online"]
+
+
+def make_rng(seed: int) -> random.Random:
+    return random.Random(seed)
+
+
+def make_catalog(rng: random.Random, size: int) -> list[str]:
+    """Génère `size` titres distincts (avec accents, ponctuation et suffixes variés)."""
+    titles = []
+    seen = set()
+    for i in itertools.count():
+        if len(titles) >= size:
+            break
+        words = rng.sample(_WORDS, rng.randint(1, 3))
+        title = " ".join(words) + rng.choice(_SUFFIXES)
+        if title in seen:
+            title = f"{title} {i}"
+        seen.add(title)
+        titles.append(title)
+    return titles
+
+
+# Syllables des titres inventés (consonne + voyelle, parfois une finale) : assez pour que les titres ne se ressemblent pas tous
+_SYLLABLES = [c + v + end for c in "bdfgklmnprstvz" for v in "aeiou" for end in ("", "r", "n")]
+_VARIANTS = [" GOTY", " - Game of the Year Edition", ": Édition Deluxe", " Definitive Edition", " (Complete)"]
+
+
+def make_noisy_catalog(rng: random.Random, size: int, duplicate_ratio: float = 0.1) -> dict[str, str]:
+    """
+    Catalogue { clé normalisée : nom d'affichage } de `size` entrées, dont environ `duplicate_ratio`
+    sont des doublons d'un autre titre : faute de frappe, mention d'édition, chiffre romain au lieu d'arabe.
+    """
+    from cogs.R2P.game_data import normalize_game_name
+
+    # Comme dans un vrai catalogue, les titres puisent dans un vocabulaire commun
+    vocabulary = ["".join(rng.choices(_SYLLABLES, k=rng.randint(2, 4))).capitalize() for _ in range(max(50, size // 10))]
+
+    def word() -> str:
+        return rng.choice(vocabulary)
+
+    catalog: dict[str, str] = {}
+    titles: list[str] = []
+    while len(catalog) < size:
+        if titles and rng.random() < duplicate_ratio:
+            title = rng.choice(titles)
+            kind = rng.randrange(3)
+            if kind == 0 and len(title) > 8:
+                i = rng.randrange(1, len(title) - 1)
+                title = title[:i] + title[i + 1:] if rng.random() < 0.5 else title[:i] + title[i + 1] + title[i] + title[i + 2:]
+            elif kind == 1:
+                title += rng.choice(_VARIANTS)
+            else:
+                title = title.replace(" 2", " II").replace(" 3", " III") if title[-2:] in (" 2", " 3") else title + " II"
+        else:
+            title = " ".join(word() for _ in range(rng.randint(1, 3))) + rng.choice(["", "", "", " 2", " 3"])
+            titles.append(title)
+        catalog.setdefault(normalize_game_name(title), title)
+    return catalog
+
+
+def zipf_weights(size: int, exponent: float = 1.1) -> list[float]:
+    """Poids de Zipf : le jeu de rang k est possédé proportionnellement à 1 / k^s."""
+    return [1.0 / (rank ** exponent) for rank in range(1, size + 1)]
+
+
+def make_libraries(rng: random.Random, players: int, catalog: list[str],
+                   mean_size: int = 40, exponent: float = 1.1) -> dict[str, set[str]]:
+    """
+    Associe à chaque joueur une bibliothèque tirée selon une loi de Zipf :
+    quelques jeux très populaires possédés par tout le monde, une longue traîne de jeux rares.
+    """
+    weights = list(itertools.accumulate(zipf_weights(len(catalog), exponent)))
+    libraries = {}
+    for n in range(players):
+        user_id = str(100_000_000_000_000_000 + n)
+        target = max(1, min(len(catalog), int(rng.expovariate(1 / mean_size)) + 1))
+        library = set()
+        while len(library) < target:
+            library.update(rng.choices(catalog, cum_weights=weights, k=target - len(library)))
+        libraries[user_id] = library
+    return libraries
+
+
+def make_game_data(rng: random.Random, players: int, games: int, mean_size: int = 40):
+    """
+    Construit des données au format de cogs.R2P.game_data :
+    (player_games normalisés, game_display_names).
+    """
+    from cogs.R2P.game_data import normalize_game_name
+
+    catalog = make_catalog(rng, games)
+    display_names = {}
+    for title in catalog:
+        display_names.setdefault(normalize_game_name(title), title)
+    normalized = list(display_names)
+    libraries = make_libraries(rng, players, normalized, mean_size)
+    return libraries, display_names
+
+
+def make_time_inputs(rng: random.Random, count: int) -> list[str]:
+    """Saisies typiques de `/ready <delai>`."""
+    templates = ["{h}h", "{h}h{m:02d}", "{m}m", "{m} min", "{m}", "{h}.5h", "{h} heures {m} minutes", "{h},5 h"]
+    return [rng.choice(templates).format(h=rng.randint(0, 5), m=rng.randint(0, 59)) for _ in range(count)]
+
+
+def make_messages(rng: random.Random, count: int, hit_ratio: float = 0.05) -> list[str]:
+    """Messages de salon : majorité de bavardage, une petite part déclenche une blague."""
+    triggers = ["je suis {w}", "Je m'appelle {w}", "pourquoi ?", "c'est quoi", "oui !", "non...", "bah OUI"]
+    messages = []
+    for _ in range(count):
+        if rng.random() < hit_ratio:
+            messages.append(rng.choice(triggers).format(w=rng.choice(_WORDS)))
+        else:
+            length = rng.randint(1, 25)
+            words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(length)]
+            messages.append(" ".join(words) + rng.choice(["", ".", " !", " ?", " :)"]))
+    return messages
+
+
+# - - - Images factices - - - #
+
+def make_png(rng: random.Random, size: tuple[int, int]) -> bytes:
+    """Image PNG unie avec un léger dégradé (pour que l'encodage ne soit pas trivial)."""
+    from PIL import Image
+
+    color = tuple(rng.randint(0, 255) for _ in range(3))
+    img = Image.new("RGB", size, color)
+    overlay = Image.linear_gradient("L").resize(size)
+    img.putalpha(overlay)
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class FakeHttpClient:
+    """
+    Remplace bot.http_client : répond hors-ligne aux requêtes vers le CDN Discord
+    et SteamGridDB avec des avatars et pochettes synthétiques.
+    `latency` (en secondes) simule le temps de réponse du réseau.
+    """
+    def __init__(self, rng: random.Random, avatar_count: int = 8, cover_count: int = 8, latency: float = 0.0):
+        self.avatars = [make_png(rng, (256, 256)) for _ in range(avatar_count)]
+        self.covers = [make_png(rng, (600, 900)) for _ in range(cover_count)]
+        self.latency = latency
+        self.calls = 0
+        self.calls_by_host: Counter[str] = Counter()
+
+    async def get(self, url: str, **kwargs):
+        self.calls += 1
+        self.calls_by_host[urlsplit(url).hostname or ""] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if "/search/autocomplete/" in url:
+            body = json.dumps({"data": [{"id": zlib.crc32(url.encode()) % 10_000}]}).encode()
+        elif "/grids/game/" in url:
+            game_id = int(url.split("/grids/game/")[1].split("?")[0])
+            body = json.dumps({"data": [{"url": f"https://cdn2.steamgriddb.com/grid/{game_id}.png"}]}).encode()
+        elif "steamgriddb.com/grid/" in url:
+            body = self.covers[int(url.rsplit("/", 1)[1].split(".")[0]) % len(self.covers)]
+        else:
+            body = self.avatars[zlib.crc32(url.encode()) % len(self.avatars)]
+        return SimpleNamespace(status=200, headers={}, body=body, json=lambda: json.loads(body))
+
+    async def close(self):
+        pass
+
+
+def make_members(count: int) -> list:
+    """Membres factices exposant juste ce que le rendu utilise (id, display_avatar)."""
+    members = []
+    for n in range(count):
+        url = f"https://cdn.discordapp.com/avatars/{n}/fake.png"
+        avatar = SimpleNamespace(url=url)
+        avatar.with_format = lambda fmt, _a=avatar: _a
+        members.append(SimpleNamespace(
+            id=100_000_000_000_000_000 + n,
+            name=f"joueur{n}",
+            display_name=f"Joueur {n}",
+            display_avatar=avatar,
+        ))
+    return members
+
+
+# - - - Serveur Discord factice (payloads gateway) - - - #
+
+GUILD_ID = 900_000_000_000_000_000
+VOICE_CHANNEL_ID = GUILD_ID + 1
+TEXT_CHANNEL_ID = GUILD_ID + 2
+
+
+def make_trace(rng: random.Random, players: int, events: int, duration: float = 3600.0) -> list[dict]:
+    """
+    Trace synthétique au format de core.trace, entre les joueurs de make_libraries :
+    surtout des messages, des changements de statut et d'état vocal, et quelques commandes LFG.
+    """
+    from core import trace
+
+    user_ids = [100_000_000_000_000_000 + n for n in range(players)]
+    messages = make_messages(rng, events)
+    in_voice: set[int] = set()
+    timeline = []
+
+    for n, t in enumerate(sorted(rng.uniform(0, duration) for _ in range(events))):
+        user_id = rng.choice(user_ids)
+        event = {"t": round(t, 3), "u": user_id, "g": GUILD_ID}
+        roll = rng.random()
+        if roll < 0.70:
+            event.update(k=trace.MESSAGE, ch=TEXT_CHANNEL_ID, c=messages[n], n=None, b=False)
+        elif roll < 0.85:
+            event.update(k=trace.PRESENCE, s=rng.choice(["online", "online", "idle", "offline"]))
+        elif roll < 0.93:
+            joined = user_id not in in_voice
+            (in_voice.add if joined else in_voice.discard)(user_id)
+            event.update(k=trace.VOICE, b=None if joined else VOICE_CHANNEL_ID, a=VOICE_CHANNEL_ID if joined else None)
+        else:
+            command = rng.choices(["ready", "unready", "addgame"], weights=[6, 3, 1])[0]
+            options = {"jeux": ", ".join(rng.sample(_WORDS, 2))} if command == "addgame" else {}
+            event.update(k=trace.INTERACTION, ch=TEXT_CHANNEL_ID, c=command, o=options)
+        timeline.append(event)
+    return timeline
+
+
+def make_guild_payloads(rng: random.Random, member_count: int, online_ratio: float = 0.15, voice_count: int = 40) -> dict:
+    """
+    Payloads bruts, au format de la gateway, d'un grand serveur :
+    - "guild" : le GUILD_CREATE (pour un grand serveur, seuls les membres en vocal y figurent)
+    - "members" : la liste complète, telle que renvoyée par le chunking
+    - "presences" : un PRESENCE_UPDATE par membre en ligne, avec une activité de jeu
+    """
+    roles = [{
+        "id": str(GUILD_ID + 10 + n), "name": "@everyone" if n == 0 else f"rôle {n}",
+        "permissions": "0", "position": n, "color": 0, "hoist": False, "managed": False, "mentionable": False,
+    } for n in range(8)]
+    roles[0]["id"] = str(GUILD_ID)
+
+    members = []
+    for n in range(member_count):
+        user_id = str(200_000_000_000_000_000 + n)
+        members.append({
+            "user": {
+                "id": user_id,
+                "username": f"membre{n}",
+                "global_name": f"Membre {n}",
+                "discriminator": "0",
+                "avatar": f"{zlib.crc32(user_id.encode()):032x}" if rng.random() < 0.7 else None,
+            },
+            "roles": [role["id"] for role in rng.sample(roles[1:], rng.randint(0, 3))],
+            "joined_at": "2023-01-01T00:00:00+00:00",
+            "nick": f"Pseudo {n}" if rng.random() < 0.2 else None,
+            "deaf": False,
+            "mute": False,
+            "flags": 0,
+        })
+
+    voice_members = rng.sample(members, min(voice_count, member_count))
+    voice_states = [{
+        "user_id": m["user"]["id"], "channel_id": str(VOICE_CHANNEL_ID), "session_id": f"s{i}",
+        "deaf": False, "mute": False, "self_deaf": False, "self_mute": False, "self_video": False,
+        "suppress": False, "request_to_speak_timestamp": None,
+    } for i, m in enumerate(voice_members)]
+
+    games = make_catalog(rng, 200)
+    presences = [{
+        "guild_id": str(GUILD_ID),
+        "user": {"id": m["user"]["id"]},
+        "status": rng.choice(["online", "idle", "dnd"]),
+        "client_status": {"desktop": "online"},
+        "activities": [{"name": rng.choice(games), "type": 0, "created_at": 1_700_000_000_000}],
+    } for m in members if rng.random() < online_ratio]
+
+    guild = {
+        "id": str(GUILD_ID),
+        "name": "Serveur synthétique",
+        "owner_id": members[0]["user"]["id"] if members else "0",
+        "member_count": member_count,
+        "large": member_count >= 250,
+        "roles": roles,
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+        "channels": [],
+        "threads": [],
+        "members": voice_members,
+        "voice_states": voice_states,
+        "presences": [],
+    }
+    return {"guild": guild, "members": members, "presences": presences}
@@ -1,74 +1,267 @@
 import os
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+from pathlib import Path
+
 import discord
 from discord.ext import commands
-from dotenv import load_dotenv
+
+from core.config import GatewayConfig
+from core.hot_reload import HotReloader, discover_extensions
+from core.http import HttpClient
+from core.instrumentation import InstrumentedTree, instrument_listener, record_command
+from core.logs import setup_logging
+from core.metrics import metrics, start_prometheus_server
+from core.outbound import OutboundScheduler
+from core.runtime import RuntimeConfig
+from core.storage import Storage
+from core.watchdog import LoopWatchdog
+
+logger = logging.getLogger(__name__)
+
+metrics.describe("gateway_latency_seconds", "Latence du battement de cœur de la gateway, par shard")
+metrics.describe("shard_up", "1 si le shard est connecté, 0 sinon")
+
+# Empreinte de la dernière version de l'arbre de commandes envoyée à Discord
+TREE_HASH_FILE = Path("./command_tree_hash.json")
 
 class LeBotaFG(commands.Bot):
     """
     Classe principale du bot. 
     Gère la configuration initiale et le chargement dynamique des modules (Cogs).
     """
-    def __init__(self):
-        # Configuration des permissions (intents) nécessaires au bot
-        intents = discord.Intents.default()
-        intents.message_content = True
-        intents.members = True
-        intents.presences = True
+    def __init__(self, config: GatewayConfig | None = None):
+        # Intents, cache de membres et chunking (réglables dans le .env, voir core/config.py)
+        self.config = config or GatewayConfig.from_env()
+
+        # Correspondance écouteur d'origine -> écouteur chronométré (pour pouvoir le retirer)
+        self._instrumented_listeners: dict = {}
 
         # Initialisation de la classe parente commands.Bot
         super().__init__(
             command_prefix=commands.when_mentioned_or('!'), 
-            intents=intents
+            tree_cls=InstrumentedTree,
+            **self.config.client_kwargs()
         )
 
+        # Client HTTP partagé (avatars, SteamGridDB...), créé dans setup_hook
+        self.http_client: HttpClient | None = None
+
+        # Stockage partagé des petits fichiers JSON (données en mémoire, écritures hors de la boucle)
+        self.storage = Storage()
+
+        # File prioritaire des appels REST sortants (annonces, rôles, blagues...)
+        self.outbound = OutboundScheduler()
+
+        # Registre des métriques (consultable via /stats)
+        self.metrics = metrics
+        self._metrics_server = None
+
+        # Surveillance du retard de la boucle asyncio (seuil réglable dans le .env)
+        lag_threshold_ms = int(os.getenv('LOOP_LAG_THRESHOLD_MS', 200))
+        self.watchdog = LoopWatchdog(threshold=lag_threshold_ms / 1000)
+
+        # Rechargement à chaud des Cogs avec transmission de leur état (/reload)
+        self.hot_reload = HotReloader(self)
+
     async def setup_hook(self):
         """
         Méthode exécutée automatiquement avant la connexion à Discord.
         C'est l'endroit idéal pour charger les Cogs et synchroniser l'arbre des commandes.
         """
-        print("Initialisation : Chargement des extensions (Cogs)...")
-        
-        # Parcours dynamique du dossier 'cogs' et de ses sous-dossiers
-        for root, dirs, files in os.walk("./cogs"):
-            for filename in files:
-                if filename.endswith(".py"):
-                    # Transformation du chemin d'accès en format module (ex: cogs.R2P.manage_libraries)
-                    path = os.path.relpath(os.path.join(root, filename), ".")
-                    extension = path.replace(os.sep, ".")[:-3]
-                    
-                    try:
-                        # Utilisation de 'self' pour charger l'extension dans l'instance courante
-                        await self.load_extension(extension)
-                        print(f"✅ {extension} - chargé")
-                    except Exception as e:
-                        print(f"❌ {extension} - erreur : {e}")
-        
-        # Synchronisation des commandes slash (UI) avec l'API Discord
+        # Le client HTTP doit exister avant que les Cogs ne s'en servent
+        self.http_client = HttpClient()
+
+        self.watchdog.start()
+
+        # Endpoint Prometheus optionnel, uniquement sur localhost
+        metrics_port = os.getenv('METRICS_PORT')
+        if metrics_port:
+            self._metrics_server = await start_prometheus_server(self.metrics, int(metrics_port))
+            logger.info("Métriques exposées sur http://127.0.0.1:%s/metrics", metrics_port)
+
+        logger.info("Gateway : %s", self.config.describe())
+        logger.info("Chargement des extensions (Cogs)...")
+        started_at = time.perf_counter()
+
+        # Parcours dynamique du dossier 'cogs' et de ses sous-dossiers (modules qui définissent setup)
+        extensions = discover_extensions()
+
+        # Les extensions sont indépendantes : leurs cog_load (lectures de fichiers...) se chevauchent
+        timings = await asyncio.gather(*[self._load_extension_timed(extension) for extension in extensions])
+        loading_ms = (time.perf_counter() - started_at) * 1000
+
+        # Synchronisation des commandes slash (UI) avec l'API Discord, seulement si elles ont changé
+        sync_started_at = time.perf_counter()
+        synced = await self.sync_tree_if_changed()
+        sync_ms = (time.perf_counter() - sync_started_at) * 1000
+
+        logger.info("Démarrage : extensions %.0f ms, synchronisation %.0f ms%s", loading_ms, sync_ms, "" if synced else " (ignorée)")
+        for extension, duration_ms in sorted(timings, key=lambda t: -t[1]):
+            logger.debug("Chargement de %s : %.1f ms", extension, duration_ms, extra={"duration_ms": round(duration_ms, 1)})
+
+        # Mode développement : les Cogs modifiés sur le disque sont rechargés automatiquement
+        if os.getenv('COGS_WATCH') == "1":
+            self.hot_reload.start_watching()
+            logger.info("Surveillance de cogs/ activée (rechargement automatique)")
+
+    async def _load_extension_timed(self, extension: str) -> tuple[str, float]:
+        """Charge une extension et retourne son temps de chargement (import + setup + cog_load)."""
+        started_at = time.perf_counter()
+        try:
+            # Utilisation de 'self' pour charger l'extension dans l'instance courante
+            await self.load_extension(extension)
+            logger.info("%s chargé", extension)
+        except Exception as e:
+            logger.exception("%s : erreur au chargement : %s", extension, e)
+        return extension, (time.perf_counter() - started_at) * 1000
+
+    def _tree_hash(self) -> str:
+        """Empreinte de l'arbre de commandes tel qu'il serait envoyé à Discord."""
+        payload = []
+        for command in self.tree.get_commands():
+            try:
+                payload.append(command.to_dict(self.tree))
+            except TypeError:
+                # Versions de discord.py antérieures à 2.4 : to_dict() ne prend pas l'arbre
+                payload.append(command.to_dict())
+        payload.sort(key=lambda c: (c.get("type", 1), c["name"]))
+        serialized = json.dumps({"application_id": self.application_id, "commands": payload}, sort_keys=True)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    async def sync_tree_if_changed(self) -> bool:
+        """
+        tree.sync() est un appel REST global limité par Discord : on ne le fait que si
+        l'arbre a changé depuis la dernière synchronisation (ou si FORCE_TREE_SYNC=1).
+        """
+        current_hash = self._tree_hash()
+        try:
+            stored_hash = json.loads(TREE_HASH_FILE.read_text(encoding="utf-8")).get("hash")
+        except (FileNotFoundError, json.JSONDecodeError):
+            stored_hash = None
+
+        if current_hash == stored_hash and os.getenv("FORCE_TREE_SYNC") != "1":
+            logger.info("Commandes slash inchangées : pas de synchronisation")
+            return False
+
         await self.tree.sync()
-        print("🌐 Commandes Slash synchronisées avec succès.")
+        TREE_HASH_FILE.write_text(json.dumps({"hash": current_hash}), encoding="utf-8")
+        logger.info("Commandes slash synchronisées")
+        return True
 
     async def on_ready(self):
         """
         Événement déclenché quand le bot est connecté à Discord et prêt à interagir.
         Remplacement du décorateur @bot.event par la surcharge de la méthode.
         """
-        print(f'🤖 Connecté en tant que {self.user} (ID: {self.user.id})')
-        print('--- Le bot est opérationnel ---')
+        logger.info("Connecté en tant que %s (ID: %s)", self.user, self.user.id)
+
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        """Fin d'une commande slash réussie : on enregistre sa durée."""
+        record_command(interaction, command.qualified_name)
+
+    def add_listener(self, func, name=discord.utils.MISSING):
+        """Chaque écouteur ajouté par un Cog est chronométré automatiquement."""
+        name = func.__name__ if name is discord.utils.MISSING else name
+        wrapped = instrument_listener(func, name)
+        self._instrumented_listeners[(func, name)] = wrapped
+        super().add_listener(wrapped, name)
+
+    def remove_listener(self, func, name=discord.utils.MISSING):
+        name = func.__name__ if name is discord.utils.MISSING else name
+        wrapped = self._instrumented_listeners.pop((func, name), func)
+        super().remove_listener(wrapped, name)
+
+    async def close(self):
+        """Arrêt propre : déconnexion de Discord, écriture des données en attente puis fermeture des connexions HTTP."""
+        self.hot_reload.stop()
+        # Les appels REST encore en file n'ont plus de sens une fois déconnecté
+        await self.outbound.close()
+        await super().close()
+        await self.storage.close()
+        self.watchdog.stop()
+        if self.http_client:
+            await self.http_client.close()
+        if self._metrics_server:
+            await self._metrics_server.cleanup()
+
+
+class ShardedLeBotaFG(LeBotaFG, commands.AutoShardedBot):
+    """
+    Variante multi-shards du bot (SHARDED=1 dans le .env).
+    Chaque shard a sa propre connexion à la gateway : on suit leur santé individuellement.
+    """
+    HEALTH_INTERVAL = 30
+
+    def __init__(self, config: GatewayConfig | None = None):
+        super().__init__(config)
+        self._shard_health_task: asyncio.Task | None = None
+
+    async def setup_hook(self):
+        await super().setup_hook()
+        self._shard_health_task = self.loop.create_task(self._record_shard_health())
+
+    async def _record_shard_health(self):
+        """Relève périodiquement la latence et l'état de chaque shard."""
+        await self.wait_until_ready()
+        while not self.is_closed():
+            for shard_id, latency in self.latencies:
+                if math.isfinite(latency):
+                    self.metrics.gauge("gateway_latency_seconds", shard=shard_id).set(latency)
+                shard = self.get_shard(shard_id)
+                self.metrics.gauge("shard_up", shard=shard_id).set(0 if shard is None or shard.is_closed() else 1)
+            await asyncio.sleep(self.HEALTH_INTERVAL)
+
+    async def close(self):
+        if self._shard_health_task:
+            self._shard_health_task.cancel()
+        await super().close()
+
+    async def on_shard_ready(self, shard_id: int):
+        self.metrics.gauge("shard_up", shard=shard_id).set(1)
+        guilds = sum(1 for guild in self.guilds if guild.shard_id == shard_id)
+        self.metrics.gauge("shard_guilds", shard=shard_id).set(guilds)
+        logger.info("Shard %s prêt (%d serveur(s))", shard_id, guilds)
+
+    async def on_shard_disconnect(self, shard_id: int):
+        self.metrics.gauge("shard_up", shard=shard_id).set(0)
+        self.metrics.counter("shard_disconnects_total", shard=shard_id).inc()
+
+    async def on_shard_resumed(self, shard_id: int):
+        self.metrics.gauge("shard_up", shard=shard_id).set(1)
+        self.metrics.counter("shard_resumes_total", shard=shard_id).inc()
 
 
 def main():
     """Point d'entrée du programme."""
+    from dotenv import load_dotenv
+
     # Charge le token depuis le fichier caché ".env"
     load_dotenv()
-    TOKEN = os.getenv('DISCORD_TOKEN')
 
-    if not TOKEN:
-        print("Erreur critique : Aucun token Discord (DISCORD_TOKEN) trouvé dans le fichier .env")
-        return
+    # Journalisation via un thread dédié (niveaux et format réglables dans le .env, voir core/logs.py)
+    log_listener = setup_logging()
+    try:
+        TOKEN = os.getenv('DISCORD_TOKEN')
+        if not TOKEN:
+            logger.critical("Aucun token Discord (DISCORD_TOKEN) trouvé dans le fichier .env")
+            return
+
+        # Boucle d'événements et codec JSON (RUNTIME_PROFILE, voir core/runtime.py), avant toute création de boucle
+        logger.info("Exécution : %s", RuntimeConfig.from_env().apply())
 
-    # Création de l'instance du bot et lancement
-    bot = LeBotaFG()
-    bot.run(TOKEN)
+        # Création de l'instance du bot et lancement
+        config = GatewayConfig.from_env()
+        bot = ShardedLeBotaFG(config) if config.sharded else LeBotaFG(config)
+        # log_handler=None : discord.py écrit dans notre file au lieu d'installer son propre handler
+        bot.run(TOKEN, log_handler=None)
+    finally:
+        # Vide la file avant de quitter
+        log_listener.stop()
 
 # S'assure que le bot ne se lance que si ce fichier est exécuté directement
 if __name__ == '__main__':
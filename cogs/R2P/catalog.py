@@ -0,0 +1,131 @@
+import asyncio
+import io
+import logging
+
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+from cogs.R2P.dedup import DEFAULT_THRESHOLD, MergeProposal, find_duplicates
+from cogs.R2P.game_data import attach_storage, game_display_names, game_owners, merge_games
+from core.checks import is_owner
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+metrics.describe("catalog_dedup_seconds", "Durée d'une recherche de doublons sur tout le catalogue")
+metrics.describe("catalog_merges_total", "Entrées du catalogue fusionnées dans une autre")
+
+# Propositions montrées dans le message (la liste complète est jointe en fichier)
+PREVIEW_LINES = 10
+
+
+def _describe(number: int, proposal: MergeProposal) -> str:
+    """« 3. [similar 0.91] Hades (12) ← Hadès (2), Hades GOTY (1) »"""
+    sources = ", ".join(f"{game_display_names.get(key, key)} ({len(game_owners.get(key, ()))})" for key in proposal.sources)
+    target = f"{game_display_names.get(proposal.target, proposal.target)} ({len(game_owners.get(proposal.target, ()))})"
+    return f"{number}. [{proposal.reason} {proposal.score:.2f}] {target} ← {sources}"
+
+
+class CatalogAdmin(commands.Cog):
+    """
+    Entretien du catalogue de jeux, réservé au propriétaire du bot : recherche des doublons
+    (hors de la boucle) puis fusion des propositions approuvées.
+    """
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        # Propositions du dernier /dedup-scan (None : déjà appliquée)
+        self.proposals: list[MergeProposal | None] = []
+        self._scanning = False
+
+    async def cog_load(self):
+        await attach_storage(self.bot.storage)
+
+    @app_commands.command(name="dedup-scan", description="[Admin] Cherche les doublons du catalogue de jeux")
+    @app_commands.describe(seuil="Similarité minimale entre deux titres (0.70 à 1.00)")
+    @app_commands.default_permissions(administrator=True)
+    @is_owner()
+    async def dedup_scan(self, interaction: discord.Interaction, seuil: app_commands.Range[float, 0.7, 1.0] = DEFAULT_THRESHOLD):
+        """Regroupe les titres proches du catalogue et propose une fusion par groupe (rien n'est modifié)."""
+        if self._scanning:
+            await interaction.response.send_message("⏳ Une recherche est déjà en cours.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        # Copies prises sur la boucle : le thread ne voit pas les /addgame qui arrivent pendant le calcul
+        names = dict(game_display_names)
+        owner_counts = {key: len(owners) for key, owners in game_owners.items()}
+        self._scanning = True
+        try:
+            with metrics.timer("catalog_dedup_seconds"):
+                proposals = await asyncio.to_thread(find_duplicates, names, owner_counts, seuil)
+        finally:
+            self._scanning = False
+        self.proposals = list(proposals)
+        logger.info("Dédoublonnage : %d proposition(s) sur %d titres", len(proposals), len(names))
+
+        if not proposals:
+            await interaction.followup.send(f"✅ Aucun doublon trouvé parmi {len(names)} titres.", ephemeral=True)
+            return
+
+        lines = [_describe(number, proposal) for number, proposal in enumerate(proposals, start=1)]
+        preview = "\n".join(lines[:PREVIEW_LINES])
+        more = f"\n… et {len(lines) - PREVIEW_LINES} autre(s) dans le fichier joint" if len(lines) > PREVIEW_LINES else ""
+        await interaction.followup.send(
+            f"🔎 **{len(proposals)} fusion(s) proposée(s)** parmi {len(names)} titres :\n```\n{preview[:1500]}\n```{more}\n"
+            "Applique celles que tu approuves avec `/dedup-merge` (ex: `1,3,7` ou `tout`).",
+            file=discord.File(io.BytesIO("\n".join(lines).encode("utf-8")), filename="dedup.txt"),
+            ephemeral=True
+        )
+
+    @app_commands.command(name="dedup-merge", description="[Admin] Applique des fusions proposées par /dedup-scan")
+    @app_commands.describe(propositions="Numéros séparés par des virgules (ex: 1,3,7), ou « tout »")
+    @app_commands.default_permissions(administrator=True)
+    @is_owner()
+    async def dedup_merge(self, interaction: discord.Interaction, propositions: str):
+        """Fusionne les propositions choisies dans toutes les bibliothèques, en une seule fois."""
+        if propositions.strip().lower() == "tout":
+            numbers = [n for n, proposal in enumerate(self.proposals, start=1) if proposal is not None]
+        else:
+            try:
+                numbers = sorted({int(part) for part in propositions.split(",") if part.strip()})
+            except ValueError:
+                await interaction.response.send_message("❌ Format attendu : des numéros séparés par des virgules, ou `tout`.", ephemeral=True)
+                return
+
+        invalid = [n for n in numbers if not 1 <= n <= len(self.proposals) or self.proposals[n - 1] is None]
+        if not numbers or invalid:
+            await interaction.response.send_message(
+                f"❌ Proposition(s) inconnue(s) ou déjà appliquée(s) : {', '.join(map(str, invalid)) or 'aucune choisie'}. "
+                "Lance `/dedup-scan` pour une liste à jour.",
+                ephemeral=True
+            )
+            return
+
+        chosen = [self.proposals[n - 1] for n in numbers]
+        try:
+            libraries = merge_games([(proposal.target, proposal.sources) for proposal in chosen])
+        except ValueError as e:
+            # Le catalogue a changé depuis la recherche : rien n'a été modifié
+            await interaction.response.send_message(f"❌ Fusion annulée, rien n'a été modifié : {e}. Relance `/dedup-scan`.", ephemeral=True)
+            return
+
+        merged = sum(len(proposal.sources) for proposal in chosen)
+        for n in numbers:
+            self.proposals[n - 1] = None
+        metrics.counter("catalog_merges_total").inc(merged)
+        logger.info("Dédoublonnage : %d titre(s) fusionné(s), %d bibliothèque(s) modifiée(s)", merged, libraries)
+
+        await interaction.response.send_message(
+            f"🧹 {len(chosen)} fusion(s) appliquée(s) : {merged} titre(s) retiré(s) du catalogue, {libraries} bibliothèque(s) mise(s) à jour.",
+            ephemeral=True
+        )
+
+        # Les jeux en commun des joueurs prêts ont pu changer
+        ready_cog = self.bot.get_cog('ReadyManager')
+        if ready_cog and ready_cog.ready_players and interaction.guild:
+            await ready_cog.update_announcement(interaction.guild)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(CatalogAdmin(bot))
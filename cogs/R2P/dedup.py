@@ -0,0 +1,239 @@
+"""
+Dédoublonnage du catalogue (game_display_names), hors de la boucle.
+
+Avec le temps, un même jeu est enregistré sous plusieurs noms (faute de frappe, édition,
+« GOTY », chiffres romains ou arabes) : ses possesseurs sont répartis entre plusieurs clés
+et les intersections de bibliothèques rétrécissent. Le regroupement se fait sans comparer
+toutes les paires :
+
+1. Forme canonique : accents, ponctuation, mentions d'édition retirés, chiffres romains
+   convertis (« The Witcher III : GOTY Edition » -> « the witcher 3 »). Deux titres de
+   même forme canonique sont des doublons certains.
+2. Blocage : les numéros du titre doivent être identiques (« Hades » et « Hades 2 » ne se
+   comparent jamais).
+3. LSH : chaque forme canonique reçoit une signature MinHash sur ses trigrammes de
+   caractères ; deux titres ne sont comparés que s'ils partagent une bande de leur
+   signature, dans le même bloc.
+4. Vérification : estimation de Jaccard par la signature, puis similarité d'édition
+   (difflib) au-dessus du seuil.
+
+Les paires retenues sont regroupées (union-find) en propositions de fusion vers la clé la
+plus possédée ; rien n'est modifié ici, les fusions approuvées passent par game_data.merge_games.
+"""
+import operator
+import random
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+
+# Mentions d'édition ignorées en fin de titre (« Remastered » et « Remake » restent : ce sont d'autres jeux)
+EDITION_WORDS = {
+    "edition", "edicion", "version", "goty", "deluxe", "definitive", "complete", "ultimate",
+    "gold", "premium", "standard", "enhanced", "anniversary", "collectors", "collector",
+    "digital", "special", "limited", "director", "directors", "cut", "bundle",
+}
+EDITION_PHRASES = ("game of the year", "jeu de l annee")
+
+ROMAN_NUMERALS = {
+    "ii": "2", "iii": "3", "iv": "4", "v": "5", "vi": "6", "vii": "7", "viii": "8",
+    "ix": "9", "x": "10", "xi": "11", "xii": "12", "xiii": "13", "xiv": "14", "xv": "15",
+    "xvi": "16", "xvii": "17", "xviii": "18", "xix": "19", "xx": "20",
+}
+
+# Signature : NUM_HASHES minimums, découpés en bandes de BAND_ROWS valeurs
+NUM_HASHES = 30
+BAND_ROWS = 3
+# Part des minimums égaux (estimation de la similarité de Jaccard) en dessous de laquelle une paire candidate est écartée
+MIN_AGREEMENT = 0.3
+# Un seau plus gros que ça ne discrimine rien (mots très courants) : il est ignoré
+MAX_BUCKET = 64
+DEFAULT_THRESHOLD = 0.85
+
+_PRIME = (1 << 61) - 1
+_DIGITS = re.compile(r"\d+")
+_SEPARATORS = re.compile(r"[^a-z0-9]")
+
+
+@dataclass
+class MergeProposal:
+    """Fusion proposée : les clés `sources` rejoignent `target` (score : similarité la plus faible retenue)."""
+    target: str
+    sources: list[str]
+    score: float
+    reason: str  # "exact" (même forme canonique) ou "similar"
+
+
+def canonical_title(title: str) -> str:
+    """Forme canonique d'un titre : minuscules sans accents, mots séparés par un espace, sans mention d'édition."""
+    title = unicodedata.normalize("NFD", title.lower()).encode("ascii", "ignore").decode("ascii")
+    title = title.replace("&", " and ")
+    title = re.sub(r"[^a-z0-9]+", " ", title).strip()
+    for phrase in EDITION_PHRASES:
+        title = title.replace(phrase, " ")
+    # Un chiffre romain ne commence pas un titre (« X », « Vi ») ; « I » n'en est un qu'en fin de titre (« Diablo I »)
+    words = title.split()
+    words[1:] = [ROMAN_NUMERALS.get(word, word) for word in words[1:]]
+    if len(words) > 1 and words[-1] == "i":
+        words[-1] = "1"
+    while len(words) > 1 and words[-1] in EDITION_WORDS:
+        words.pop()
+    return " ".join(words)
+
+
+def _block(canonical: str) -> tuple[str, ...]:
+    """Clé de blocage : la suite des numéros du titre."""
+    return tuple(_DIGITS.findall(canonical))
+
+
+class _MinHasher:
+    """
+    Signatures MinHash (NUM_HASHES fonctions) sur les trigrammes de chaque mot, bordé
+    d'espaces : l'ensemble des trigrammes d'un titre est l'union de ceux de ses mots, sa
+    signature est donc le minimum, colonne par colonne, des signatures de ses mots.
+    Le catalogue ne contient que quelques dizaines de milliers de trigrammes distincts :
+    chacun est haché une fois pour toutes, et les signatures des mots sont gardées
+    (zip et min travaillent en C). Les numéros sont dans la clé de blocage, pas ici.
+    """
+    def __init__(self, seed: int = 0):
+        rng = random.Random(seed)
+        self._params = [(rng.randrange(1, _PRIME), rng.randrange(_PRIME)) for _ in range(NUM_HASHES)]
+        self._trigrams: dict[str, tuple[int, ...]] = {}
+        self._words: dict[str, tuple[int, ...]] = {}
+
+    def _trigram(self, trigram: str) -> tuple[int, ...]:
+        vector = self._trigrams.get(trigram)
+        if vector is None:
+            h = zlib.crc32(trigram.encode())
+            vector = self._trigrams[trigram] = tuple((a * h + b) % _PRIME for a, b in self._params)
+        return vector
+
+    def _word(self, word: str) -> tuple[int, ...]:
+        signature = self._words.get(word)
+        if signature is None:
+            text = f" {word} "
+            trigrams = {text[i:i + 3] for i in range(len(text) - 2)}
+            signature = self._words[word] = tuple(map(min, *map(self._trigram, trigrams))) if len(trigrams) > 1 else self._trigram(text)
+        return signature
+
+    def signature(self, canonical: str) -> tuple[int, ...]:
+        words = [word for word in canonical.split() if not word.isdigit()] or [canonical]
+        if len(words) == 1:
+            return self._word(words[0])
+        return tuple(map(min, *map(self._word, words)))
+
+
+def _agreement(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    """Part des fonctions de hachage de même minimum : estimation de la similarité de Jaccard des trigrammes."""
+    return sum(map(operator.eq, a, b)) / NUM_HASHES
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: dict[str, str] = {}
+
+    def find(self, key: str) -> str:
+        root = self.parent.setdefault(key, key)
+        while root != self.parent[root]:
+            root = self.parent[root]
+        while key != root:
+            self.parent[key], key = root, self.parent[key]
+        return root
+
+    def union(self, a: str, b: str):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[rb] = ra
+
+
+def similar(a: str, b: str, threshold: float = DEFAULT_THRESHOLD) -> float | None:
+    """Similarité de deux formes canoniques si elle atteint le seuil (bornes rapides d'abord), sinon None."""
+    if min(len(a), len(b)) / max(len(a), len(b)) < threshold:
+        return None
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+        return None
+    ratio = matcher.ratio()
+    return ratio if ratio >= threshold else None
+
+
+def _is_plain(key: str, title: str) -> bool:
+    """Vrai si le titre est déjà sous sa forme canonique (rien à retirer ni à convertir)."""
+    return key == _SEPARATORS.sub("", canonical_title(title))
+
+
+def find_duplicates(display_names: dict[str, str], owner_counts: dict[str, int],
+                    threshold: float = DEFAULT_THRESHOLD) -> list[MergeProposal]:
+    """
+    Propositions de fusion pour tout le catalogue { clé normalisée : nom d'affichage }.
+    `owner_counts` (clé -> nombre de possesseurs) désigne la clé gardée dans chaque groupe.
+    Travaille sur des copies : à appeler dans un thread.
+    """
+    # 1. Formes canoniques : les clés de même forme sont des doublons certains
+    by_canonical: dict[str, list[str]] = defaultdict(list)
+    for key, title in display_names.items():
+        by_canonical[canonical_title(title) or key].append(key)
+
+    groups = _UnionFind()
+    scores: dict[tuple[str, str], float] = {}
+    for keys in by_canonical.values():
+        for key in keys[1:]:
+            groups.union(keys[0], key)
+
+    # 2-3. Blocage par numéros puis seaux LSH (une entrée par bande)
+    hasher = _MinHasher()
+    buckets: dict[tuple, list[str]] = defaultdict(list)
+    signatures: dict[str, tuple[int, ...]] = {}
+    for canonical in by_canonical:
+        block = _block(canonical)
+        signature = signatures[canonical] = hasher.signature(canonical)
+        for band in range(0, NUM_HASHES, BAND_ROWS):
+            buckets[(block, band, *signature[band:band + BAND_ROWS])].append(canonical)
+
+    # 4. Vérification des paires candidates (chacune une seule fois)
+    checked: set[tuple[str, str]] = set()
+    for members in buckets.values():
+        if len(members) < 2 or len(members) > MAX_BUCKET:
+            continue
+        # Par longueur croissante : au-delà d'un écart de longueur incompatible avec le seuil, on passe au suivant
+        members.sort(key=len)
+        for i, a in enumerate(members):
+            longest = len(a) / threshold
+            for b in members[i + 1:]:
+                if len(b) > longest:
+                    break
+                pair = (a, b) if a < b else (b, a)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                if _agreement(signatures[a], signatures[b]) < MIN_AGREEMENT:
+                    continue
+                score = similar(a, b, threshold)
+                if score is not None:
+                    groups.union(by_canonical[a][0], by_canonical[b][0])
+                    scores[pair] = score
+
+    # Regroupement : une proposition par groupe de plus d'une clé
+    clusters: dict[str, list[str]] = defaultdict(list)
+    for key in display_names:
+        clusters[groups.find(key)].append(key)
+    lowest: dict[str, float] = {}
+    for (a, b), score in scores.items():
+        root = groups.find(by_canonical[a][0])
+        lowest[root] = min(lowest.get(root, 1.0), score)
+
+    proposals = []
+    for root, keys in clusters.items():
+        if len(keys) < 2:
+            continue
+        # Clé gardée : un titre sans mention d'édition ni chiffre romain, puis le plus possédé, puis le plus court
+        keys.sort(key=lambda k: (not _is_plain(k, display_names[k]), -owner_counts.get(k, 0), len(display_names[k]), k))
+        score = lowest.get(root, 1.0)
+        proposals.append(MergeProposal(keys[0], keys[1:], score, "exact" if root not in lowest else "similar"))
+
+    # Les plus sûres et les plus utiles d'abord
+    proposals.sort(key=lambda p: (-p.score, -sum(owner_counts.get(k, 0) for k in p.sources), p.target))
+    return proposals
+
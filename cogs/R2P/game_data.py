@@ -1,8 +1,18 @@
+import asyncio
+import heapq
+import itertools
 import json
+import logging
 import re
 import unicodedata
+from collections import Counter
 from pathlib import Path
 
+from core import codec
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
 # - - - Variables Globales (Base de données en mémoire) - - - #
 
 # Chemin vers le fichier de sauvegarde
@@ -14,6 +24,22 @@ player_games: dict[str, set[str]] = {}
 # Dictionnaire : { "nom_normalise": "Nom d'Affichage" }
 game_display_names: dict[str, str] = {}
 
+# Index inverse, tenu à jour par add_player_game / remove_player_game : { "nom_normalise": {"id1", "id2"} }
+game_owners: dict[str, set[str]] = {}
+
+# Redirections laissées par les fusions du catalogue : { "cle_fusionnee": "cle_gardee" }
+game_aliases: dict[str, str] = {}
+
+# Version de chaque bibliothèque, changée à chaque ajout / retrait : { "id": version }
+# (_epoch change à chaque rechargement complet). Permet de garder en cache un calcul sur un groupe de joueurs.
+library_versions: dict[str, int] = {}
+_version_clock = itertools.count(1)
+_epoch = 0
+
+# Rattachement au service de stockage du bot (voir attach_storage)
+_document = None
+_attach_lock = asyncio.Lock()
+
 
 # - - - Fonctions de traitement - - - #
 
@@ -33,58 +59,225 @@ def normalize_game_name(name: str) -> str:
     return name
 
 
+# - - - Bibliothèques et index des possesseurs - - - #
+
+def resolve_game(key: str) -> str:
+    """Clé à utiliser pour un nom normalisé : une clé fusionnée renvoie vers celle qui l'a absorbée."""
+    return game_aliases.get(key, key)
+
+
+def merge_games(merges: list[tuple[str, list[str]]]) -> int:
+    """
+    Fusionne des entrées du catalogue : chaque clé source est remplacée par sa clé cible dans toutes
+    les bibliothèques, son nom d'affichage disparaît et une redirection est gardée (les prochains
+    /addgame du même titre tombent sur la clé gardée).
+    Tout est vérifié avant la première modification, sans attente au milieu : les fusions
+    s'appliquent entièrement ou pas du tout (ValueError). Retourne le nombre de bibliothèques modifiées.
+    """
+    sources: dict[str, str] = {}
+    for target, keys in merges:
+        if target not in game_display_names:
+            raise ValueError(f"Jeu inconnu dans le catalogue : {target}")
+        for key in keys:
+            if key == target or key not in game_display_names:
+                raise ValueError(f"Jeu inconnu dans le catalogue : {key}")
+            if key in sources:
+                raise ValueError(f"{key} figure dans plusieurs fusions")
+            sources[key] = target
+    for target, _ in merges:
+        if target in sources:
+            raise ValueError(f"{target} est à la fois gardé et fusionné")
+
+    touched = set()
+    for source, target in sources.items():
+        for user_id in game_owners.pop(source, set()):
+            library = player_games[user_id]
+            library.discard(source)
+            library.add(target)
+            game_owners.setdefault(target, set()).add(user_id)
+            touched.add(user_id)
+        del game_display_names[source]
+        game_aliases[source] = target
+
+    # Les redirections qui menaient à une clé fusionnée suivent la fusion
+    for alias, target in game_aliases.items():
+        if target in sources:
+            game_aliases[alias] = sources[target]
+    for user_id in touched:
+        library_versions[user_id] = next(_version_clock)
+
+    mark_modified()
+    return len(touched)
+
+
+def library_stamp(user_ids) -> tuple:
+    """Empreinte des bibliothèques d'un groupe : elle change dès que le groupe ou l'une d'elles change."""
+    return (_epoch, *((uid, library_versions.get(str(uid), 0)) for uid in user_ids))
+
+
+def common_game_keys(user_ids) -> tuple[set[str], list[int]]:
+    """
+    Croise les bibliothèques d'un groupe de joueurs.
+    Retourne : (Clés des jeux en commun, Liste des joueurs sans jeu)
+    """
+    sets_of_games = []
+    excluded_users = []
+
+    for uid in user_ids:
+        library = player_games.get(str(uid))
+        if library:
+            sets_of_games.append(library)
+        else:
+            excluded_users.append(uid)
+
+    # S'il y a 1 seul (ou aucun) joueur avec des jeux, on ne cherche pas de points communs
+    if len(sets_of_games) <= 1:
+        return set(), excluded_users
+
+    # Intersection en partant de la plus petite bibliothèque
+    sets_of_games.sort(key=len)
+    return set.intersection(*sets_of_games), excluded_users
+
+
+def rebuild_owner_index():
+    """Reconstruit game_owners à partir de player_games (au chargement)."""
+    game_owners.clear()
+    for user_id, games in player_games.items():
+        for game in games:
+            game_owners.setdefault(game, set()).add(user_id)
+
+
+def add_player_game(user_id: str, game: str) -> bool:
+    """Ajoute un jeu (normalisé) à la bibliothèque du joueur. Retourne False s'il l'avait déjà."""
+    library = player_games.setdefault(user_id, set())
+    if game in library:
+        return False
+    library.add(game)
+    game_owners.setdefault(game, set()).add(user_id)
+    library_versions[user_id] = next(_version_clock)
+    return True
+
+
+def remove_player_game(user_id: str, game: str) -> bool:
+    """Retire un jeu (normalisé) de la bibliothèque du joueur. Retourne False s'il ne l'avait pas."""
+    library = player_games.get(user_id)
+    if not library or game not in library:
+        return False
+    library.remove(game)
+    library_versions[user_id] = next(_version_clock)
+    owners = game_owners.get(game)
+    if owners is not None:
+        owners.discard(user_id)
+        if not owners:
+            del game_owners[game]
+    return True
+
+
+def suggest_games(user_id: str, group: list[str], limit: int = 10) -> list[tuple[str, int]]:
+    """
+    Jeux que `user_id` ne possède pas, classés par nombre de joueurs du groupe qui les possèdent
+    (à égalité, par nombre total de possesseurs sur le serveur).
+    Retourne : [(nom_normalise, nombre de possesseurs dans le groupe), ...]
+    Le coût dépend de la taille des bibliothèques du groupe, pas de celle du catalogue.
+    """
+    owned = player_games.get(user_id, set())
+    counts = Counter()
+    for member_id in group:
+        if member_id != user_id:
+            counts.update(player_games.get(member_id, ()))
+
+    candidates = ((count, len(game_owners.get(game, ())), game) for game, count in counts.items() if game not in owned)
+    best = heapq.nlargest(limit, candidates)
+    return [(game, count) for count, _, game in best]
+
+
 # - - - Fonctions de Sauvegarde et Chargement - - - #
 
+def _apply(data: dict):
+    """Remplace le contenu des dictionnaires en mémoire sans recréer leur référence."""
+    global _epoch
+    _epoch += 1
+    player_games.clear()
+    game_display_names.clear()
+
+    # Chargement des données (on reconvertit les listes du JSON en sets Python)
+    # On utilise les anciennes clés JSON pour ne pas casser ta sauvegarde existante
+    loaded_libraries = data.get("player_libraries", {})
+    player_games.update({str(k): set(v) for k, v in loaded_libraries.items()})
+
+    game_display_names.update(data.get("pretty_print_library", {}))
+    game_aliases.clear()
+    game_aliases.update(data.get("game_aliases", {}))
+    rebuild_owner_index()
+
+
+def _snapshot() -> dict:
+    """
+    Données au format du fichier JSON.
+    Convertit les sets en listes car le format JSON ne supporte pas les sets.
+    """
+    # On prépare les données avec les clés attendues par ton ancien fichier
+    return {
+        "player_libraries": {str(k): list(v) for k, v in player_games.items()},
+        "pretty_print_library": dict(game_display_names),
+        "game_aliases": dict(game_aliases),
+    }
+
+
+async def attach_storage(storage):
+    """
+    Charge la base (une seule fois, dans le thread de stockage) et la rattache au service
+    de stockage du bot. Les Cogs qui l'utilisent l'appellent tous dans leur cog_load.
+    """
+    global _document
+
+    async with _attach_lock:
+        if _document is not None:
+            return
+        data = await storage.read_json("game_data", DATA_PATH)
+        if data is None:
+            logger.info("Fichier de sauvegarde introuvable : démarrage avec une base vierge")
+        else:
+            _apply(data)
+            logger.info("Sauvegarde des jeux chargée")
+        _document = storage.bind("game_data", DATA_PATH, _snapshot, indent=4)
+
+
+def mark_modified():
+    """Programme l'écriture de la base (regroupée avec les autres écritures du bot, hors de la boucle)."""
+    if _document is not None:
+        _document.mark_dirty()
+    else:
+        save_data()
+
+
 def load_data():
     """
-    Charge la base de données depuis le fichier JSON.
+    Charge la base de données depuis le fichier JSON (lecture synchrone).
     Met à jour les dictionnaires en mémoire sans recréer leur référence.
     """
-    global player_games, game_display_names
-    
     if not DATA_PATH.exists():
-        print("ℹ️ Fichier de sauvegarde introuvable. Démarrage avec une base vierge.")
+        logger.info("Fichier de sauvegarde introuvable : démarrage avec une base vierge")
         return
 
     try:
-        with open(DATA_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            
-            # Nettoyage des dictionnaires actuels
-            player_games.clear()
-            game_display_names.clear()
-            
-            # Chargement des données (on reconvertit les listes du JSON en sets Python)
-            # On utilise les anciennes clés JSON pour ne pas casser ta sauvegarde existante
-            loaded_libraries = data.get("player_libraries", {})
-            player_games.update({str(k): set(v) for k, v in loaded_libraries.items()})
-            
-            game_display_names.update(data.get("pretty_print_library", {}))
-            
-            print("✅ Sauvegarde des jeux chargée avec succès.")
+        with metrics.timer("storage_seconds", file="game_data", op="load"), open(DATA_PATH, "rb") as f:
+            _apply(codec.loads(f.read()))
+            logger.info("Sauvegarde des jeux chargée")
             
     except json.JSONDecodeError:
-        print("❌ Erreur : Le fichier de sauvegarde est corrompu.")
+        logger.error("Le fichier de sauvegarde %s est corrompu", DATA_PATH)
 
 
 def save_data():
-    """
-    Enregistre l'état actuel des dictionnaires dans le fichier JSON.
-    Convertit les sets en listes car le format JSON ne supporte pas les sets.
-    """
+    """Enregistre l'état actuel des dictionnaires dans le fichier JSON (écriture synchrone)."""
     # On s'assure que le dossier parent existe avant de sauvegarder
     DATA_PATH.parent.mkdir(parents=True, exist_ok=True)
     
-    # On prépare les données avec les clés attendues par ton ancien fichier
-    data_to_save = {
-        "player_libraries": {str(k): list(v) for k, v in player_games.items()},
-        "pretty_print_library": game_display_names,
-    }
-    
     try:
-        with open(DATA_PATH, "w", encoding="utf-8") as f:
-            # indent=4 permet de rendre le fichier JSON lisible par un humain
-            json.dump(data_to_save, f, indent=4, ensure_ascii=False)
-        print("💾 Données sauvegardées avec succès.")
+        with metrics.timer("storage_seconds", file="game_data", op="save"), open(DATA_PATH, "wb") as f:
+            # indent=4 permet de rendre le fichier JSON lisible par un humain (ignoré par le codec rapide)
+            f.write(codec.dumps(_snapshot(), indent=4))
+        logger.debug("Données sauvegardées")
     except IOError as e:
-        print(f"❌ Erreur lors de la sauvegarde : {e}")
\ No newline at end of file
+        logger.error("Erreur lors de la sauvegarde : %s", e)
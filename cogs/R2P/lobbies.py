@@ -0,0 +1,96 @@
+"""
+Salons de jeu (lobbies) : les joueurs prêts regroupés par salon vocal.
+
+Chaque joueur prêt appartient à un seul salon : celui du vocal où il se trouve, ou le
+salon « hors vocal » (clé None). Les jeux en commun de chaque salon sont gardés en
+cache avec l'empreinte des bibliothèques de ses joueurs (game_data.library_stamp) :
+un déplacement ne touche que le salon quitté et le salon rejoint, les autres gardent
+leur résultat tant que ni leurs joueurs ni leurs bibliothèques ne changent.
+"""
+from dataclasses import dataclass, field
+
+from cogs.R2P.game_data import common_game_keys, game_display_names, library_stamp
+from core.metrics import metrics
+
+metrics.describe("lobby_recomputes_total", "Jeux en commun recalculés pour un salon de jeu (les autres salons gardent leur cache)")
+metrics.describe("lobby_moves_total", "Joueurs prêts passés d'un salon de jeu à un autre")
+
+# Clé du salon des joueurs prêts qui ne sont dans aucun vocal
+NO_VOICE = None
+
+# Sections de l'annonce : salons affichés au plus, et taille de chaque section
+# (l'Embed entier est limité à 6000 caractères)
+MAX_LOBBY_FIELDS = 8
+LOBBY_FIELD_LIMIT = 400
+
+
+@dataclass
+class Lobby:
+    """Joueurs prêts d'un même salon vocal, dans leur ordre d'arrivée, et jeux en commun en cache."""
+    channel_id: int | None
+    players: dict[int, None] = field(default_factory=dict)
+    _stamp: tuple | None = None
+    _common: list[str] = field(default_factory=list)
+    _excluded: list[int] = field(default_factory=list)
+
+    def common_games(self) -> tuple[list[str], list[int]]:
+        """
+        Jeux en commun (noms d'affichage triés) et joueurs sans jeu du salon.
+        Recalculés uniquement si le salon ou l'une des bibliothèques a changé depuis le dernier appel.
+        """
+        stamp = library_stamp(self.players)
+        if stamp != self._stamp:
+            keys, self._excluded = common_game_keys(self.players)
+            self._common = sorted((game_display_names.get(game, game) for game in keys), key=str.casefold)
+            self._stamp = stamp
+            metrics.counter("lobby_recomputes_total").inc()
+        return self._common, self._excluded
+
+
+class LobbyIndex:
+    """Répartition des joueurs prêts par salon vocal."""
+    def __init__(self):
+        self.lobbies: dict[int | None, Lobby] = {}
+        self.channel_of: dict[int, int | None] = {}
+
+    def __len__(self) -> int:
+        return len(self.lobbies)
+
+    def place(self, user_id: int, channel_id: int | None) -> bool:
+        """Range le joueur dans le salon `channel_id` (None : hors vocal). Retourne False s'il y était déjà."""
+        if user_id in self.channel_of:
+            if self.channel_of[user_id] == channel_id:
+                return False
+            self._leave(user_id)
+            metrics.counter("lobby_moves_total").inc()
+        self.channel_of[user_id] = channel_id
+        lobby = self.lobbies.get(channel_id)
+        if lobby is None:
+            lobby = self.lobbies[channel_id] = Lobby(channel_id)
+        lobby.players[user_id] = None
+        return True
+
+    def remove(self, user_id: int) -> bool:
+        """Retire le joueur de son salon. Retourne False s'il n'était dans aucun."""
+        if user_id not in self.channel_of:
+            return False
+        self._leave(user_id)
+        return True
+
+    def _leave(self, user_id: int):
+        channel_id = self.channel_of.pop(user_id)
+        lobby = self.lobbies[channel_id]
+        del lobby.players[user_id]
+        if not lobby.players:
+            del self.lobbies[channel_id]
+
+    def clear(self):
+        self.lobbies.clear()
+        self.channel_of.clear()
+
+    def ordered(self) -> list[Lobby]:
+        """Salons à afficher : les plus peuplés d'abord, le salon « hors vocal » en dernier."""
+        return sorted(
+            self.lobbies.values(),
+            key=lambda lobby: (lobby.channel_id is NO_VOICE, -len(lobby.players), lobby.channel_id or 0),
+        )
@@ -5,13 +5,20 @@ from discord import app_commands
 # Importation de notre nouveau gestionnaire de base de données
 # Assure-toi que le nom du fichier correspond bien à ce que tu as choisi (ex: game_data)
 from cogs.R2P.game_data import (
-    load_data, 
-    save_data, 
+    add_player_game,
+    attach_storage,
+    mark_modified,
     normalize_game_name, 
     player_games, 
-    game_display_names
+    game_display_names,
+    remove_player_game,
+    resolve_game,
+    suggest_games
 )
 
+# Nombre de partenaires habituels pris en compte par /suggest
+SUGGEST_PARTNERS = 15
+
 class ManageGames(commands.Cog):
     """
     Cog regroupant toutes les commandes liées à la gestion 
@@ -20,6 +27,10 @@ class ManageGames(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
+    async def cog_load(self):
+        # Les bibliothèques restent en mémoire : plus de relecture du fichier à chaque commande
+        await attach_storage(self.bot.storage)
+
     @app_commands.command(name='addgame', description='Ajoute des jeux à ta bibliothèque (sépare les titres par des virgules)')
     async def addgame(self, interaction: discord.Interaction, jeux: str):
         """Commande pour ajouter un ou plusieurs jeux."""
@@ -27,8 +38,6 @@ class ManageGames(commands.Cog):
         user_id = str(interaction.user.id)
         validation_message = ""
         
-        load_data()
-
         # Découpage de la chaîne de texte en liste de jeux (séparés par des virgules)
         # strip() enlève les espaces inutiles avant et après le nom du jeu
         title_list = [title.strip() for title in jeux.split(",") if title.strip()]
@@ -37,12 +46,9 @@ class ManageGames(commands.Cog):
             await interaction.response.send_message("❌ Aucun titre de jeu valide reçu.", ephemeral=True)
             return
         
-        # Initialisation de la bibliothèque du joueur si elle n'existe pas
-        if user_id not in player_games:
-            player_games[user_id] = set()
-
         for title in title_list:
-            norm_title = normalize_game_name(title)
+            # Un titre fusionné par le dédoublonnage du catalogue renvoie vers le jeu gardé
+            norm_title = resolve_game(normalize_game_name(title))
             
             # Mise à jour du dictionnaire d'affichage si le jeu est nouveau
             if norm_title not in game_display_names:
@@ -51,14 +57,13 @@ class ManageGames(commands.Cog):
                 # On récupère le nom avec la bonne casse s'il existait déjà
                 title = game_display_names[norm_title]
             
-            # Ajout dans la bibliothèque du joueur
-            if norm_title in player_games[user_id]:
-                validation_message += f"**{title}** est déjà dans ta bibliothèque.\n"
-            else:
-                player_games[user_id].add(norm_title)
+            # Ajout dans la bibliothèque du joueur (et dans l'index des possesseurs)
+            if add_player_game(user_id, norm_title):
                 validation_message += f"✅ **{title}** a été ajouté !\n"
+            else:
+                validation_message += f"**{title}** est déjà dans ta bibliothèque.\n"
         
-        save_data()
+        mark_modified()
         await interaction.response.send_message(validation_message, ephemeral=True)
 
         ready_cog = self.bot.get_cog('ReadyManager')
@@ -71,8 +76,6 @@ class ManageGames(commands.Cog):
         user_id = str(interaction.user.id)
         validation_message = ""
         
-        load_data()
-
         # Vérification si le joueur a une bibliothèque et si elle n'est pas vide
         if user_id not in player_games or not player_games[user_id]:
             await interaction.response.send_message("⚠️ Ta bibliothèque est déjà vide !", ephemeral=True)
@@ -85,18 +88,17 @@ class ManageGames(commands.Cog):
             return
         
         for title in title_list:
-            norm_title = normalize_game_name(title)
+            norm_title = resolve_game(normalize_game_name(title))
             
             # Récupération du nom d'affichage correct s'il existe (sinon on garde la saisie de l'utilisateur)
             display_title = game_display_names.get(norm_title, title)
             
-            if norm_title in player_games[user_id]:
-                player_games[user_id].remove(norm_title)
+            if remove_player_game(user_id, norm_title):
                 validation_message += f"❌ **{display_title}** a été retiré.\n"
             else:
                 validation_message += f"🤷 **{display_title}** n'était pas dans ta bibliothèque.\n"
         
-        save_data()
+        mark_modified()
         await interaction.response.send_message(validation_message, ephemeral=True)
 
         ready_cog = self.bot.get_cog('ReadyManager')
@@ -108,8 +110,6 @@ class ManageGames(commands.Cog):
         """Commande pour lister les jeux du joueur."""
         user_id = str(interaction.user.id)
         
-        load_data()
-
         # Si le joueur n'a pas de bibliothèque ou qu'elle est vide
         if user_id not in player_games or not player_games[user_id]:
             await interaction.response.send_message(
@@ -132,6 +132,51 @@ class ManageGames(commands.Cog):
             ephemeral=True
         )
 
+    @app_commands.command(name='suggest', description='Jeux à acheter pour jouer avec tes partenaires habituels')
+    @app_commands.describe(groupe="Avec qui comparer ta bibliothèque")
+    @app_commands.choices(groupe=[
+        app_commands.Choice(name="Mes partenaires habituels", value="habituels"),
+        app_commands.Choice(name="Les joueurs prêts en ce moment", value="prets"),
+    ])
+    async def suggest(self, interaction: discord.Interaction, groupe: str = "habituels"):
+        """Classe les jeux que le joueur n'a pas selon le nombre de joueurs du groupe qui les possèdent."""
+        user_id = interaction.user.id
+        group: list[int] = []
+
+        if groupe == "habituels":
+            sessions_cog = self.bot.get_cog('SessionStats')
+            if sessions_cog:
+                group = sessions_cog.aggregates.frequent_partners(user_id, SUGGEST_PARTNERS)
+            source = "tes partenaires habituels"
+
+        # Pas encore d'historique : on se rabat sur les joueurs prêts
+        if not group:
+            ready_cog = self.bot.get_cog('ReadyManager')
+            group = [uid for uid in ready_cog.ready_players if uid != user_id] if ready_cog else []
+            source = "les joueurs prêts"
+
+        if not group:
+            await interaction.response.send_message(
+                "🤷 Personne avec qui comparer ta bibliothèque pour l'instant (aucun partenaire habituel ni joueur prêt).",
+                ephemeral=True
+            )
+            return
+
+        suggestions = suggest_games(str(user_id), [str(uid) for uid in group])
+        if not suggestions:
+            await interaction.response.send_message(f"✅ Tu as déjà tous les jeux de {source} !", ephemeral=True)
+            return
+
+        lines = []
+        for game, owners in suggestions:
+            missing = " — *il ne manque que toi !*" if owners == len(group) else ""
+            lines.append(f"**{game_display_names.get(game, game)}** : {owners}/{len(group)}{missing}")
+
+        await interaction.response.send_message(
+            f"🛒 **Jeux possédés par {source} :**\n" + "\n".join(lines),
+            ephemeral=True
+        )
+
 # Obligatoire pour charger le Cog
 async def setup(bot: commands.Bot):
     await bot.add_cog(ManageGames(bot))
\ No newline at end of file
@@ -0,0 +1,329 @@
+"""
+Rendu de l'image LFG en mosaïque : jusqu'à MAX_AVATARS avatars et MAX_COVERS pochettes,
+répartis en grilles dont la taille des vignettes s'adapte au nombre d'éléments.
+
+Les visuels ne sont décodés et redimensionnés qu'une fois : `thumbnails` garde une
+version de référence de chaque avatar / pochette, puis chaque taille de vignette déjà
+découpée (cercle ou coins arrondis). Une grille est assemblée rangée par rangée : les
+vignettes sont posées sur une bande transparente, composée en une seule fois sur le fond.
+
+Ce module importe Pillow : ready.py ne le charge qu'au premier rendu.
+Objectif : < 150 ms sur un cœur pour la plus grande mise en page, vignettes en cache
+(voir `python -m benchmarks.run -k lfg_mosaic`).
+"""
+import io
+import logging
+import math
+import random
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from PIL import Image, ImageChops, ImageDraw, ImageFont, ImageOps
+
+logger = logging.getLogger(__name__)
+
+ASSETS_DIR = Path(__file__).parent / "assets"
+
+MAX_AVATARS = 15
+MAX_COVERS = 30
+
+IMG_WIDTH = 1000
+MARGIN = 40
+TEXT_COLOR = (255, 255, 255, 255)
+BACKGROUND_COLOR = (24, 25, 28, 255)
+
+
+@dataclass(frozen=True)
+class TileStyle:
+    """Vignette à sa taille maximale, espacement et hauteur de section autorisée."""
+    width: int
+    height: int
+    spacing: int
+    max_section_height: int
+    shape: str              # "circle" ou "rounded"
+    radius: int = 0         # rayon des coins arrondis à la taille maximale
+
+
+AVATAR_STYLE = TileStyle(width=150, height=150, spacing=40, max_section_height=360, shape="circle")
+COVER_STYLE = TileStyle(width=200, height=300, spacing=50, max_section_height=720, shape="rounded", radius=15)
+
+
+# - - - Mise en page - - - #
+
+@dataclass(frozen=True)
+class Grid:
+    count: int
+    columns: int
+    tile_w: int
+    tile_h: int
+    spacing: int
+
+    @property
+    def rows(self) -> int:
+        return math.ceil(self.count / self.columns) if self.count else 0
+
+    @property
+    def height(self) -> int:
+        return self.rows * self.tile_h + max(0, self.rows - 1) * self.spacing
+
+    def row_sizes(self) -> list[int]:
+        """Nombre de vignettes par rangée (la dernière peut être incomplète)."""
+        return [min(self.columns, self.count - row * self.columns) for row in range(self.rows)]
+
+    def row_width(self, size: int) -> int:
+        return size * self.tile_w + (size - 1) * self.spacing
+
+
+def fit_grid(count: int, style: TileStyle, width: int = IMG_WIDTH - 2 * MARGIN) -> Grid:
+    """
+    Choisit le nombre de colonnes qui donne les plus grandes vignettes tenant dans `width`
+    et dans la hauteur de section du style. L'espacement suit la taille des vignettes.
+    À taille égale, le moins de rangées l'emporte.
+    """
+    if count <= 0:
+        return Grid(0, 1, style.width, style.height, style.spacing)
+
+    ratio = style.spacing / style.width
+    aspect = style.height / style.width
+    best = None
+    for columns in range(1, count + 1):
+        rows = math.ceil(count / columns)
+        by_width = width / (columns + (columns - 1) * ratio)
+        by_height = style.max_section_height / (rows * aspect + (rows - 1) * ratio)
+        tile_w = int(min(style.width, by_width, by_height))
+        if best is None or tile_w >= best.tile_w:
+            best = Grid(count, columns, tile_w, round(tile_w * aspect), round(tile_w * ratio))
+        if by_width < style.width and by_width <= by_height:
+            # Plus de colonnes ne peut que rétrécir les vignettes
+            break
+    return best
+
+
+# - - - Vignettes en cache - - - #
+
+class ThumbnailCache:
+    """
+    LRU des visuels décodés (à la taille maximale de leur style) et des vignettes
+    découpées à chaque taille demandée. Partagé entre les rendus, qui tournent dans
+    des threads : toutes les opérations passent par un verrou.
+    """
+    def __init__(self, max_sources: int = 256, max_tiles: int = 1024):
+        self.max_sources = max_sources
+        self.max_tiles = max_tiles
+        self._sources: OrderedDict[str, Image.Image] = OrderedDict()
+        self._tiles: OrderedDict[tuple[str, int, int], Image.Image] = OrderedDict()
+        # Clé stable (ex: « avatar:<id du membre> ») -> clé de sa dernière version mise en cache
+        self._latest: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._sources
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def clear(self):
+        with self._lock:
+            self._sources.clear()
+            self._tiles.clear()
+            self._latest.clear()
+
+    def latest(self, stable_key: str) -> str | None:
+        """Dernière version en cache d'un visuel (ex: l'ancien avatar d'un membre), None s'il n'y en a plus."""
+        with self._lock:
+            key = self._latest.get(stable_key)
+            return key if key in self._sources else None
+
+    def add(self, key: str, data: bytes, style: TileStyle, stable_key: str | None = None) -> bool:
+        """
+        Décode et met à l'échelle un visuel téléchargé. Retourne False s'il est illisible.
+        `stable_key` permet de retrouver cette version quand la suivante n'est pas encore arrivée.
+        """
+        try:
+            with Image.open(io.BytesIO(data)) as raw:
+                # draft() laisse le décodeur JPEG réduire l'image dès la lecture
+                raw.draft("RGB", (style.width * 2, style.height * 2))
+                source = ImageOps.fit(raw.convert("RGBA"), (style.width, style.height), Image.Resampling.LANCZOS)
+        except (OSError, ValueError):
+            return False
+        with self._lock:
+            self._sources[key] = source
+            self._sources.move_to_end(key)
+            # Une nouvelle version du visuel remplace les vignettes de l'ancienne
+            for tile_key in [k for k in self._tiles if k[0] == key]:
+                del self._tiles[tile_key]
+            while len(self._sources) > self.max_sources:
+                self._sources.popitem(last=False)
+            if stable_key:
+                self._latest[stable_key] = key
+                if len(self._latest) > 2 * self.max_sources:
+                    self._latest = {s: k for s, k in self._latest.items() if k in self._sources}
+        return True
+
+    def tile(self, key: str, size: tuple[int, int], style: TileStyle) -> Image.Image | None:
+        """Vignette découpée à la taille demandée (None si le visuel n'est pas en cache)."""
+        tile_key = (key, *size)
+        with self._lock:
+            tile = self._tiles.get(tile_key)
+            if tile is not None:
+                self._tiles.move_to_end(tile_key)
+                return tile
+            source = self._sources.get(key)
+            if source is None:
+                return None
+            self._sources.move_to_end(key)
+
+        if source.size != size:
+            source = source.resize(size, Image.Resampling.LANCZOS)
+        alpha = ImageChops.multiply(source.getchannel("A"), _mask(size, style.shape, style.radius * size[0] // style.width))
+        tile = source.copy()
+        tile.putalpha(alpha)
+
+        with self._lock:
+            self._tiles[tile_key] = tile
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+        return tile
+
+
+# Cache partagé par tous les rendus (il survit au rechargement de ready.py)
+thumbnails = ThumbnailCache()
+
+
+@lru_cache(maxsize=64)
+def _mask(size: tuple[int, int], shape: str, radius: int) -> Image.Image:
+    mask = Image.new("L", size, 0)
+    draw = ImageDraw.Draw(mask)
+    if shape == "circle":
+        draw.ellipse((0, 0, size[0], size[1]), fill=255)
+    else:
+        draw.rounded_rectangle((0, 0, size[0], size[1]), radius=radius, fill=255)
+    return mask
+
+
+@lru_cache(maxsize=32)
+def placeholder(size: tuple[int, int], style: TileStyle) -> Image.Image:
+    """Vignette neutre (visuel indisponible ou arrivé trop tard) : forme grisée et translucide."""
+    tile = Image.new("RGBA", size, (60, 62, 68, 170))
+    tile.putalpha(ImageChops.multiply(tile.getchannel("A"), _mask(size, style.shape, style.radius * size[0] // style.width)))
+    return tile
+
+
+@lru_cache(maxsize=16)
+def _background(path: Path, size: tuple[int, int]) -> Image.Image:
+    """Fond recadré à la taille de l'image (gardé en cache : le recadrage LANCZOS est coûteux)."""
+    with Image.open(path) as bg_img:
+        return ImageOps.fit(bg_img.convert("RGBA"), size, Image.Resampling.LANCZOS)
+
+
+@lru_cache(maxsize=16)
+def _font(path: Path, size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(str(path), size)
+
+
+def _random_asset(folder: str, patterns: tuple[str, ...], fallback: str) -> Path:
+    files = [f for pattern in patterns for f in (ASSETS_DIR / folder).glob(pattern)]
+    return random.choice(files) if files else ASSETS_DIR / fallback
+
+
+# - - - Rendu - - - #
+
+def compose_grid(img: Image.Image, grid: Grid, tiles: list[Image.Image | None], top: int):
+    """Pose les vignettes (None = emplacement laissé vide), une bande par rangée, centrées."""
+    index = 0
+    for row, size in enumerate(grid.row_sizes()):
+        strip = Image.new("RGBA", (grid.row_width(size), grid.tile_h), (0, 0, 0, 0))
+        for col in range(size):
+            tile = tiles[index + col]
+            if tile is not None:
+                strip.paste(tile, (col * (grid.tile_w + grid.spacing), 0))
+        index += size
+        x = (img.width - strip.width) // 2
+        img.alpha_composite(strip, dest=(x, top + row * (grid.tile_h + grid.spacing)))
+
+
+def _centered_text(draw: ImageDraw.ImageDraw, y: int, text: str, font):
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    draw.text(((IMG_WIDTH - (right - left)) / 2, y), text, font=font, fill=TEXT_COLOR)
+
+
+def _section_tiles(items: list[tuple[str, bytes | None]], grid: Grid, style: TileStyle) -> list[Image.Image]:
+    """Vignettes d'une section : les visuels fraîchement téléchargés entrent d'abord dans le cache."""
+    size = (grid.tile_w, grid.tile_h)
+    tiles = []
+    for key, data in items:
+        if data is not None:
+            thumbnails.add(key, data, style)
+        tiles.append(thumbnails.tile(key, size, style) or placeholder(size, style))
+    return tiles
+
+
+def render_lfg_image(avatars: list[tuple[str, bytes | None]], covers: list[tuple[str, bytes | None]],
+                     hidden_players: int = 0, hidden_games: int = 0) -> Image.Image:
+    """
+    Dessine l'image LFG. `avatars` et `covers` associent une clé de cache à l'image
+    téléchargée, ou à None si elle est déjà en cache (ou indisponible : vignette neutre).
+    `hidden_*` : éléments au-delà des limites de la mosaïque, signalés par « +N ».
+    """
+    avatar_grid = fit_grid(len(avatars), AVATAR_STYLE)
+    cover_grid = fit_grid(len(covers), COVER_STYLE)
+
+    # Hauteur selon le contenu : titre, puis chaque section (intitulé + grille + mention « +N »)
+    height = 150
+    if avatars:
+        height += 80 + avatar_grid.height + (40 if hidden_players else 0) + 40
+    if covers:
+        height += 80 + cover_grid.height + (40 if hidden_games else 0) + 40
+    height = max(height, 500)
+
+    bg_path = _random_asset("backgrounds", ("*.png", "*.jpg"), "background.png")
+    title_path = _random_asset("titres", ("*.ttf",), "titre.ttf")
+    subtitle_path = _random_asset("sous_titres", ("*.ttf",), "sous_titre.ttf")
+
+    # 1. Fond
+    try:
+        img = _background(bg_path, (IMG_WIDTH, height)).copy()
+    except OSError as e:
+        logger.warning("Erreur chargement fond (%s) : %s", bg_path, e)
+        img = Image.new("RGBA", (IMG_WIDTH, height), color=BACKGROUND_COLOR)
+
+    draw = ImageDraw.Draw(img)
+
+    # 2. Polices
+    try:
+        font_title = _font(title_path, 80)
+        font_starring = _font(subtitle_path, 45)
+    except OSError as e:
+        logger.warning("Erreur chargement polices : %s", e)
+        font_title = ImageFont.load_default()
+        font_starring = ImageFont.load_default()
+
+    # 3. Titre
+    _centered_text(draw, 15, "Now playing", font_title)
+    current_y = 150
+
+    # 4. Avatars
+    if avatars:
+        _centered_text(draw, current_y, "Starring", font_starring)
+        current_y += 80
+        compose_grid(img, avatar_grid, _section_tiles(avatars, avatar_grid, AVATAR_STYLE), current_y)
+        current_y += avatar_grid.height
+        if hidden_players:
+            _centered_text(draw, current_y + 5, f"+{hidden_players}", font_starring)
+            current_y += 40
+        current_y += 40
+
+    # 5. Pochettes
+    if covers:
+        _centered_text(draw, current_y, "Pick your poison", font_starring)
+        current_y += 80
+        compose_grid(img, cover_grid, _section_tiles(covers, cover_grid, COVER_STYLE), current_y)
+        current_y += cover_grid.height
+        if hidden_games:
+            _centered_text(draw, current_y + 5, f"+{hidden_games}", font_starring)
+
+    return img
@@ -0,0 +1,175 @@
+"""
+Pages de l'annonce LFG : la liste complète des jeux en commun et des joueurs prêts,
+consultable avec les boutons de l'annonce (vue persistante : elle fonctionne encore
+après un redémarrage, dès que l'annonce a été reconstruite).
+
+L'annonce elle-même ne montre que le début de chaque liste (un champ d'Embed est
+limité à 1024 caractères). Une page n'est construite - Embed et vignettes - qu'au
+premier clic qui la demande, puis gardée en cache sous l'empreinte de la liste
+(joueurs prêts + jeux en commun) : tant que la liste ne change pas, tourner les
+pages ne refait aucun rendu.
+"""
+import hashlib
+import io
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import discord
+
+from core.metrics import metrics
+
+if TYPE_CHECKING:
+    from cogs.R2P.ready import ReadyManager
+
+metrics.describe("announcement_pages_total", "Pages de l'annonce affichées, par section et résultat du cache (hit, miss)")
+
+FIELD_LIMIT = 1024
+GAMES_PER_PAGE = 10
+PLAYERS_PER_PAGE = 15
+
+SUMMARY = "summary"
+GAMES = "games"
+PLAYERS = "players"
+
+
+def roster_fingerprint(players: list[int], games: list[str]) -> str:
+    """Empreinte courte d'une liste (joueurs prêts, dans l'ordre, et jeux en commun)."""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(",".join(map(str, players)).encode())
+    digest.update(b"|")
+    digest.update("\n".join(games).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def truncated_field(lines: list[str], separator: str = "\n", limit: int = FIELD_LIMIT) -> str:
+    """Joint autant de lignes que possible sous la limite d'un champ d'Embed, puis « … et N autres »."""
+    value = ""
+    for i, line in enumerate(lines):
+        candidate = f"{value}{separator}{line}" if value else line
+        remaining = len(lines) - i - 1
+        suffix = f"{separator}*… et {remaining} autre(s), voir les pages*" if remaining else ""
+        if len(candidate) + len(suffix) > limit:
+            hidden = len(lines) - i
+            return f"{value}{separator}*… et {hidden} autre(s), voir les pages*" if value else f"*{hidden} élément(s), voir les pages*"
+        value = candidate
+    return value
+
+
+@dataclass
+class Page:
+    """Page déjà construite : Embed et image PNG éventuelle (gardée en octets, un fichier ne s'envoie qu'une fois)."""
+    embed: discord.Embed
+    image: bytes | None = None
+
+    def files(self, filename: str) -> list[discord.File]:
+        return [discord.File(io.BytesIO(self.image), filename=filename)] if self.image else []
+
+
+class PageCache:
+    """LRU des pages construites, indexées par (empreinte de la liste, section, numéro)."""
+    def __init__(self, max_pages: int = 64):
+        self.max_pages = max_pages
+        self._pages: OrderedDict[tuple[str, str, int], Page] = OrderedDict()
+
+    def get(self, fingerprint: str, section: str, number: int) -> Page | None:
+        key = (fingerprint, section, number)
+        page = self._pages.get(key)
+        if page is not None:
+            self._pages.move_to_end(key)
+        return page
+
+    def put(self, fingerprint: str, section: str, number: int, page: Page):
+        self._pages[(fingerprint, section, number)] = page
+        self._pages.move_to_end((fingerprint, section, number))
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+
+@dataclass
+class Roster:
+    """Liste affichée par l'annonce en cours, sa page d'accueil et la page actuellement montrée."""
+    message_id: int
+    guild_id: int
+    fingerprint: str
+    players: list[int]
+    games: list[str]
+    summary: Page
+    section: str = SUMMARY
+    number: int = 0
+
+    def page_count(self, section: str) -> int:
+        if section == GAMES:
+            return max(1, math.ceil(len(self.games) / GAMES_PER_PAGE))
+        if section == PLAYERS:
+            return max(1, math.ceil(len(self.players) / PLAYERS_PER_PAGE))
+        return 1
+
+
+class AnnouncementPager(discord.ui.View):
+    """
+    Boutons de l'annonce. Les custom_id sont fixes (vue persistante) : l'état de la page
+    affichée est gardé par le Cog, pour l'annonce en cours uniquement.
+    """
+    def __init__(self, cog: "ReadyManager"):
+        super().__init__(timeout=None)
+        self.cog = cog
+
+    @discord.ui.button(emoji="🏠", style=discord.ButtonStyle.secondary, custom_id="lfg:summary")
+    async def summary_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, SUMMARY, 0)
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.secondary, custom_id="lfg:prev")
+    async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        roster = self.cog.roster
+        if roster:
+            section = roster.section if roster.section != SUMMARY else GAMES
+            await self._show(interaction, section, (roster.number - 1) % roster.page_count(section))
+        else:
+            await self._show(interaction, SUMMARY, 0)
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.secondary, custom_id="lfg:next")
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        roster = self.cog.roster
+        if roster:
+            section = roster.section if roster.section != SUMMARY else GAMES
+            number = roster.number + 1 if roster.section == section else 0
+            await self._show(interaction, section, number % roster.page_count(section))
+        else:
+            await self._show(interaction, SUMMARY, 0)
+
+    @discord.ui.button(label="Jeux", emoji="🎮", style=discord.ButtonStyle.primary, custom_id="lfg:games")
+    async def games_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, GAMES, 0)
+
+    @discord.ui.button(label="Joueurs", emoji="👥", style=discord.ButtonStyle.primary, custom_id="lfg:players")
+    async def players_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, PLAYERS, 0)
+
+    async def _show(self, interaction: discord.Interaction, section: str, number: int):
+        roster = self.cog.roster
+        if roster is None or interaction.message is None or interaction.message.id != roster.message_id:
+            await interaction.response.send_message("ℹ️ Cette annonce n'est plus à jour.", ephemeral=True)
+            return
+
+        page = roster.summary if section == SUMMARY else self.cog.page_cache.get(roster.fingerprint, section, number)
+        metrics.counter("announcement_pages_total", section=section, cache="hit" if page else "miss").inc()
+        if page is None:
+            # Construction au premier clic (vignettes comprises) : on accuse réception tout de suite
+            await interaction.response.defer()
+            page = await self.cog.build_page(roster, section, number)
+            self.cog.page_cache.put(roster.fingerprint, section, number, page)
+            # La liste a pu changer pendant la construction : l'annonce a alors été remplacée
+            if self.cog.roster is not roster:
+                return
+            roster.section, roster.number = section, number
+            await interaction.edit_original_response(embed=page.embed, attachments=page.files(_filename(section)), view=self)
+            return
+
+        roster.section, roster.number = section, number
+        await interaction.response.edit_message(embed=page.embed, attachments=page.files(_filename(section)), view=self)
+
+
+def _filename(section: str) -> str:
+    return "lfg_image.png" if section == SUMMARY else f"lfg_{section}.png"
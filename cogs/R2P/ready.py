@@ -1,25 +1,45 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import logging
 import os
-import json
 import asyncio
 import re
-import random
 import time
 from pathlib import Path
-from dotenv import load_dotenv
 
 
 import io
 import urllib.parse
-from PIL import Image, ImageDraw, ImageFont, ImageChops, ImageOps
 
 
 # Importation de notre nouvelle base de données
-from cogs.R2P.game_data import player_games, game_display_names, load_data
-
-load_dotenv()
+from cogs.R2P.game_data import game_display_names, attach_storage, common_game_keys
+from cogs.R2P.lobbies import LOBBY_FIELD_LIMIT, MAX_LOBBY_FIELDS, NO_VOICE, LobbyIndex
+from cogs.R2P.pages import (
+    GAMES, GAMES_PER_PAGE, PLAYERS, PLAYERS_PER_PAGE, SUMMARY,
+    AnnouncementPager, Page, PageCache, Roster, roster_fingerprint, truncated_field,
+)
+from cogs.R2P.sessions import EVENT_READY, EVENT_UNREADY, EVENT_OFFLINE, EVENT_TIMEOUT, EVENT_VOICE, EVENT_RESET
+from core.http import HttpError
+from core.members import lookup_members, resolve_members
+from core.metrics import metrics
+from core.outbound import OutboundDropped, Priority
+
+logger = logging.getLogger(__name__)
+
+metrics.describe("announcement_renders_cancelled_total", "Rendus d'image d'annonce abandonnés car la liste a changé entre-temps")
+metrics.describe("announcement_asset_deadline_misses_total", "Visuels (avatar, cover) arrivés après l'échéance du rendu, par remplacement utilisé")
+metrics.describe("announcement_images_dropped_total", "Images d'annonce abandonnées car trop de visuels manquaient à l'échéance")
+
+# Durées des chronomètres (en secondes)
+OFFLINE_DELAY = 5 * 60              # retrait d'un joueur déconnecté
+TIMEOUT_DELAY = 6 * 60 * 60         # présence maximale dans la liste (anti-oubli)
+GRACE_DELAY = 15 * 60               # délai accordé à un joueur en retard pour se connecter
+VOICE_DISCONNECT_DELAY = 30 * 60    # retrait après avoir quitté un vocal
+
+# Familles de chronomètres : chacune correspond à l'attribut `<famille>_timers`
+TIMER_KINDS = ("offline", "timeout", "pending", "grace", "voice_disconnect")
 
 class ReadyManager(commands.Cog):
     """
@@ -33,8 +53,9 @@ class ReadyManager(commands.Cog):
         # État du système
         self.ready_players: list[int] = []
         
-        # Gestion de l'annonce
+        # Gestion de l'annonce (l'ID du dernier message est gardé par le service de stockage)
         self.announcement_file = Path("./cogs/R2P/last_announcement_id.json")
+        self.announcement_state: dict = {}
         
         # Dictionnaires pour stocker les tâches asynchrones (chronomètres) par ID utilisateur
         # offline_timers : Gère les 5 minutes avant retrait d'un joueur déconnecté
@@ -51,136 +72,221 @@ class ReadyManager(commands.Cog):
         self.pending_arrivals: dict[int, float] = {}
         # voice_disconnect_timers : Gère les 30 min après avoir quitté un vocal
         self.voice_disconnect_timers: dict[int, asyncio.Task] = {}
-        
-        # Chargement initial des jeux
-        load_data()
+        # Échéance (timestamp) et serveur de chaque chronomètre, pour les recréer après un rechargement
+        self.timer_deadlines: dict[str, dict[int, tuple[float, int | None]]] = {kind: {} for kind in TIMER_KINDS}
+
+        # Rendu de l'image de l'annonce, en arrière-plan (annulé si la liste change entre-temps)
+        self._render_task: asyncio.Task | None = None
+        # Incrémenté à chaque mise à jour : une annonce dépassée ne lance pas son rendu
+        self._announcement_version = 0
+        # Une seule mise à jour à la fois entre la lecture de l'ancien ID et la suppression de l'ancienne annonce
+        self._announcement_lock = asyncio.Lock()
+        # Attente maximale des visuels par rendu, et part de visuels en retard au-delà de laquelle l'image est abandonnée
+        self.render_deadline = float(os.getenv('ANNOUNCEMENT_RENDER_DEADLINE', 3.0))
+        self.max_late_ratio = float(os.getenv('ANNOUNCEMENT_MAX_LATE_RATIO', 0.5))
+        # Téléchargements de visuels en cours, partagés entre les rendus (ils survivent à l'échéance)
+        self._asset_fetches: dict[str, asyncio.Task] = {}
+
+        # Pages de l'annonce : liste affichée par l'annonce en cours et pages déjà construites
+        self.roster: Roster | None = None
+        self.page_cache = PageCache()
+        self.pager = AnnouncementPager(self)
+
+        # Joueurs prêts regroupés par salon vocal, et mise à jour sur place de l'annonce quand ils changent de salon
+        self.lobbies = LobbyIndex()
+        self._lobby_refresh: asyncio.Task | None = None
+        self._lobbies_dirty = False
+
+    async def cog_load(self):
+        # Chargement initial des jeux et de l'ID de la dernière annonce (hors de la boucle)
+        await attach_storage(self.bot.storage)
+        self.announcement_state = await self.bot.storage.kv("last_announcement", self.announcement_file, indent=None)
+
+        # Rechargement à chaud : on reprend l'état de l'instance précédente
+        state = self.bot.hot_reload.take_state(self)
+        if state:
+            self.import_state(state)
+
+        # Vue persistante : les boutons de l'annonce répondent aussi après un redémarrage
+        self.bot.add_view(self.pager)
+
+    def cog_unload(self):
+        # On arrête les chronomètres sans toucher aux rôles : la nouvelle instance les recrée
+        for kind in TIMER_KINDS:
+            for task in getattr(self, f"{kind}_timers").values():
+                task.cancel()
+        if self._render_task:
+            self._render_task.cancel()
+        if self._lobby_refresh:
+            self._lobby_refresh.cancel()
+        for task in self._asset_fetches.values():
+            task.cancel()
+        self.pager.stop()
+
+    # --- TRANSMISSION D'ÉTAT (RECHARGEMENT À CHAUD) ---
+
+    def export_state(self) -> dict:
+        """
+        Photographie de l'état vivant : joueurs prêts, arrivées prévues et échéances des chronomètres.
+        L'ID de la dernière annonce est gardé par bot.storage, la nouvelle instance le retrouve.
+        """
+        timers = {}
+        for kind in TIMER_KINDS:
+            tasks = getattr(self, f"{kind}_timers")
+            timers[kind] = {
+                uid: deadline for uid, deadline in self.timer_deadlines[kind].items()
+                if uid in tasks and not tasks[uid].done()
+            }
+        return {
+            "ready_players": list(self.ready_players),
+            "pending_arrivals": dict(self.pending_arrivals),
+            "timers": timers,
+            "lobbies": dict(self.lobbies.channel_of),
+            "roster": self.roster,
+            "page_cache": self.page_cache,
+        }
+
+    def import_state(self, state: dict):
+        """
+        Reprend l'état d'une instance précédente. Les chronomètres repartent pour le temps
+        qu'il leur restait. Aucun rôle n'est modifié : les joueurs prêts ont déjà le leur.
+        """
+        self.ready_players[:] = state["ready_players"]
+        self.pending_arrivals.update(state["pending_arrivals"])
+        lobbies = state.get("lobbies", {})
+        for uid in self.ready_players:
+            self.lobbies.place(uid, lobbies.get(uid, NO_VOICE))
+        self.roster = state.get("roster")
+        self.page_cache = state.get("page_cache") or self.page_cache
+
+        now = time.time()
+        for kind, entries in state["timers"].items():
+            for uid, (deadline, guild_id) in entries.items():
+                delay = max(0.0, deadline - now)
+                guild = self.bot.get_guild(guild_id) if guild_id else None
+
+                if kind == "grace":
+                    coro = self.grace_period(uid, delay)
+                elif kind == "pending":
+                    if guild is None:
+                        self.pending_arrivals.pop(uid, None)
+                        continue
+                    coro = self.delayed_ready(uid, guild, delay)
+                elif guild is None:
+                    continue
+                elif kind == "offline":
+                    coro = self.auto_remove_offline(uid, guild, delay)
+                elif kind == "timeout":
+                    coro = self.auto_remove_timeout(uid, guild, delay)
+                else:
+                    coro = self.auto_remove_voice_disconnect(uid, guild, delay)
+
+                self._start_timer(kind, uid, coro, delay, guild_id)
 
 
     # --- GENERATION D'IMAGES ---
 
-    async def _generate_lfg_image(self, members: list[discord.Member], common_games: list[str]) -> io.BytesIO:
-        """Génère l'image LFG dynamiquement selon le nombre de joueurs et de jeux."""
-        
-        show_avatars = len(members) <= 5
-        show_games = 1 <= len(common_games) <= 3
-        
-        IMG_WIDTH = 1000
-        TEXT_COLOR = (255, 255, 255, 255)
-        
-        # Hauteur dynamique selon le contenu
-        if show_avatars and show_games:
-            IMG_HEIGHT = 900
-        elif show_games:
-            IMG_HEIGHT = 600  # 600px laisse assez de marge pour les grandes pochettes
-        else:
-            IMG_HEIGHT = 500
+    async def _generate_lfg_image(self, members: list[discord.Member], common_games: list[str]) -> io.BytesIO | None:
+        """
+        Génère l'image LFG en mosaïque ; seuls les visuels absents du cache de vignettes sont téléchargés,
+        et on ne les attend pas plus de `render_deadline` secondes. Un visuel en retard est remplacé par
+        sa version précédente (avatar changé entre-temps) ou par une vignette neutre ; s'il en manque trop,
+        l'image est abandonnée (None). Les visuels en retard arrivent quand même dans le cache.
+        """
+        from cogs.R2P import mosaic
+
+        shown_members = members[:mosaic.MAX_AVATARS]
+        shown_games = common_games[:mosaic.MAX_COVERS]
+        # (type, clé de la version voulue, clé stable, téléchargement)
+        assets = [
+            ("avatar", f"avatar:{member.display_avatar.with_format('png').url}", f"avatar:{member.id}",
+             lambda member=member: self._fetch_avatar(member))
+            for member in shown_members
+        ] + [
+            ("cover", f"cover:{game}", None, lambda game=game: self.fetch_steamgrid_image(game))
+            for game in shown_games
+        ]
+
+        # 1. Téléchargement en parallèle des visuels manquants, borné par l'échéance
+        with metrics.timer("announcement_stage_seconds", stage="fetch"):
+            fetches = {
+                key: self._asset_task(key, fetch, mosaic.AVATAR_STYLE if kind == "avatar" else mosaic.COVER_STYLE, stable_key)
+                for kind, key, stable_key, fetch in assets if key not in mosaic.thumbnails
+            }
+            if fetches:
+                await asyncio.wait(fetches.values(), timeout=self.render_deadline)
+
+        # 2. Remplacement des visuels en retard
+        keys = {"avatar": [], "cover": []}
+        late = 0
+        for kind, key, stable_key, fetch in assets:
+            task = fetches.get(key)
+            if task is not None and not task.done():
+                late += 1
+                stale = mosaic.thumbnails.latest(stable_key) if stable_key else None
+                metrics.counter("announcement_asset_deadline_misses_total", asset=kind, fallback="stale" if stale else "placeholder").inc()
+                key = stale or key
+            keys[kind].append(key)
+        if assets and late / len(assets) > self.max_late_ratio:
+            metrics.counter("announcement_images_dropped_total").inc()
+            logger.debug("Image d'annonce abandonnée : %d visuel(s) sur %d en retard", late, len(assets))
+            return None
+
+        # 3. Composition de l'image, hors de la boucle (Pillow libère le GIL pendant les collages)
+        with metrics.timer("announcement_stage_seconds", stage="render"):
+            img = await asyncio.to_thread(
+                mosaic.render_lfg_image,
+                [(key, None) for key in keys["avatar"]],
+                [(key, None) for key in keys["cover"]],
+                len(members) - len(shown_members),
+                len(common_games) - len(shown_games),
+            )
+
+        # 4. Encodage
+        with metrics.timer("announcement_stage_seconds", stage="encode"):
+            buffer = io.BytesIO()
+            await asyncio.to_thread(img.save, buffer, format='PNG')
+            buffer.seek(0)
+        return buffer
+
+    def _asset_task(self, key: str, fetch, style, stable_key: str | None) -> asyncio.Task:
+        """Téléchargement et mise en cache d'un visuel : une seule tâche par visuel, partagée entre les rendus."""
+        task = self._asset_fetches.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_asset(key, fetch, style, stable_key))
+            self._asset_fetches[key] = task
+            task.add_done_callback(lambda _: self._asset_fetches.pop(key, None))
+        return task
+
+    async def _fetch_asset(self, key: str, fetch, style, stable_key: str | None) -> bool:
+        from cogs.R2P import mosaic
 
-        BASE_DIR = Path(__file__).parent
-        ASSETS_DIR = BASE_DIR / "assets"
-        
-        # --- SÉLECTION ALÉATOIRE DES ASSETS ---
-        bg_files = list((ASSETS_DIR / "backgrounds").glob("*.png")) + list((ASSETS_DIR / "backgrounds").glob("*.jpg"))
-        title_files = list((ASSETS_DIR / "titres").glob("*.ttf"))
-        subtitle_files = list((ASSETS_DIR / "sous_titres").glob("*.ttf"))
-        
-        bg_path = random.choice(bg_files) if bg_files else ASSETS_DIR / "background.png"
-        title_path = random.choice(title_files) if title_files else ASSETS_DIR / "titre.ttf"
-        subtitle_path = random.choice(subtitle_files) if subtitle_files else ASSETS_DIR / "sous_titre.ttf"
-        
-        # 1. Chargement du fond
         try:
-            bg_img = Image.open(bg_path).convert('RGBA')
-            img = ImageOps.fit(bg_img, (IMG_WIDTH, IMG_HEIGHT), Image.Resampling.LANCZOS)
-        except IOError as e:
-            print(f"⚠️ Erreur chargement fond ({bg_path}) : {e}") 
-            img = Image.new('RGBA', (IMG_WIDTH, IMG_HEIGHT), color=(24, 25, 28, 255))
-            
-        draw = ImageDraw.Draw(img)
-        
-        # 2. Polices
+            data = await fetch()
+        except Exception as e:
+            # Personne n'attend forcément cette tâche : l'erreur ne doit pas rester en suspens
+            logger.debug("Visuel %s indisponible : %s", key, e)
+            return False
+        if data is None:
+            return False
+        # Décodage et mise à l'échelle dans un thread : la vignette est prête pour ce rendu ou le suivant
+        return await asyncio.to_thread(mosaic.thumbnails.add, key, data, style, stable_key)
+
+    async def _fetch_avatar(self, member: discord.Member) -> bytes | None:
+        """Télécharge l'avatar d'un membre depuis le CDN Discord."""
+        avatar_url = member.display_avatar.with_format('png').url
         try:
-            font_title = ImageFont.truetype(str(title_path), 80)
-            font_starring = ImageFont.truetype(str(subtitle_path), 45) 
-        except IOError as e:
-            print(f"⚠️ Erreur chargement polices : {e}")
-            font_title = ImageFont.load_default()
-            font_starring = ImageFont.load_default()
-            
-        # 3. Titre (Toujours tout en haut)
-        title_text = "Now playing"
-        left, top, right, bottom = draw.textbbox((0, 0), title_text, font=font_title)
-        draw.text(((IMG_WIDTH - (right - left)) / 2, 15), title_text, font=font_title, fill=TEXT_COLOR)
-        
-        # Curseur vertical dynamique : il commence à 150px du haut
-        current_y = 150 
-        
-        # 4. AVATARS (S'ils doivent être affichés)
-        if show_avatars:
-            starring_text = "Starring"
-            left, top, right, bottom = draw.textbbox((0, 0), starring_text, font=font_starring)
-            draw.text(((IMG_WIDTH - (right - left)) / 2, current_y), starring_text, font=font_starring, fill=TEXT_COLOR)
-            
-            avatar_size = 150
-            spacing = 40
-            num_avatars = len(members)
-            total_width = (num_avatars * avatar_size) + ((num_avatars - 1) * spacing)
-            start_x = (IMG_WIDTH - total_width) / 2
-            
-            avatar_y = current_y + 80
-            
-            for i, member in enumerate(members):
-                avatar_url = member.display_avatar.with_format('png').url
-                async with self.bot.session.get(avatar_url) as resp:
-                    if resp.status == 200:
-                        avatar_data = await resp.read()
-                        avatar_img = Image.open(io.BytesIO(avatar_data)).convert('RGBA')
-                        avatar_img = avatar_img.resize((avatar_size, avatar_size), Image.Resampling.LANCZOS)
-                        
-                        mask = Image.new('L', (avatar_size, avatar_size), 0)
-                        ImageDraw.Draw(mask).ellipse((0, 0, avatar_size, avatar_size), fill=255)
-                        
-                        pos_x = int(start_x + (i * (avatar_size + spacing)))
-                        img.paste(avatar_img, (pos_x, avatar_y), mask)
-            
-            # On descend le curseur pour la section suivante s'il y en a une
-            current_y = avatar_y + avatar_size + 40 
-
-        # 5. POCHETTES DE JEUX (Si elles doivent être affichées)
-        if show_games:
-            poison_text = "Pick your poison"
-            left, top, right, bottom = draw.textbbox((0, 0), poison_text, font=font_starring)
-            draw.text(((IMG_WIDTH - (right - left)) / 2, current_y), poison_text, font=font_starring, fill=TEXT_COLOR)
-            
-            grid_w, grid_h = 200, 300
-            grid_spacing = 50
-            total_grid_w = (len(common_games) * grid_w) + ((len(common_games) - 1) * grid_spacing)
-            start_grid_x = (IMG_WIDTH - total_grid_w) / 2
-            
-            game_y = current_y + 80
-            
-            for i, game_name in enumerate(common_games):
-                img_bytes = await self.fetch_steamgrid_image(game_name)
-                if img_bytes:
-                    grid_img = Image.open(io.BytesIO(img_bytes)).convert('RGBA')
-                    grid_img = ImageOps.fit(grid_img, (grid_w, grid_h), Image.Resampling.LANCZOS)
-                    
-                    mask = Image.new('L', (grid_w, grid_h), 0)
-                    ImageDraw.Draw(mask).rounded_rectangle((0, 0, grid_w, grid_h), radius=15, fill=255)
-                    
-                    pos_x = int(start_grid_x + (i * (grid_w + grid_spacing)))
-                    img.paste(grid_img, (pos_x, game_y), mask)
-            
-        # 6. Sauvegarde
-        buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
-        buffer.seek(0)
-        return buffer
+            resp = await self.bot.http_client.get(avatar_url)
+        except HttpError as e:
+            logger.debug("Avatar indisponible pour %s : %s", member, e)
+            return None
+        return resp.body if resp.status == 200 else None
 
     async def fetch_steamgrid_image(self, game_name: str) -> bytes | None:
         """Cherche et télécharge la pochette 2:3 (600x900) d'un jeu via SteamGridDB."""
         api_key = os.getenv("STEAMGRIDDB_API_KEY")
         if not api_key:
-            print("⚠️ Clé API SteamGridDB manquante dans le .env")
+            logger.warning("Clé API SteamGridDB manquante dans le .env")
             return None
             
         headers = {"Authorization": f"Bearer {api_key}"}
@@ -190,27 +296,27 @@ class ReadyManager(commands.Cog):
             safe_name = urllib.parse.quote(game_name)
             search_url = f"https://www.steamgriddb.com/api/v2/search/autocomplete/{safe_name}"
             
-            async with self.bot.session.get(search_url, headers=headers) as resp:
-                if resp.status != 200: return None
-                data = await resp.json()
-                if not data.get("data"): return None
-                game_id = data["data"][0]["id"]
+            resp = await self.bot.http_client.get(search_url, headers=headers)
+            if resp.status != 200: return None
+            data = resp.json()
+            if not data.get("data"): return None
+            game_id = data["data"][0]["id"]
 
             # 2. Récupérer les images au format 2:3 (dimensions=600x900)
             grids_url = f"https://www.steamgriddb.com/api/v2/grids/game/{game_id}?dimensions=600x900"
-            async with self.bot.session.get(grids_url, headers=headers) as resp:
-                if resp.status != 200: return None
-                data = await resp.json()
-                if not data.get("data"): return None
-                image_url = data["data"][0]["url"]
+            resp = await self.bot.http_client.get(grids_url, headers=headers)
+            if resp.status != 200: return None
+            data = resp.json()
+            if not data.get("data"): return None
+            image_url = data["data"][0]["url"]
 
             # 3. Télécharger l'image trouvée
-            async with self.bot.session.get(image_url) as resp:
-                if resp.status != 200: return None
-                return await resp.read()
+            resp = await self.bot.http_client.get(image_url)
+            if resp.status != 200: return None
+            return resp.body
                 
         except Exception as e:
-            print(f"❌ Erreur lors de la récupération SteamGridDB pour {game_name}: {e}")
+            logger.debug("Erreur lors de la récupération SteamGridDB pour %s : %s", game_name, e)
             return None
 
 
@@ -224,77 +330,89 @@ class ReadyManager(commands.Cog):
             
         try:
             role_id = int(role_id_str)
-            member = guild.get_member(user_id)
+            member = await self._get_member(guild, user_id)
             if not member:
                 return
                 
             role = guild.get_role(role_id)
             if not role:
-                print("⚠️ Attention : Le rôle spécifié dans READY_ROLE_ID est introuvable sur le serveur.")
+                logger.warning("Le rôle READY_ROLE_ID est introuvable sur le serveur", extra={"guild": guild.id})
                 return
                 
-            if add and role not in member.roles:
-                await member.add_roles(role)
-            elif not add and role in member.roles:
-                await member.remove_roles(role)
+            if add:
+                # Noté avant l'appel : après un arrêt brutal, on_ready saura à qui retirer le rôle
+                self._track_role_holder(user_id, True)
+                if role not in member.roles:
+                    await self.bot.outbound.run(Priority.ROLE_SYNC, f"roles:{guild.id}", lambda: member.add_roles(role))
+            else:
+                if role in member.roles:
+                    await self.bot.outbound.run(Priority.ROLE_SYNC, f"roles:{guild.id}", lambda: member.remove_roles(role))
+                self._track_role_holder(user_id, False)
                 
         except discord.Forbidden:
-            print("❌ Erreur : Le bot n'a pas les permissions de modifier ce rôle.")
+            logger.error("Le bot n'a pas les permissions de modifier le rôle READY_ROLE_ID", extra={"guild": guild.id})
         except Exception as e:
-            print(f"❌ Erreur lors de la modification du rôle : {e}")
+            logger.error("Erreur lors de la modification du rôle : %s", e, extra={"guild": guild.id, "user": user_id})
+
+    def _track_role_holder(self, user_id: int, holds: bool):
+        """Tient à jour la liste persistante des joueurs à qui le bot a donné le rôle."""
+        holders = set(self.announcement_state.get("role_holders", ()))
+        updated = holders | {user_id} if holds else holders - {user_id}
+        if updated != holders:
+            self.announcement_state["role_holders"] = sorted(updated)
+
+    async def _get_member(self, guild: discord.Guild, user_id: int) -> discord.Member | None:
+        """
+        Membre depuis le cache, ou chargé à la demande (mode économe en mémoire).
+        Sa présence est demandée aussi : une fois en cache, ses connexions/déconnexions sont suivies.
+        """
+        members = await resolve_members(guild, [user_id], presences=self.bot.intents.presences)
+        return members.get(user_id)
 
     async def _add_ready_player(self, user_id: int, guild: discord.Guild):
         """Ajoute le joueur à la liste et lui donne le rôle."""
         if user_id not in self.ready_players:
             self.ready_players.append(user_id)
+            # Salon de jeu : le vocal où il se trouve déjà (s'il est dans le cache), sinon « hors vocal »
+            member = guild.get_member(user_id)
+            voice = member.voice if member else None
+            self.lobbies.place(user_id, voice.channel.id if voice and voice.channel else NO_VOICE)
+            common_games, _ = common_game_keys(self.ready_players)
+            await self._record_session(EVENT_READY, user_id, sorted(common_games))
             await self._update_role(user_id, guild, add=True)
 
-    async def _remove_ready_player(self, user_id: int, guild: discord.Guild):
-        """Retire le joueur de la liste et lui enlève le rôle."""
+    async def _remove_ready_player(self, user_id: int, guild: discord.Guild, reason: str = EVENT_UNREADY):
+        """Retire le joueur de la liste et lui enlève le rôle (`reason` : type d'événement enregistré)."""
         if user_id in self.ready_players:
             self.ready_players.remove(user_id)
+            self.lobbies.remove(user_id)
+            await self._record_session(reason, user_id)
             await self._update_role(user_id, guild, add=False)
 
+    async def _record_session(self, kind: str, user_id: int | None = None, common_games: list[str] | None = None):
+        """Transmet la transition à l'historique des sessions (s'il est chargé)."""
+        sessions = self.bot.get_cog("SessionStats")
+        if sessions:
+            await sessions.record(kind, user_id, common_games)
+
 
     # --- GESTION DE L'ANNONCE ---
 
     def _get_last_announcement_id(self) -> int | None:
         """Récupère l'ID du dernier message d'annonce."""
-        try:
-            with open(self.announcement_file, "r") as f:
-                return json.load(f).get("last_announcement_id")
-        except (FileNotFoundError, json.JSONDecodeError):
-            return None
+        return self.announcement_state.get("last_announcement_id")
 
     def _save_last_announcement_id(self, message_id: int):
-        """Sauvegarde l'ID du nouveau message d'annonce."""
-        self.announcement_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.announcement_file, "w") as f:
-            json.dump({"last_announcement_id": message_id}, f)
+        """Sauvegarde l'ID du nouveau message d'annonce (écriture différée par le service de stockage)."""
+        self.announcement_state["last_announcement_id"] = message_id
 
     def find_common_games(self) -> tuple[list[str], list[int]]:
         """
-        Croise les bibliothèques des joueurs prêts.
+        Jeux en commun des joueurs prêts.
         Retourne : (Liste des jeux en commun formatés, Liste des joueurs sans jeu)
         """
-        sets_of_games = []
-        excluded_users = []
-        
-        for uid in self.ready_players:
-            str_id = str(uid)
-            if str_id in player_games and player_games[str_id]:
-                sets_of_games.append(player_games[str_id])
-            else:
-                excluded_users.append(uid)
-        
-        # MODIFICATION ICI : S'il y a 1 seul (ou aucun) joueur avec des jeux, 
-        # on ne cherche pas de points communs.
-        if len(sets_of_games) <= 1:
-            return [], excluded_users
+        common_games, excluded_users = common_game_keys(self.ready_players)
 
-        # Intersection de tous les sets de jeux
-        common_games = set.intersection(*sets_of_games)
-        
         # On récupère les noms d'affichage et on les trie par ordre alphabétique
         pretty_games = sorted(
             [game_display_names.get(game, game) for game in common_games],
@@ -303,26 +421,10 @@ class ReadyManager(commands.Cog):
         
         return pretty_games, excluded_users
 
-    async def update_announcement(self, guild: discord.Guild):
-        """Génère l'annonce Embed, l'image, supprime l'ancienne et publie la nouvelle."""
-        channel_id = int(os.getenv('READY_CHANNEL_ID', 0))
-        channel = self.bot.get_channel(channel_id)
-        
-        if not channel:
-            print("⚠️ Attention : Salon d'annonce introuvable.")
-            return
-
-        # 0. Préparation des variables d'image
-        lfg_file = None
-        ready_members = []
-        common_games = []  # CORRECTION 1 : On l'initialise à vide par défaut !
-        
-        # Résolution des membres
-        for uid in self.ready_players:
-            member = guild.get_member(uid)
-            if member: ready_members.append(member)
+    def _build_embed(self, guild: discord.Guild) -> tuple[discord.Embed, list[str]]:
+        """Embed de l'annonce et jeux en commun de tous les joueurs prêts (vide s'il y en a moins de 2)."""
+        common_games = []
 
-        # 1. Construction de l'Embed
         if not self.ready_players:
             embed = discord.Embed(
                 title="🔴 En attente de joueurs", 
@@ -342,23 +444,29 @@ class ReadyManager(commands.Cog):
                 color=discord.Color.green()
             )
             
-            ready_mentions = "\n".join([f"<@{uid}>" for uid in self.ready_players])
-            embed.add_field(name="Joueurs", value=ready_mentions, inline=False)
-            
             # Ici common_games prend sa vraie valeur car il y a au moins 2 joueurs
             common_games, excluded_users = self.find_common_games()
-            
-            if not common_games:
-                embed.add_field(name="Jeux en commun", value="*Aucun jeu en commun trouvé*", inline=False)
+
+            if len(self.lobbies) > 1:
+                # Joueurs répartis dans plusieurs vocaux : une section par salon
+                self._add_lobby_fields(embed, guild)
             else:
-                games_str = "\n".join(common_games)
-                embed.add_field(name="Jeux en commun", value=games_str, inline=False)
+                # Un champ est limité à 1024 caractères : la suite des listes est dans les pages
+                ready_mentions = truncated_field([f"<@{uid}>" for uid in self.ready_players])
+                embed.add_field(name="Joueurs", value=ready_mentions, inline=False)
+
+                if not common_games:
+                    embed.add_field(name="Jeux en commun", value="*Aucun jeu en commun trouvé*", inline=False)
+                else:
+                    games_str = truncated_field(common_games)
+                    embed.add_field(name="Jeux en commun", value=games_str, inline=False)
                 
             if excluded_users:
-                excluded_str = ", ".join([f"<@{uid}>" for uid in excluded_users])
+                hint = "\n*Utilisez `/addgame` pour en ajouter puis refaites `/ready`.*"
+                excluded_str = truncated_field([f"<@{uid}>" for uid in excluded_users], ", ", limit=1024 - len(hint))
                 embed.add_field(
                     name="⚠️ Joueurs sans jeux enregistrés", 
-                    value=f"{excluded_str}\n*Utilisez `/addgame` pour en ajouter puis refaites `/ready`.*", 
+                    value=f"{excluded_str}{hint}", 
                     inline=False
                 )
 
@@ -367,74 +475,223 @@ class ReadyManager(commands.Cog):
             # On trie le dictionnaire par valeur (le timestamp) croissant
             sorted_pending = sorted(self.pending_arrivals.items(), key=lambda x: x[1])
             
-            # Création de la liste des mentions séparées par une virgule
-            mentions = ", ".join([f"<@{uid}>" for uid, ts in sorted_pending])
-            
             # Récupération du timestamp du tout premier joueur de la liste triée
             next_ts = int(sorted_pending[0][1])
+            next_str = f"\n*Prochaine arrivée à <t:{next_ts}:t>*"
+            # Création de la liste des mentions séparées par une virgule
+            mentions = truncated_field([f"<@{uid}>" for uid, ts in sorted_pending], ", ", limit=1024 - len(next_str))
             
             embed.add_field(
                 name="⏳ Joueurs en attente",
-                value=f"{mentions}\n*Prochaine arrivée à <t:{next_ts}:t>*",
+                value=f"{mentions}{next_str}",
                 inline=False
             )
-                
-        # 2. GÉNÉRATION DE L'IMAGE
-        # CORRECTION 2 : Ce bloc est maintenant désindenté de la condition d'au-dessus !
-        # On ne génère l'image que s'il y a au moins 1 joueur prêt à afficher
-        if len(ready_members) >= 1:
-            show_avatars = len(ready_members) <= 5
-            show_games = 1 <= len(common_games) <= 3
-            
-            if show_avatars or show_games:
-                buffer = await self._generate_lfg_image(ready_members, common_games)
-                lfg_file = discord.File(buffer, filename="lfg_image.png")
 
-        # 3. Récupération de l'ancienne annonce (sans la supprimer tout de suite)
+        return embed, common_games
+
+    def _add_lobby_fields(self, embed: discord.Embed, guild: discord.Guild):
+        """Une section par salon vocal : ses joueurs et leurs jeux en commun (calculés seulement si le salon a changé)."""
+        lobbies = self.lobbies.ordered()
+        for lobby in lobbies[:MAX_LOBBY_FIELDS]:
+            if lobby.channel_id is NO_VOICE:
+                name = "💤 Hors vocal"
+            else:
+                channel = guild.get_channel(lobby.channel_id)
+                name = f"🔊 {channel.name}" if channel else "🔊 Salon vocal"
+            mentions = truncated_field([f"<@{uid}>" for uid in lobby.players], ", ", limit=LOBBY_FIELD_LIMIT // 2)
+
+            if len(lobby.players) < 2:
+                games_str = "*En attente d'autres joueurs*"
+            else:
+                lobby_games, _ = lobby.common_games()
+                games_str = truncated_field(lobby_games, ", ", limit=LOBBY_FIELD_LIMIT - len(mentions) - 3) or "*Aucun jeu en commun*"
+            embed.add_field(name=f"{name} ({len(lobby.players)})", value=f"{mentions}\n🎮 {games_str}", inline=False)
+
+        if len(lobbies) > MAX_LOBBY_FIELDS:
+            embed.set_footer(text=f"… et {len(lobbies) - MAX_LOBBY_FIELDS} autre(s) salon(s) : liste complète dans les pages « Joueurs »")
+
+    async def update_announcement(self, guild: discord.Guild):
+        """
+        Publie la nouvelle annonce en deux temps :
+        1. l'Embed texte part tout de suite (un seul appel REST) et l'ancienne annonce est supprimée ;
+        2. l'image est générée en arrière-plan puis ajoutée au même message.
+        Un rendu encore en cours est annulé dès que la liste change à nouveau.
+        Les mises à jour rapprochées passent une par une ; celles dépassées pendant l'attente
+        sont sautées (la plus récente décrit déjà la liste actuelle).
+        """
+        # Le rendu précédent décrit une liste périmée : inutile de le terminer
+        if self._render_task and not self._render_task.done():
+            self._render_task.cancel()
+            metrics.counter("announcement_renders_cancelled_total").inc()
+
+        self._announcement_version += 1
+        version = self._announcement_version
+        async with self._announcement_lock:
+            if version != self._announcement_version:
+                return
+            with metrics.timer("announcement_stage_seconds", stage="total"):
+                await self._update_announcement(guild, version)
+
+    async def _update_announcement(self, guild: discord.Guild, version: int):
+        channel_id = int(os.getenv('READY_CHANNEL_ID', 0))
+        channel = self.bot.get_channel(channel_id)
+        
+        if not channel:
+            logger.warning("Salon d'annonce introuvable (READY_CHANNEL_ID)")
+            return
+
+        # 0. Résolution des membres (les absents du cache sont chargés en une seule requête)
+        resolved = await resolve_members(guild, self.ready_players)
+        ready_members = [resolved[uid] for uid in self.ready_players if uid in resolved]
+
+        # 1. Construction de l'Embed
+        embed, common_games = self._build_embed(guild)
+
+        # 2. Envoi immédiat de la NOUVELLE annonce (texte seul) et sauvegarde de son ID
+        # (avec les boutons de pages dès qu'il y a une liste à parcourir)
         last_id = self._get_last_announcement_id()
-        old_msg = None
-        if last_id:
-            try:
-                old_msg = await channel.fetch_message(last_id)
-            except (discord.NotFound, discord.Forbidden, discord.HTTPException):
-                pass 
-                
-        # 4. Envoi et sauvegarde de la NOUVELLE annonce
-        if lfg_file:
-            new_msg = await channel.send(file=lfg_file, embed=embed)
-        else:
-            new_msg = await channel.send(embed=embed)
-            
+        view = self.pager if self.ready_players else discord.utils.MISSING
+        with metrics.timer("announcement_stage_seconds", stage="send"):
+            new_msg = await self.bot.outbound.run(
+                Priority.ANNOUNCEMENT, f"messages:{channel.id}", lambda: channel.send(embed=embed, view=view)
+            )
         self._save_last_announcement_id(new_msg.id)
+        self.roster = Roster(
+            new_msg.id, guild.id, roster_fingerprint(self.ready_players, common_games),
+            list(self.ready_players), common_games, Page(embed),
+        ) if self.ready_players else None
+
+        # 3. GÉNÉRATION DE L'IMAGE, en arrière-plan
+        # On ne génère l'image que s'il y a au moins 1 joueur prêt à afficher
+        # (si une mise à jour plus récente a démarré pendant l'envoi, c'est elle qui fera le rendu)
+        if ready_members and version == self._announcement_version:
+            self._render_task = asyncio.create_task(self._attach_lfg_image(new_msg, ready_members, common_games))
 
-        # 5. Suppression de l'ANCIENNE annonce
-        if old_msg:
+        # 4. Suppression de l'ANCIENNE annonce (par son ID, sans la récupérer d'abord)
+        if last_id and last_id != new_msg.id:
             try:
-                await old_msg.delete()
-            except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+                await self.bot.outbound.run(Priority.ANNOUNCEMENT, f"delete:{channel.id}", channel.get_partial_message(last_id).delete)
+            except (discord.NotFound, discord.Forbidden, discord.HTTPException, OutboundDropped):
                 pass
 
+    def refresh_lobbies(self, guild: discord.Guild):
+        """
+        Un joueur prêt a changé de vocal : seules les sections des salons changent, l'annonce est
+        modifiée sur place (pas de nouveau message). Les déplacements rapprochés sont regroupés.
+        """
+        self._lobbies_dirty = True
+        if self._lobby_refresh is None or self._lobby_refresh.done():
+            self._lobby_refresh = asyncio.create_task(self._refresh_lobbies(guild))
+
+    async def _refresh_lobbies(self, guild: discord.Guild):
+        channel = self.bot.get_channel(int(os.getenv('READY_CHANNEL_ID', 0)))
+        while self._lobbies_dirty and channel:
+            self._lobbies_dirty = False
+            roster = self.roster
+            if roster is None:
+                return
+            embed, _ = self._build_embed(guild)
+            roster.summary.embed = embed
+            if roster.section != SUMMARY:
+                # Une autre page est affichée : l'accueil à jour sera montré au retour
+                continue
+            try:
+                await self.bot.outbound.run(
+                    Priority.ANNOUNCEMENT, f"messages:{channel.id}",
+                    lambda: channel.get_partial_message(roster.message_id).edit(embed=embed),
+                )
+            except (discord.NotFound, discord.Forbidden, OutboundDropped):
+                # L'annonce a été remplacée entre-temps : la nouvelle décrit déjà les salons actuels
+                return
+            except discord.HTTPException as e:
+                logger.warning("Impossible de mettre à jour les salons de l'annonce : %s", e)
+                return
+
+    async def _attach_lfg_image(self, message: discord.Message, members: list[discord.Member], common_games: list[str]):
+        """Génère l'image LFG et l'ajoute à l'annonce déjà publiée (tâche annulable)."""
+        try:
+            with metrics.timer("announcement_stage_seconds", stage="image"):
+                buffer = await self._generate_lfg_image(members, common_games)
+                if buffer is None:
+                    # Trop de visuels en retard : l'annonce reste en texte seul
+                    return
+                # L'image fait partie de la page d'accueil ; si une autre page est affichée, elle attendra le retour à l'accueil
+                roster = self.roster
+                if roster and roster.message_id == message.id:
+                    roster.summary.image = buffer.getvalue()
+                    if roster.section != SUMMARY:
+                        return
+                lfg_file = discord.File(buffer, filename="lfg_image.png")
+                with metrics.timer("announcement_stage_seconds", stage="attach"):
+                    await self.bot.outbound.run(
+                        Priority.ANNOUNCEMENT, f"messages:{message.channel.id}", lambda: message.edit(attachments=[lfg_file])
+                    )
+        except (discord.NotFound, discord.Forbidden, OutboundDropped):
+            # L'annonce a déjà été remplacée (et supprimée) entre-temps, ou le bot s'arrête
+            pass
+        except discord.HTTPException as e:
+            logger.warning("Impossible d'ajouter l'image à l'annonce : %s", e)
+
+    async def build_page(self, roster: Roster, section: str, number: int) -> Page:
+        """Construit une page de l'annonce (Embed et vignettes), au premier clic qui la demande."""
+        if section == SUMMARY:
+            return roster.summary
+
+        if section == GAMES:
+            start = number * GAMES_PER_PAGE
+            games = roster.games[start:start + GAMES_PER_PAGE]
+            embed = discord.Embed(
+                title=f"🎮 Jeux en commun — page {number + 1}/{roster.page_count(GAMES)}",
+                description="\n".join(f"**{start + i + 1}.** {game}" for i, game in enumerate(games)) or "*Aucun jeu en commun trouvé*",
+                color=discord.Color.green(),
+            )
+            buffer = await self._generate_lfg_image([], games) if games else None
+        else:
+            start = number * PLAYERS_PER_PAGE
+            players = roster.players[start:start + PLAYERS_PER_PAGE]
+            embed = discord.Embed(
+                title=f"👥 Joueurs prêts — page {number + 1}/{roster.page_count(PLAYERS)}",
+                description="\n".join(f"**{start + i + 1}.** <@{uid}>" for i, uid in enumerate(players)),
+                color=discord.Color.green(),
+            )
+            guild = self.bot.get_guild(roster.guild_id)
+            resolved = await resolve_members(guild, players) if guild else {}
+            members = [resolved[uid] for uid in players if uid in resolved]
+            buffer = await self._generate_lfg_image(members, []) if members else None
+
+        if buffer is None:
+            return Page(embed)
+        embed.set_image(url=f"attachment://lfg_{section}.png")
+        return Page(embed, buffer.getvalue())
+
 
     # --- CHRONOMÈTRES ET TIMERS ---
 
+    def _start_timer(self, kind: str, user_id: int, coro, delay: float, guild_id: int | None):
+        """Lance un chronomètre et note son échéance (nécessaire pour le transmettre lors d'un rechargement)."""
+        getattr(self, f"{kind}_timers")[user_id] = asyncio.create_task(coro)
+        self.timer_deadlines[kind][user_id] = (time.time() + delay, guild_id)
+
     def cancel_all_timers(self, user_id: int):
         """Annule tous les chronomètres liés à un joueur pour éviter les conflits."""
         # AJOUT de self.voice_disconnect_timers dans la liste
-        for timer_dict in [self.offline_timers, self.timeout_timers, self.pending_timers, self.grace_timers, self.voice_disconnect_timers]:
+        for kind in TIMER_KINDS:
+            timer_dict = getattr(self, f"{kind}_timers")
             if user_id in timer_dict:
                 timer_dict[user_id].cancel()
                 del timer_dict[user_id]
+            self.timer_deadlines[kind].pop(user_id, None)
         
         # On le retire de la liste des arrivées prévues
         if user_id in self.pending_arrivals:
             del self.pending_arrivals[user_id]
 
-    async def auto_remove_offline(self, user_id: int, guild: discord.Guild):
+    async def auto_remove_offline(self, user_id: int, guild: discord.Guild, delay: float = OFFLINE_DELAY):
         """Retire le joueur après 5 minutes de déconnexion."""
         try:
-            await asyncio.sleep(5 * 60) # 5 minutes
+            await asyncio.sleep(delay) # 5 minutes
             
-            await self._remove_ready_player(user_id, guild)
+            await self._remove_ready_player(user_id, guild, reason=EVENT_OFFLINE)
             
             # Nettoyage global
             if user_id in self.offline_timers: del self.offline_timers[user_id]
@@ -446,12 +703,12 @@ class ReadyManager(commands.Cog):
         except asyncio.CancelledError:
             pass # Le timer a été annulé car le joueur s'est reconnecté
     
-    async def auto_remove_timeout(self, user_id: int, guild: discord.Guild):
+    async def auto_remove_timeout(self, user_id: int, guild: discord.Guild, delay: float = TIMEOUT_DELAY):
         """Retire le joueur automatiquement au bout de 6 heures."""
         try:
-            await asyncio.sleep(6 * 60 * 60) # 6 heures
+            await asyncio.sleep(delay) # 6 heures
             
-            await self._remove_ready_player(user_id, guild)
+            await self._remove_ready_player(user_id, guild, reason=EVENT_TIMEOUT)
             
             if user_id in self.timeout_timers: del self.timeout_timers[user_id]
             if user_id in self.offline_timers:
@@ -462,22 +719,22 @@ class ReadyManager(commands.Cog):
         except asyncio.CancelledError:
             pass
             
-    async def grace_period(self, user_id: int):
+    async def grace_period(self, user_id: int, delay: float = GRACE_DELAY):
         """Accorde 15 minutes au joueur en retard pour se connecter sur Discord."""
         try:
-            await asyncio.sleep(15 * 60) # 15 minutes
+            await asyncio.sleep(delay) # 15 minutes
             if user_id in self.grace_timers:
                 del self.grace_timers[user_id]
         except asyncio.CancelledError:
             pass
     
-    async def auto_remove_voice_disconnect(self, user_id: int, guild: discord.Guild):
+    async def auto_remove_voice_disconnect(self, user_id: int, guild: discord.Guild, delay: float = VOICE_DISCONNECT_DELAY):
         """Retire le joueur 30 minutes après avoir quitté un salon vocal."""
         try:
-            await asyncio.sleep(30 * 60) # 30 minutes
+            await asyncio.sleep(delay) # 30 minutes
             
             # Le temps est écoulé, on le retire
-            await self._remove_ready_player(user_id, guild)
+            await self._remove_ready_player(user_id, guild, reason=EVENT_VOICE)
             
             # On nettoie tous ses autres chronos potentiels proprement
             self.cancel_all_timers(user_id)
@@ -487,32 +744,29 @@ class ReadyManager(commands.Cog):
         except asyncio.CancelledError:
             pass # Le timer a été annulé car le joueur a rejoint un vocal
 
-    async def delayed_ready(self, member: discord.Member, delay_sec: int):
+    async def delayed_ready(self, user_id: int, guild: discord.Guild, delay_sec: float):
         """Attend le délai demandé avant d'essayer d'ajouter le joueur à la liste."""
         try:
             await asyncio.sleep(delay_sec)
             
-            user_id = member.id
-            guild = member.guild # Récupération de la guild
-            
             if user_id in self.pending_timers:
                 del self.pending_timers[user_id]
             
             if user_id in self.pending_arrivals:
                 del self.pending_arrivals[user_id]
                 
-            updated_member = guild.get_member(user_id)
+            updated_member = await self._get_member(guild, user_id)
             if not updated_member: return
             
             # Si le joueur est en ligne, on l'ajoute !
             if updated_member.status != discord.Status.offline:
                 await self._add_ready_player(user_id, guild)
                 # Ajout de guild dans l'appel du timer
-                self.timeout_timers[user_id] = asyncio.create_task(self.auto_remove_timeout(user_id, guild))
+                self._start_timer("timeout", user_id, self.auto_remove_timeout(user_id, guild), TIMEOUT_DELAY, guild.id)
                 await self.update_announcement(guild)
             else:
                 # S'il est hors-ligne, on lance la période de grâce de 15 minutes
-                self.grace_timers[user_id] = asyncio.create_task(self.grace_period(user_id))
+                self._start_timer("grace", user_id, self.grace_period(user_id), GRACE_DELAY, guild.id)
                 
         except asyncio.CancelledError:
             pass
@@ -573,37 +827,41 @@ class ReadyManager(commands.Cog):
                 await interaction.response.send_message("⏳ Pas plus de 6 heures à l'avance.", ephemeral=True)
                 return
                 
-            # Si le joueur était déjà prêt, on le retire immédiatement
-            if user_id in self.ready_players:
-                await self._remove_ready_player(user_id, guild)
-
-            # On calcule et on enregistre l'heure d'arrivée
-            target_time = time.time() + delay_sec
-            self.pending_arrivals[user_id] = target_time
-
-            self.pending_timers[user_id] = asyncio.create_task(self.delayed_ready(interaction.user, delay_sec))
-            
             heures = delay_sec // 3600
             minutes = (delay_sec % 3600) // 60
             temps_str = f"{heures}h{minutes:02d}" if heures > 0 else f"{minutes} minute(s)"
             
+            # Réponse d'abord : le rôle passe par la file ROLE_SYNC, qui peut être chargée
+            # (Discord n'attend l'accusé de réception que 3 secondes)
             await interaction.response.send_message(
                 f"✅ C'est noté ! Je t'ajouterai à la liste dans {temps_str} (si tu es connecté).", 
                 ephemeral=True
             )
+
+            # Si le joueur était déjà prêt, on le retire immédiatement
+            if user_id in self.ready_players:
+                await self._remove_ready_player(user_id, guild)
+
+            # On calcule et on enregistre l'heure d'arrivée
+            target_time = time.time() + delay_sec
+            self.pending_arrivals[user_id] = target_time
+
+            self._start_timer("pending", user_id, self.delayed_ready(user_id, guild, delay_sec), delay_sec, guild.id)
             
             # On met à jour l'annonce pour afficher la liste d'attente !
             await self.update_announcement(guild)
             return
                 
         # Cas 2 : Ajout immédiat (sans délai ou délai = 0)
+        # Réponse d'abord, le rôle (file ROLE_SYNC) et l'annonce suivent
+        await interaction.response.send_message("✅ Tu es maintenant dans la liste des joueurs prêts.", ephemeral=True)
+
         # _add_ready_player ignore silencieusement l'ajout si le joueur y est déjà, donc pas de risque de doublon.
         await self._add_ready_player(user_id, guild)
         
         # Ajout de guild dans l'appel du timer d'expiration de 6 heures
-        self.timeout_timers[user_id] = asyncio.create_task(self.auto_remove_timeout(user_id, guild))
+        self._start_timer("timeout", user_id, self.auto_remove_timeout(user_id, guild), TIMEOUT_DELAY, guild.id)
         
-        await interaction.response.send_message("✅ Tu es maintenant dans la liste des joueurs prêts.", ephemeral=True)
         await self.update_announcement(guild)
 
 
@@ -620,6 +878,9 @@ class ReadyManager(commands.Cog):
             await interaction.response.send_message("Tu n'étais pas dans la liste.", ephemeral=True)
             return
 
+        # Réponse d'abord : le retrait du rôle attend son tour dans la file ROLE_SYNC
+        await interaction.response.send_message("✅ Tu as été retiré de la liste.", ephemeral=True)
+
         # S'il était officiellement prêt, on le retire (enlève le rôle, etc.)
         if is_ready:
             await self._remove_ready_player(user_id, guild)
@@ -627,7 +888,6 @@ class ReadyManager(commands.Cog):
         # On annule tous ses chronos en cours (ce qui le retirera aussi de pending_arrivals s'il y était)
         self.cancel_all_timers(user_id)
 
-        await interaction.response.send_message("✅ Tu as été retiré de la liste.", ephemeral=True)
         # On met à jour l'annonce pour faire disparaître son pseudo
         await self.update_announcement(guild)
 
@@ -635,12 +895,14 @@ class ReadyManager(commands.Cog):
     async def on_ready(self):
         """Réinitialise la liste et sécurise les rôles au démarrage du bot."""
         self.ready_players.clear()
+        self.lobbies.clear()
+        await self._record_session(EVENT_RESET)
         
         # Récupération de la guild via le channel id
         channel_id = int(os.getenv('READY_CHANNEL_ID', 0))
         channel = self.bot.get_channel(channel_id)
         if not channel:
-            print("⚠️ Attention : Salon d'annonce introuvable au démarrage.")
+            logger.warning("Salon d'annonce introuvable au démarrage (READY_CHANNEL_ID)")
             return
         
         guild = channel.guild
@@ -650,12 +912,28 @@ class ReadyManager(commands.Cog):
         if role_id_str:
             role = guild.get_role(int(role_id_str))
             if role:
-                for member in role.members:
+                tracked = set(self.announcement_state.get("role_holders", ()))
+                unresolved = set()
+                if guild.chunked:
+                    holders = role.members
+                else:
+                    # Cache partiel (mode économe) : role.members serait incomplet ; plutôt que toute
+                    # la liste des membres, on ne cherche (via la gateway) que les joueurs notés
+                    # par _update_role avant l'arrêt
+                    known, unresolved = await lookup_members(guild, tracked)
+                    holders = [m for m in known.values() if m.get_role(role.id)]
+
+                # Les joueurs notés qui n'ont plus le rôle (ou sont partis) ne sont plus suivis ;
+                # ceux dont la requête a expiré restent notés pour le prochain démarrage
+                for user_id in tracked - unresolved - {m.id for m in holders}:
+                    self._track_role_holder(user_id, False)
+                for member in holders:
                     try:
-                        await member.remove_roles(role)
+                        await self.bot.outbound.run(Priority.ROLE_SYNC, f"roles:{guild.id}", lambda: member.remove_roles(role))
                     except discord.Forbidden:
-                        print("❌ Permissions insuffisantes pour nettoyer les rôles au démarrage.")
+                        logger.error("Permissions insuffisantes pour nettoyer les rôles au démarrage", extra={"guild": guild.id})
                         break 
+                    self._track_role_holder(member.id, False)
                             
         await self.update_announcement(guild)
 
@@ -673,7 +951,7 @@ class ReadyManager(commands.Cog):
             
             await self._add_ready_player(user_id, guild)
             # Ajout de guild dans l'appel du timer
-            self.timeout_timers[user_id] = asyncio.create_task(self.auto_remove_timeout(user_id, guild))
+            self._start_timer("timeout", user_id, self.auto_remove_timeout(user_id, guild), TIMEOUT_DELAY, guild.id)
             await self.update_announcement(guild)
             return
 
@@ -684,7 +962,7 @@ class ReadyManager(commands.Cog):
         if after.status == discord.Status.offline:
             if user_id not in self.offline_timers:
                 # Ajout de guild dans l'appel du timer
-                self.offline_timers[user_id] = asyncio.create_task(self.auto_remove_offline(user_id, guild))
+                self._start_timer("offline", user_id, self.auto_remove_offline(user_id, guild), OFFLINE_DELAY, guild.id)
         elif after.status != discord.Status.offline:
             if user_id in self.offline_timers:
                 self.offline_timers[user_id].cancel()
@@ -704,7 +982,7 @@ class ReadyManager(commands.Cog):
         if before.channel is not None and after.channel is None:
             # S'il n'a pas déjà un chronomètre en cours, on en lance un
             if user_id not in self.voice_disconnect_timers:
-                self.voice_disconnect_timers[user_id] = asyncio.create_task(self.auto_remove_voice_disconnect(user_id, guild))
+                self._start_timer("voice_disconnect", user_id, self.auto_remove_voice_disconnect(user_id, guild), VOICE_DISCONNECT_DELAY, guild.id)
                 
         # Cas 2 : Le joueur rejoint un vocal (ou change de vocal)
         elif after.channel is not None:
@@ -713,11 +991,11 @@ class ReadyManager(commands.Cog):
                 self.voice_disconnect_timers[user_id].cancel()
                 del self.voice_disconnect_timers[user_id]
 
+        # Changement de salon de jeu : seuls le salon quitté et le salon rejoint sont à recalculer
+        if self.lobbies.place(user_id, after.channel.id if after.channel else NO_VOICE):
+            self.refresh_lobbies(guild)
+
 
 async def setup(bot: commands.Bot):
-    # Ajout d'une session aiohttp au bot pour télécharger les avatars
-    import aiohttp
-    if not hasattr(bot, 'session') or bot.session.closed:
-        bot.session = aiohttp.ClientSession()
-        
+    # Les téléchargements passent par bot.http_client, créé dans LeBotaFG.setup_hook
     await bot.add_cog(ReadyManager(bot))
\ No newline at end of file
@@ -0,0 +1,215 @@
+import time
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+from cogs.R2P.game_data import game_display_names
+
+# Journal de toutes les transitions (une ligne JSON compacte par événement, jamais compacté)
+EVENTS_FILE = Path("./cogs/R2P/session_events.jsonl")
+# Agrégats déjà calculés, avec le numéro du dernier événement pris en compte et sa position dans le journal
+STATS_FILE = Path("./cogs/R2P/session_stats.json")
+
+# Types d'événements (une lettre pour garder le journal compact)
+EVENT_READY = "r"       # le joueur entre dans la liste
+EVENT_UNREADY = "u"     # /unready
+EVENT_OFFLINE = "o"     # déconnecté depuis 5 minutes
+EVENT_TIMEOUT = "t"     # présent depuis 6 heures
+EVENT_VOICE = "v"       # a quitté le vocal depuis 30 minutes
+EVENT_RESET = "z"       # liste vidée au redémarrage du bot
+REMOVAL_EVENTS = (EVENT_UNREADY, EVENT_OFFLINE, EVENT_TIMEOUT, EVENT_VOICE)
+
+TZ = ZoneInfo("Europe/Paris")
+JOURS = ["Lun", "Mar", "Mer", "Jeu", "Ven", "Sam", "Dim"]
+NUANCES = " ░▒▓█"
+
+
+class TopK:
+    """
+    Compteurs avec classement maintenu au fil de l'eau.
+    Les compteurs ne font que croître : une clé n'entre dans le top qu'en dépassant
+    le dernier, donc le classement reste exact et se lit en O(k).
+    """
+    def __init__(self, k: int = 10, counts: dict[str, int] | None = None):
+        self.k = k
+        self.counts: dict[str, int] = counts or {}
+        self.top: list[tuple[int, str]] = sorted(((c, key) for key, c in self.counts.items()), reverse=True)[:k]
+
+    def increment(self, key: str, amount: int = 1):
+        count = self.counts.get(key, 0) + amount
+        self.counts[key] = count
+
+        for i, (_, top_key) in enumerate(self.top):
+            if top_key == key:
+                self.top[i] = (count, key)
+                break
+        else:
+            if len(self.top) < self.k:
+                self.top.append((count, key))
+            elif count > self.top[-1][0]:
+                self.top[-1] = (count, key)
+            else:
+                return
+        self.top.sort(reverse=True)
+
+    def most_common(self, n: int) -> list[tuple[str, int]]:
+        return [(key, count) for count, key in self.top[:n]]
+
+
+class SessionAggregates:
+    """
+    Statistiques des sessions, mises à jour événement par événement.
+    - heatmap : passages « prêt » par jour de la semaine et par heure (heure de Paris)
+    - pairs : nombre de fois où deux joueurs ont été prêts en même temps
+    - games : nombre de fois où un jeu faisait partie des jeux en commun
+    """
+    def __init__(self, data: dict | None = None):
+        data = data or {}
+        self.seq: int = data.get("seq", 0)
+        # Position (en octets) dans le journal après l'événement `seq` : la reprise ne relit que la suite
+        self.offset: int = data.get("offset", 0)
+        self.heatmap: list[list[int]] = data.get("heatmap") or [[0] * 24 for _ in JOURS]
+        self.pairs = TopK(counts=data.get("pairs"))
+        self.games = TopK(counts=data.get("games"))
+        self.totals: dict[str, int] = data.get("totals", {})
+        # Joueurs prêts à l'instant du dernier événement (nécessaire pour compter les duos)
+        self.ready: set[int] = set(data.get("ready", []))
+        # Index dérivé de `pairs` (non sauvegardé) : { joueur: { partenaire: nombre de sessions } }
+        self.partners: dict[int, dict[int, int]] = {}
+        for key, count in self.pairs.counts.items():
+            a, b = map(int, key.split("-"))
+            self.partners.setdefault(a, {})[b] = count
+            self.partners.setdefault(b, {})[a] = count
+
+    def apply(self, event: dict):
+        kind, user_id = event["e"], event.get("u")
+        self.seq = event["s"]
+        self.totals[kind] = self.totals.get(kind, 0) + 1
+
+        if kind == EVENT_READY:
+            moment = datetime.fromtimestamp(event["t"], TZ)
+            self.heatmap[moment.weekday()][moment.hour] += 1
+            for other in self.ready:
+                a, b = sorted((user_id, other))
+                self.pairs.increment(f"{a}-{b}")
+                count = self.pairs.counts[f"{a}-{b}"]
+                self.partners.setdefault(a, {})[b] = count
+                self.partners.setdefault(b, {})[a] = count
+            self.ready.add(user_id)
+            for game in event.get("g", ()):
+                self.games.increment(game)
+        elif kind in REMOVAL_EVENTS:
+            self.ready.discard(user_id)
+        elif kind == EVENT_RESET:
+            self.ready.clear()
+
+    def frequent_partners(self, user_id: int, limit: int) -> list[int]:
+        """Joueurs les plus souvent prêts en même temps que `user_id`."""
+        partners = self.partners.get(user_id, {})
+        return sorted(partners, key=partners.get, reverse=True)[:limit]
+
+    def to_dict(self) -> dict:
+        return {
+            "seq": self.seq,
+            "offset": self.offset,
+            "heatmap": [list(row) for row in self.heatmap],
+            "pairs": dict(self.pairs.counts),
+            "games": dict(self.games.counts),
+            "totals": dict(self.totals),
+            "ready": sorted(self.ready),
+        }
+
+    def render_heatmap(self) -> str:
+        """Carte de chaleur texte : une ligne par jour, un caractère par heure."""
+        peak = max(max(row) for row in self.heatmap)
+        lines = ["    0     6     12    18   "]
+        for day, row in zip(JOURS, self.heatmap):
+            cells = "".join(
+                NUANCES[(count * (len(NUANCES) - 1) + peak - 1) // peak] if count else NUANCES[0]
+                for count in row
+            )
+            lines.append(f"{day} {cells}")
+        return "\n".join(lines)
+
+
+class SessionStats(commands.Cog):
+    """
+    Historique des sessions LFG : chaque transition de ReadyManager est ajoutée à un
+    journal, et des agrégats tenus à jour au fil de l'eau alimentent /stats-sessions.
+    """
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.aggregates = SessionAggregates()
+        self.events = None
+
+    async def cog_load(self):
+        storage = self.bot.storage
+        self.aggregates = SessionAggregates(await storage.read_json("session_stats", STATS_FILE))
+        # Écriture seule : l'historique n'est jamais consulté, seuls les agrégats le sont
+        self.events = await storage.log("session_events", EVENTS_FILE, retention=1, append_only=True)
+
+        # Les événements postérieurs au dernier instantané sont rejoués (arrêt brutal, rechargement),
+        # en lisant le journal à partir de la position notée avec l'instantané
+        seq, offset = self.aggregates.seq, self.aggregates.offset
+        if offset > self.events.size:
+            # Journal remplacé ou tronqué depuis l'instantané : on relit tout
+            offset = 0
+        for event in await self.events.read(lambda e: e.get("s", 0) > seq, offset=offset):
+            self.aggregates.apply(event)
+        self.aggregates.offset = self.events.size
+
+        self._stats_document = storage.bind("session_stats", STATS_FILE, self.aggregates.to_dict, indent=None)
+        if self.aggregates.offset != offset:
+            # Nouvelle position à sauvegarder (sinon le prochain démarrage relirait la même portion)
+            self._stats_document.mark_dirty()
+
+    async def record(self, kind: str, user_id: int | None = None, common_games: list[str] | None = None):
+        """Ajoute une transition au journal et met à jour les agrégats (appelé par ReadyManager)."""
+        if self.events is None:
+            return
+        event = {"s": self.aggregates.seq + 1, "t": int(time.time()), "e": kind}
+        if user_id is not None:
+            event["u"] = user_id
+        if common_games:
+            event["g"] = common_games
+
+        self.aggregates.apply(event)
+        self._stats_document.mark_dirty()
+        await self.events.append(event)
+        # Jamais en avance sur les agrégats : les lignes écrites d'ici là ont toutes été appliquées
+        self.aggregates.offset = self.events.size
+
+    @app_commands.command(name="stats-sessions", description="Heures de pointe, duos et jeux les plus joués ensemble")
+    async def stats_sessions(self, interaction: discord.Interaction):
+        """Répond directement depuis les agrégats, sans relire l'historique."""
+        aggregates = self.aggregates
+        if not aggregates.totals.get(EVENT_READY):
+            await interaction.response.send_message("📭 Aucune session enregistrée pour le moment.", ephemeral=True)
+            return
+
+        embed = discord.Embed(title="📊 Statistiques des sessions", color=discord.Color.blurple())
+        embed.add_field(name="Heures de pointe", value=f"```\n{aggregates.render_heatmap()}\n```", inline=False)
+
+        pairs = [
+            f"<@{a}> + <@{b}> — {count} fois"
+            for key, count in aggregates.pairs.most_common(5)
+            for a, b in [key.split("-")]
+        ]
+        embed.add_field(name="Duos les plus fréquents", value="\n".join(pairs) or "*Aucun duo pour l'instant*", inline=False)
+
+        games = [f"**{game_display_names.get(game, game)}** — {count} fois" for game, count in aggregates.games.most_common(5)]
+        embed.add_field(name="Jeux le plus souvent en commun", value="\n".join(games) or "*Aucun jeu en commun pour l'instant*", inline=False)
+
+        totals = aggregates.totals
+        removals = sum(totals.get(kind, 0) for kind in REMOVAL_EVENTS)
+        embed.set_footer(text=f"{totals.get(EVENT_READY, 0)} passages « prêt », {removals} départs (dont {totals.get(EVENT_TIMEOUT, 0)} après 6 h)")
+
+        await interaction.response.send_message(embed=embed)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(SessionStats(bot))
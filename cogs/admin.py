@@ -0,0 +1,273 @@
+import asyncio
+import cProfile
+import io
+import pstats
+import tracemalloc
+from typing import Literal
+
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+from core.checks import is_owner
+from core.metrics import Histogram
+
+
+def _format_histograms(series: list[tuple[dict, Histogram]], label_keys: tuple[str, ...], limit: int = 8) -> str:
+    """Une ligne par série : étiquettes, nombre d'appels, p50 et p95 en millisecondes (les plus lentes d'abord)."""
+    series = sorted(series, key=lambda item: item[1].percentile(95), reverse=True)[:limit]
+    lines = []
+    for labels, hist in series:
+        name = " / ".join(str(labels.get(key, "?")) for key in label_keys) or "total"
+        lines.append(f"`{name}` ×{hist.count} — p50 {hist.percentile(50) * 1000:.0f} ms, p95 {hist.percentile(95) * 1000:.0f} ms")
+    return _clip("\n".join(lines))
+
+
+def _clip(text: str, limit: int = 1024) -> str:
+    """Les valeurs de champ d'un Embed sont limitées à 1024 caractères."""
+    if not text:
+        return "*Aucune donnée*"
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+class Admin(commands.Cog):
+    """
+    Commandes d'administration réservées au propriétaire du bot
+    (observabilité, diagnostic...).
+    """
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        # Un seul profilage CPU à la fois (cProfile ne supporte pas l'imbrication)
+        self._profiling = False
+        # Instantanés mémoire successifs : le diff compare les deux derniers
+        self._snapshots: list[tracemalloc.Snapshot] = []
+
+    def cog_unload(self):
+        # On ne laisse pas tracemalloc tourner (et coûter) après le déchargement
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @app_commands.command(name="stats", description="[Admin] Affiche les métriques internes du bot")
+    @app_commands.default_permissions(administrator=True)
+    @is_owner()
+    async def stats(self, interaction: discord.Interaction):
+        """Résumé des latences (commandes, écouteurs, annonce, stockage) et des appels HTTP."""
+        registry = self.bot.metrics
+
+        embed = discord.Embed(title="📈 Métriques du bot", color=discord.Color.blurple())
+        embed.add_field(
+            name="Commandes slash",
+            value=_format_histograms(registry.collect("app_command_seconds"), ("command",)),
+            inline=False
+        )
+        embed.add_field(
+            name="Écouteurs d'événements",
+            value=_format_histograms(registry.collect("listener_seconds"), ("cog", "event")),
+            inline=False
+        )
+        embed.add_field(
+            name="Annonce (étapes)",
+            value=_format_histograms(registry.collect("announcement_stage_seconds"), ("stage",)),
+            inline=False
+        )
+        embed.add_field(
+            name="Stockage JSON",
+            value=_format_histograms(registry.collect("storage_seconds"), ("file", "op")),
+            inline=False
+        )
+
+        lag = registry.histogram("loop_lag_seconds")
+        loop_lines = [
+            f"Retard p50 {lag.percentile(50) * 1000:.1f} ms, p95 {lag.percentile(95) * 1000:.1f} ms, "
+            f"p99 {lag.percentile(99) * 1000:.1f} ms, max {lag.max * 1000:.0f} ms"
+        ]
+        for offender in self.bot.watchdog.worst_offenders(3):
+            loop_lines.append(
+                f"`{offender.cog}.{offender.handler}` ×{offender.count} — pire {offender.worst * 1000:.0f} ms\n"
+                f"↳ {offender.location}"
+            )
+        embed.add_field(name="Boucle asyncio", value=_clip("\n".join(loop_lines)), inline=False)
+
+        http_lines = [
+            f"`{labels['host']}` {labels['status']} ×{counter.value:g}"
+            for labels, counter in sorted(registry.collect("http_requests_total"), key=lambda item: -item[1].value)
+        ]
+        http_lines += [f"`{labels['host']}` nouvelles tentatives ×{c.value:g}" for labels, c in registry.collect("http_retries_total")]
+        http_lines += [f"`{labels['host']}` refus (disjoncteur) ×{c.value:g}" for labels, c in registry.collect("http_rejected_total")]
+        embed.add_field(name="HTTP", value=_clip("\n".join(http_lines)), inline=False)
+
+        # File des appels REST sortants : profondeur par priorité, résultats, seaux les plus chargés
+        outbound = self.bot.outbound
+        depth = ", ".join(f"{labels['priority']} {gauge.value:g}" for labels, gauge in registry.collect("outbound_queue_depth"))
+        outbound_lines = [f"En attente : {depth or '0'}"]
+        outbound_lines += [
+            f"`{labels['priority']} / {labels['bucket']}` {labels['result']} ×{counter.value:g}"
+            for labels, counter in sorted(registry.collect("outbound_requests_total"), key=lambda item: -item[1].value)[:8]
+        ]
+        outbound_lines += [f"`{b.name}` envoyés ×{b.sent}, abandonnés ×{b.dropped}" for b in outbound.bucket_stats()[:3]]
+        embed.add_field(name="File sortante", value=_clip("\n".join(outbound_lines)), inline=False)
+
+        # Santé des shards (mode SHARDED uniquement)
+        up = {labels["shard"]: gauge.value for labels, gauge in registry.collect("shard_up")}
+        shard_lines = [
+            f"Shard {labels['shard']} {'🟢' if up.get(labels['shard']) else '🔴'} — {gauge.value * 1000:.0f} ms"
+            for labels, gauge in sorted(registry.collect("gateway_latency_seconds"), key=lambda item: item[0]["shard"])
+        ]
+        if shard_lines:
+            embed.add_field(name="Shards", value=_clip("\n".join(shard_lines)), inline=False)
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    # --- RECHARGEMENT À CHAUD ---
+
+    @app_commands.command(name="reload", description="[Admin] Recharge une extension sans redémarrer le bot")
+    @app_commands.describe(extension="Extension à recharger (ex: cogs.R2P.ready)")
+    @app_commands.default_permissions(administrator=True)
+    @is_owner()
+    async def reload(self, interaction: discord.Interaction, extension: str):
+        """Recharge le code d'une extension ; ses Cogs transmettent leur état à la nouvelle version."""
+        if extension not in self.bot.extensions:
+            await interaction.response.send_message(f"⚠️ `{extension}` n'est pas une extension chargée.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            handed_over = await self.bot.hot_reload.reload(extension)
+            # Une commande ajoutée ou modifiée doit être publiée (sinon aucun appel REST)
+            synced = await self.bot.sync_tree_if_changed()
+        except Exception as e:
+            await interaction.followup.send(f"❌ Rechargement de `{extension}` impossible : {e}", ephemeral=True)
+            return
+
+        details = f"État transmis : {', '.join(handed_over)}." if handed_over else "Aucun état à transmettre."
+        if synced:
+            details += "\nLes commandes slash ont été resynchronisées."
+        await interaction.followup.send(f"♻️ `{extension}` rechargé. {details}", ephemeral=True)
+
+    @reload.autocomplete("extension")
+    async def reload_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in sorted(self.bot.extensions) if current.lower() in name.lower()
+        ][:25]
+
+    # --- PROFILAGE CPU ---
+
+    @app_commands.command(name="profile", description="[Admin] Profile le bot en direct pendant quelques secondes")
+    @app_commands.describe(secondes="Durée du profilage (1 à 120 s)", tri="Critère de tri des fonctions")
+    @app_commands.default_permissions(administrator=True)
+    @is_owner()
+    async def profile(
+        self,
+        interaction: discord.Interaction,
+        secondes: app_commands.Range[int, 1, 120] = 10,
+        tri: Literal["cumulative", "tottime", "ncalls"] = "cumulative"
+    ):
+        """
+        Active cProfile sur le thread de la boucle pendant la durée demandée.
+        Tout ce que la boucle exécute pendant ce temps (commandes, écouteurs, rendus) est mesuré.
+        """
+        if self._profiling:
+            await interaction.response.send_message("⏳ Un profilage est déjà en cours.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        self._profiling = True
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            await asyncio.sleep(secondes)
+        finally:
+            profiler.disable()
+            self._profiling = False
+
+        report = io.StringIO()
+        report.write(f"Profilage de {secondes} s, tri par {tri}\n\n")
+        pstats.Stats(profiler, stream=report).strip_dirs().sort_stats(tri).print_stats(40)
+
+        await interaction.followup.send(
+            f"🔬 Profilage terminé ({secondes} s).",
+            file=discord.File(io.BytesIO(report.getvalue().encode("utf-8")), filename="profile.txt"),
+            ephemeral=True
+        )
+
+    # --- PROFILAGE MÉMOIRE ---
+
+    @app_commands.command(name="tracemalloc", description="[Admin] Suivi des allocations mémoire (start, snapshot, diff, stop)")
+    @app_commands.describe(action="start : activer, snapshot : capturer, diff : comparer les 2 dernières captures, stop : désactiver")
+    @app_commands.default_permissions(administrator=True)
+    @is_owner()
+    async def tracemalloc_cmd(self, interaction: discord.Interaction, action: Literal["start", "snapshot", "diff", "stop"]):
+        """Pilote tracemalloc. Tant que `start` n'a pas été lancé, aucun coût n'est ajouté au bot."""
+        if action == "start":
+            if tracemalloc.is_tracing():
+                await interaction.response.send_message("ℹ️ tracemalloc est déjà actif.", ephemeral=True)
+                return
+            tracemalloc.start(10)
+            self._snapshots.clear()
+            await interaction.response.send_message("🧠 tracemalloc activé. Fais un `snapshot`, attends, puis un autre et un `diff`.", ephemeral=True)
+            return
+
+        if action == "stop":
+            tracemalloc.stop()
+            self._snapshots.clear()
+            await interaction.response.send_message("🛑 tracemalloc désactivé.", ephemeral=True)
+            return
+
+        if not tracemalloc.is_tracing():
+            await interaction.response.send_message("⚠️ tracemalloc n'est pas actif : lance d'abord `start`.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        if action == "snapshot":
+            # La capture parcourt toutes les allocations : on la fait hors de la boucle
+            snapshot = await asyncio.to_thread(self._take_snapshot)
+            self._snapshots = (self._snapshots + [snapshot])[-2:]
+            current, peak = tracemalloc.get_traced_memory()
+            await interaction.followup.send(
+                f"📸 Instantané n°{len(self._snapshots)} capturé (mémoire suivie : {current / 1e6:.1f} Mo, pic : {peak / 1e6:.1f} Mo).",
+                ephemeral=True
+            )
+            return
+
+        if len(self._snapshots) < 2:
+            await interaction.followup.send("⚠️ Il faut deux `snapshot` avant de faire un `diff`.", ephemeral=True)
+            return
+
+        report = await asyncio.to_thread(self._diff_report, self._snapshots[0], self._snapshots[1])
+        report += self._cog_state_report()
+        await interaction.followup.send(
+            "🧮 Différence entre les deux derniers instantanés :",
+            file=discord.File(io.BytesIO(report.encode("utf-8")), filename="tracemalloc_diff.txt"),
+            ephemeral=True
+        )
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+
+    @staticmethod
+    def _diff_report(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int = 30) -> str:
+        """Les lignes de code dont la mémoire a le plus augmenté entre deux instantanés."""
+        lines = [f"Top {limit} des croissances (par ligne de code)\n"]
+        for stat in after.compare_to(before, "lineno")[:limit]:
+            lines.append(str(stat))
+        return "\n".join(lines) + "\n"
+
+    def _cog_state_report(self) -> str:
+        """Taille des collections gardées en mémoire par chaque Cog (timers, listes, caches...)."""
+        lines = ["\nCollections des Cogs\n"]
+        for cog_name, cog in sorted(self.bot.cogs.items()):
+            for attr, value in sorted(vars(cog).items()):
+                if isinstance(value, (dict, list, set)):
+                    lines.append(f"{cog_name}.{attr} : {len(value)}")
+        return "\n".join(lines) + "\n"
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Admin(bot))
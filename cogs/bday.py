@@ -1,46 +1,85 @@
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
-import json
+import logging
+import asyncio
 import os
-from datetime import datetime, time
+from datetime import date, datetime, time, timedelta
 from zoneinfo import ZoneInfo
 
+from core.outbound import Priority
+
+logger = logging.getLogger(__name__)
+
 DATA_FILE = "bday.json"
+# Date du dernier envoi des vœux, pour rattraper les jours manqués si le bot était éteint
+STATE_FILE = "bday_state.json"
+# Au-delà, les jours manqués ne sont plus rattrapés (inutile de souhaiter un anniversaire d'il y a un mois)
+MAX_RATTRAPAGE_JOURS = 7
+# Longueur maximale d'un message Discord
+LIMITE_MESSAGE = 2000
+
+
+def cle_jour(date_str: str) -> tuple[int, int]:
+    """"15/04" ou "15/04/1998" -> (15, 4)"""
+    return int(date_str[0:2]), int(date_str[3:5])
+
 
 class BDay(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # Anniversaires en mémoire { "id_discord": "JJ/MM[/AAAA]" } et index { (jour, mois): {ids} }
+        # (espaces du service de stockage : chaque modification est écrite en différé, hors de la boucle)
+        self.anniversaires: dict[str, str] = {}
+        self.etat: dict[str, str] = {}
+        self.index: dict[tuple[int, int], set[str]] = {}
+        self.dernier_envoi: date | None = None
+        # Empêche la tâche de 10h et le rattrapage d'envoyer deux fois les mêmes vœux
+        self._verrou_envoi = asyncio.Lock()
+
+    async def cog_load(self):
+        # Lecture unique des fichiers, hors de la boucle
+        self.anniversaires = await self.bot.storage.kv("bday", DATA_FILE)
+        self.etat = await self.bot.storage.kv("bday_state", STATE_FILE)
+        for uid, date_str in self.anniversaires.items():
+            self.index.setdefault(cle_jour(date_str), set()).add(uid)
+        if self.etat.get("last_run"):
+            self.dernier_envoi = date.fromisoformat(self.etat["last_run"])
+
         # On lance la tâche en arrière-plan dès que le Cog est chargé
         self.check_dates.start()
+        self.bot.loop.create_task(self.rattraper_jours_manques())
 
     def cog_unload(self):
         # On coupe proprement la tâche si le Cog est déchargé
         self.check_dates.cancel()
 
-    # --- GESTION DU FICHIER JSON ---
-    def load_data(self):
-        if not os.path.exists(DATA_FILE):
-            return {}
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-
-    def save_data(self, data):
-        with open(DATA_FILE, "w") as f:
-            json.dump(data, f, indent=4)
+    # --- INDEX DES DATES ---
+    def _indexer(self, uid: str, date_str: str | None):
+        """Met à jour l'index pour un seul utilisateur (None = suppression)."""
+        ancienne = self.anniversaires.get(uid)
+        if ancienne:
+            jour = cle_jour(ancienne)
+            self.index.get(jour, set()).discard(uid)
+            if not self.index.get(jour):
+                self.index.pop(jour, None)
+
+        if date_str is None:
+            self.anniversaires.pop(uid, None)
+        else:
+            self.anniversaires[uid] = date_str
+            self.index.setdefault(cle_jour(date_str), set()).add(uid)
 
     # --- COMMANDE /anniv ---
     @app_commands.command(name="anniv", description="Ajoute, modifie ou retire ta date d'anniversaire")
     @app_commands.describe(date="Format JJ/MM ou JJ/MM/AAAA. Laisse vide ou mets 0 pour supprimer.")
     async def anniv(self, interaction: discord.Interaction, date: str = None):
-        data = self.load_data()
         user_id = str(interaction.user.id)
 
         # Suppression
         if not date or date == "0":
-            if user_id in data:
-                del data[user_id]
-                self.save_data(data)
+            if user_id in self.anniversaires:
+                self._indexer(user_id, None)
                 await interaction.response.send_message("✅ Ton anniversaire a bien été retiré !", ephemeral=True)
             else:
                 await interaction.response.send_message("Tu n'avais pas d'anniversaire enregistré.", ephemeral=True)
@@ -65,8 +104,7 @@ class BDay(commands.Cog):
                 return
 
         # Sauvegarde
-        data[user_id] = date_to_save
-        self.save_data(data)
+        self._indexer(user_id, date_to_save)
         await interaction.response.send_message(f"🎉 C'est noté ! Ton anniversaire est enregistré pour le **{date_to_save}**.", ephemeral=True)
 
     # --- TÂCHE QUOTIDIENNE (10h00, heure de Paris) ---
@@ -77,39 +115,87 @@ class BDay(commands.Cog):
     async def check_dates(self):
         # On attend que le bot soit prêt avant de chercher des salons
         await self.bot.wait_until_ready()
-        
-        channel_id = os.getenv("GENERAL_CHANNEL_ID")
-        if not channel_id:
-            print("Erreur : GENERAL_CHANNEL_ID manquant dans le .env")
-            return
-            
-        channel = self.bot.get_channel(int(channel_id))
-        if not channel:
-            print(f"Erreur : Impossible de trouver le channel avec l'ID {channel_id}")
+        await self.souhaiter_jour(datetime.now(self.tz).date())
+
+    async def rattraper_jours_manques(self):
+        """Au démarrage, envoie les vœux des jours où le bot était éteint à 10h."""
+        await self.bot.wait_until_ready()
+
+        maintenant = datetime.now(self.tz)
+        # Aujourd'hui n'est « manqué » que si 10h est déjà passé
+        dernier_jour_du = maintenant.date() if maintenant.time() >= self.run_at.replace(tzinfo=None) else maintenant.date() - timedelta(days=1)
+
+        if self.dernier_envoi is None:
+            # Première exécution avec ce suivi : on prend aujourd'hui comme point de départ
+            await self._enregistrer_envoi(dernier_jour_du)
             return
 
-        data = self.load_data()
-        today = datetime.now(self.tz)
-        today_str_no_year = today.strftime("%d/%m") # Format: "15/04"
+        jour = max(self.dernier_envoi + timedelta(days=1), dernier_jour_du - timedelta(days=MAX_RATTRAPAGE_JOURS - 1))
+        while jour <= dernier_jour_du:
+            await self.souhaiter_jour(jour, en_retard=jour != maintenant.date())
+            jour += timedelta(days=1)
+
+    async def _enregistrer_envoi(self, jour: date):
+        self.dernier_envoi = jour
+        self.etat["last_run"] = jour.isoformat()
+        # Écriture immédiate : après un arrêt brutal, les vœux ne doivent pas repartir une seconde fois
+        await self.bot.storage.commit()
+
+    async def souhaiter_jour(self, jour: date, en_retard: bool = False):
+        """Envoie en un seul message les vœux de tous les anniversaires d'un jour (une seule fois par jour)."""
+        async with self._verrou_envoi:
+            if self.dernier_envoi and jour <= self.dernier_envoi:
+                return
 
-        annivs_du_jour = []
+            channel_id = os.getenv("GENERAL_CHANNEL_ID")
+            if not channel_id:
+                logger.error("GENERAL_CHANNEL_ID manquant dans le .env")
+                return
+                
+            channel = self.bot.get_channel(int(channel_id))
+            if not channel:
+                logger.error("Impossible de trouver le salon %s (GENERAL_CHANNEL_ID)", channel_id)
+                return
 
-        for uid, date_str in data.items():
-            # Si la date (ex: "15/04/1998" ou "15/04") commence par la date du jour ("15/04")
-            if date_str.startswith(today_str_no_year):
+            # Recherche directe dans l'index : plus besoin de parcourir tous les anniversaires
+            annivs_du_jour = []
+            for uid in sorted(self.index.get((jour.day, jour.month), ())):
+                date_str = self.anniversaires[uid]
                 age = None
                 # année de précisée -> longueur > 5
                 if len(date_str) > 5:
-                    year = int(date_str[6:])
-                    age = today.year - year
+                    age = jour.year - int(date_str[6:])
                 annivs_du_jour.append((uid, age))
 
-        # Envoi des messages
+            for message in self.composer_messages(annivs_du_jour, jour if en_retard else None):
+                await self.bot.outbound.run(Priority.ANNOUNCEMENT, f"messages:{channel.id}", lambda message=message: channel.send(message))
+
+            await self._enregistrer_envoi(jour)
+
+    @staticmethod
+    def composer_messages(annivs_du_jour: list[tuple[str, int | None]], jour_en_retard: date | None = None) -> list[str]:
+        """
+        Les vœux de tous les anniversaires du jour, en aussi peu de messages que possible :
+        un seul d'habitude, plusieurs si les lignes dépassent la limite de Discord.
+        """
+        if not annivs_du_jour:
+            return []
+        lignes = []
         for uid, age in annivs_du_jour:
             msg = f"🎂 Joyeux anniversaire <@{uid}> !"
             if age is not None:
                 msg += f" Ça te fait **{age} ans** aujourd'hui ! 🥳"
-            await channel.send(msg)
+            lignes.append(msg)
+        if jour_en_retard:
+            lignes.append(f"*(Avec un peu de retard, c'était le {jour_en_retard.strftime('%d/%m')} !)*")
+
+        messages = []
+        for ligne in lignes:
+            if messages and len(messages[-1]) + 1 + len(ligne) <= LIMITE_MESSAGE:
+                messages[-1] += "\n" + ligne
+            else:
+                messages.append(ligne)
+        return messages
 
 async def setup(bot):
-    await bot.add_cog(BDay(bot))
\ No newline at end of file
+    await bot.add_cog(BDay(bot))
@@ -1,13 +1,68 @@
 import discord
 from discord.ext import commands
+import logging
 import random
 import re
 import asyncio
-import json
+import heapq
 import os
+import time
+
+from core.members import lookup_members
+from core.outbound import OutboundDropped, Priority
+
+logger = logging.getLogger(__name__)
 
 DATA_FILE = "cogs/pseudos.json"
 
+# Durée (en heures) pendant laquelle le pseudo de la blague est conservé
+DUREE_BLAGUE_HEURES = (2, 12)
+# Délai avant de réessayer une restauration qui a échoué pour une raison passagère
+DELAI_NOUVEL_ESSAI = 10 * 60
+
+
+# --- CLASSEMENT DES MESSAGES ---
+
+# Blague « je suis / je m'appelle » : uniquement en tout début de message
+PATTERN_NOM = re.compile(r"(?:je\s+suis|je\s+m['’\s]?appelle)\s+(.+)", re.IGNORECASE)
+
+
+def classer_message(content: str) -> tuple[str | None, str | None]:
+    """
+    Classe un message en une seule passe.
+    Retourne (nouveau_pseudo, terminaison) :
+    - nouveau_pseudo : le texte après « je suis / je m'appelle », sinon None
+    - terminaison : "quoi", "oui" ou "non" si le message finit par ce mot
+      (suivi éventuellement d'espaces ou de ponctuation), sinon None
+
+    La grande majorité des messages ne déclenche rien : on sort alors dès le
+    premier et le dernier caractère, sans lancer d'expression régulière.
+    """
+    # On remonte la ponctuation et les espaces de fin jusqu'au dernier caractère de mot
+    i = len(content) - 1
+    while i >= 0 and not (content[i].isalnum() or content[i] == "_"):
+        i -= 1
+
+    terminaison = None
+    # « quoi » et « oui » finissent par un i, « non » par un n
+    if i >= 2 and content[i] in "iInN":
+        fin = content[max(0, i - 3):i + 1].lower()
+        if fin.endswith("quoi"):
+            terminaison = "quoi"
+        elif fin.endswith("oui"):
+            terminaison = "oui"
+        elif fin.endswith("non"):
+            terminaison = "non"
+
+    nouveau_pseudo = None
+    if content[:1] in ("j", "J"):
+        match_nom = PATTERN_NOM.match(content)
+        if match_nom:
+            nouveau_pseudo = match_nom.group(1).strip()[:32]
+
+    return nouveau_pseudo, terminaison
+
+
 class Quoifeur(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -25,59 +80,144 @@ class Quoifeur(commands.Cog):
             f"@<{feur_role_id}> je te le laisse celui là"
         ]
 
-    # --- GESTION DU FICHIER JSON ---
-    def load_pseudos(self):
-        if not os.path.exists(DATA_FILE):
-            return {}
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
+        # Pseudos à restaurer { "guild-user": {"nick": ancien_pseudo, "due": timestamp} }, gardés en mémoire.
+        # Collection du service de stockage : le fichier n'est lu qu'une fois et réécrit en différé.
+        self.pseudos: dict[str, dict] = {}
 
-    def save_pseudos(self, data):
-        with open(DATA_FILE, "w") as f:
-            json.dump(data, f, indent=4)
+        # Une seule tâche pilote toutes les restaurations, dans l'ordre des échéances
+        self._echeances: list[tuple[float, str]] = []  # tas (échéance, clé)
+        self._reveil = asyncio.Event()
+        self._scheduler_task: asyncio.Task | None = None
 
     # --- ÉVÉNEMENT AU DÉMARRAGE DU COG ---
     async def cog_load(self):
-        # On lance la tâche en arrière-plan pour ne pas bloquer le démarrage du bot
-        self.bot.loop.create_task(self.restaurer_pseudos_au_demarrage())
+        # Lecture unique du fichier, hors de la boucle
+        self.pseudos = await self.bot.storage.documents("pseudos", DATA_FILE)
+        for cle, valeur in list(self.pseudos.items()):
+            # Ancien format { cle: ancien_pseudo } : la restauration est due immédiatement
+            if not isinstance(valeur, dict):
+                valeur = self.pseudos[cle] = {"nick": valeur, "due": 0}
+            heapq.heappush(self._echeances, (valeur["due"], cle))
+
+        # On lance le planificateur en arrière-plan pour ne pas bloquer le démarrage du bot
+        self._scheduler_task = self.bot.loop.create_task(self.planificateur_restaurations())
 
-    async def restaurer_pseudos_au_demarrage(self):
+    async def cog_unload(self):
+        # Les pseudos en attente d'écriture sont gérés par le service de stockage
+        if self._scheduler_task:
+            self._scheduler_task.cancel()
+
+    # --- RESTAURATION DES PSEUDOS ---
+    def programmer_restauration(self, cle: str, ancien_nom: str | None, echeance: float):
+        """Enregistre (ou repousse) la restauration d'un pseudo et réveille le planificateur."""
+        self.pseudos[cle] = {"nick": ancien_nom, "due": echeance}
+        heapq.heappush(self._echeances, (echeance, cle))
+        self._reveil.set()
+
+    def _extraire_echeances_dues(self) -> list[str]:
+        """Retire du tas toutes les restaurations arrivées à échéance."""
+        maintenant = time.time()
+        dues = []
+        while self._echeances and self._echeances[0][0] <= maintenant:
+            echeance, cle = heapq.heappop(self._echeances)
+            entree = self.pseudos.get(cle)
+            # Entrée obsolète : pseudo déjà restauré ou échéance repoussée depuis
+            if entree and entree["due"] == echeance:
+                dues.append(cle)
+        return dues
+
+    async def planificateur_restaurations(self):
+        """
+        Boucle unique qui remplace les anciennes tâches « une par blague » :
+        elle dort jusqu'à la prochaine échéance (ou jusqu'à un nouvel ajout),
+        puis restaure en parallèle tous les pseudos dus.
+        """
         # On attend que le bot soit totalement connecté à Discord
         await self.bot.wait_until_ready()
-        
-        data = self.load_pseudos()
-        if not data:
-            return # Rien à restaurer
 
-        print("🔄 Restauration des pseudos suite à un redémarrage...")
-        
-        # On copie les clés dans une liste pour pouvoir modifier le dictionnaire original en toute sécurité
-        cles_a_supprimer = []
+        while True:
+            dues = self._extraire_echeances_dues()
+            if dues:
+                await self.restaurer_pseudos(dues)
+                continue
 
-        for key, ancien_nom in data.items():
+            delai = max(0.0, self._echeances[0][0] - time.time()) if self._echeances else None
+            self._reveil.clear()
             try:
-                guild_id_str, user_id_str = key.split("-")
-                guild = self.bot.get_guild(int(guild_id_str))
-                
-                if guild:
-                    member = guild.get_member(int(user_id_str)) or await guild.fetch_member(int(user_id_str))
-                    if member:
-                        # Si ancien_nom est None, ça remet le nom par défaut de l'utilisateur
-                        await member.edit(nick=ancien_nom)
-                        print(f"✅ Pseudo de {member.name} restauré.")
-                        cles_a_supprimer.append(key)
-            except discord.Forbidden:
-                print(f"❌ Permission manquante pour restaurer {key}.")
-                cles_a_supprimer.append(key) # On supprime quand même pour ne pas bloquer en boucle
-            except Exception as e:
-                print(f"⚠️ Erreur avec {key} : {e}")
-
-        # On nettoie le fichier JSON
-        for cle in cles_a_supprimer:
-            if cle in data:
-                del data[cle]
-        
-        self.save_pseudos(data)
+                await asyncio.wait_for(self._reveil.wait(), timeout=delai)
+            except asyncio.TimeoutError:
+                pass
+
+    async def restaurer_pseudos(self, cles: list[str]):
+        """Restaure plusieurs pseudos en parallèle (la file sortante du bot en règle le débit)."""
+        if len(cles) > 1:
+            logger.info("Restauration de %d pseudo(s)", len(cles))
+
+        # Regroupement par serveur pour retrouver les membres absents du cache en une seule requête
+        par_serveur: dict[int, list[tuple[str, int]]] = {}
+        for cle in cles:
+            guild_id_str, user_id_str = cle.split("-")
+            par_serveur.setdefault(int(guild_id_str), []).append((cle, int(user_id_str)))
+
+        travaux = []
+        for guild_id, entrees in par_serveur.items():
+            guild = self.bot.get_guild(guild_id)
+            if not guild:
+                # Le bot n'est plus sur ce serveur : rien à restaurer
+                for cle, _ in entrees:
+                    self.pseudos.pop(cle, None)
+                continue
+
+            # Les absents du cache passent par la gateway (100 par requête) au lieu d'un fetch_member REST par joueur
+            membres, non_verifies = await lookup_members(guild, [user_id for _, user_id in entrees])
+
+            for cle, user_id in entrees:
+                if user_id in non_verifies:
+                    # Requête expirée : on ne sait pas s'il est parti, on réessaiera plus tard
+                    entree = self.pseudos.get(cle)
+                    if entree is not None:
+                        self._reporter(cle, entree)
+                    continue
+                travaux.append(self._restaurer_pseudo(cle, membres.get(user_id)))
+
+        await asyncio.gather(*travaux)
+
+    def _oublier(self, cle: str, entree: dict):
+        """Retire une restauration terminée, sauf si une nouvelle blague l'a remplacée entre-temps."""
+        if self.pseudos.get(cle) is entree:
+            del self.pseudos[cle]
+
+    def _reporter(self, cle: str, entree: dict):
+        """Reprogramme une restauration dans DELAI_NOUVEL_ESSAI (sauf si une nouvelle blague a remplacé l'entrée)."""
+        if self.pseudos.get(cle) is entree:
+            echeance = time.time() + DELAI_NOUVEL_ESSAI
+            self.pseudos.patch(cle, due=echeance)
+            heapq.heappush(self._echeances, (echeance, cle))
+
+    async def _restaurer_pseudo(self, cle: str, member: discord.Member | None):
+        entree = self.pseudos.get(cle)
+        if entree is None:
+            return
+        if member is None:
+            # Le membre a quitté le serveur : son pseudo n'existe plus
+            del self.pseudos[cle]
+            return
+
+        try:
+            # Si le pseudo d'origine est None, ça remet le nom par défaut de l'utilisateur
+            await self.bot.outbound.run(Priority.ROLE_SYNC, f"members:{member.guild.id}", lambda: member.edit(nick=entree["nick"]))
+            logger.debug("Pseudo de %s restauré", member.name, extra={"guild": member.guild.id, "user": member.id})
+            self._oublier(cle, entree)
+        except discord.Forbidden:
+            logger.warning("Permission manquante pour restaurer %s", cle)
+            self._oublier(cle, entree) # On supprime quand même pour ne pas bloquer en boucle
+        except discord.NotFound:
+            # Parti du serveur entre-temps
+            self._oublier(cle, entree)
+        except Exception as e:
+            # Erreur passagère : on réessaiera plus tard au lieu de boucler
+            logger.warning("Restauration de %s impossible, nouvel essai plus tard : %s", cle, e)
+            self._reporter(cle, entree)
 
     # --- ÉCOUTEUR DE MESSAGES ---
     @commands.Cog.listener()
@@ -85,85 +225,59 @@ class Quoifeur(commands.Cog):
         if message.author.bot or not message.guild:
             return
 
-        content = message.content
+        nouveau_nom, terminaison = classer_message(message.content)
 
         # ---------------------------------------------------------
         # BLAGUE "JE SUIS / JE M'APPELLE"
         # ---------------------------------------------------------
-        match_nom = re.match(r"^(?:je\s+suis|je\s+m['’\s]?appelle)\s+(.+)", content, re.IGNORECASE)
-        
-        if match_nom:
+        if nouveau_nom:
             cle = f"{message.guild.id}-{message.author.id}"
-            data = self.load_pseudos()
+            data = self.pseudos
             
             # 1. On détermine le vrai pseudo d'origine
             if cle in data:
                 # Si la personne est déjà dans le fichier, on garde le VRAI nom intact
-                ancien_nom = data[cle] 
+                ancien_nom = data[cle]["nick"]
             else:
                 # Si c'est la première fois, on prend son pseudo actuel
                 ancien_nom = message.author.nick 
-                
-            nouveau_nom = match_nom.group(1).strip()[:32]
 
             try:
-                # 2. On change le pseudo
-                await message.author.edit(nick=nouveau_nom)
-                await message.add_reaction("👋")
-
-                # 3. Si ça a réussi, on sauvegarde dans le JSON (seulement si c'est nouveau)
-                if cle not in data:
-                    data[cle] = ancien_nom
-                    self.save_pseudos(data)
-
-                # 4. Gestion des chronomètres (on annule l'ancien si la personne refait la blague)
-                if cle in self.timers:
-                    self.timers[cle].cancel()
-
-                # 5. On crée le nouveau compte à rebours
-                async def restaurer_pseudo():
-                    heures = random.randint(2, 12)
-                    await asyncio.sleep(heures * 3600)
-                    
-                    try:
-                        # Fin du temps : on restaure
-                        await message.author.edit(nick=ancien_nom)
-                        
-                        # On nettoie le fichier JSON
-                        donnees_actuelles = self.load_pseudos()
-                        if cle in donnees_actuelles:
-                            del donnees_actuelles[cle]
-                            self.save_pseudos(donnees_actuelles)
-                            
-                    except discord.Forbidden:
-                        pass 
-                    finally:
-                        # On retire le timer de la mémoire
-                        if cle in self.timers:
-                            del self.timers[cle]
-
-                # On lance la tâche et on la stocke dans notre dictionnaire self.timers
-                tache = self.bot.loop.create_task(restaurer_pseudo())
-                self.timers[cle] = tache
-
-            except discord.Forbidden:
-                # Le bot n'a pas les permissions (ex: membre trop haut gradé)
+                # 2. On change le pseudo (priorité basse : abandonné si la file est encombrée)
+                outbound = self.bot.outbound
+                await outbound.run(Priority.FUN, f"members:{message.guild.id}", lambda: message.author.edit(nick=nouveau_nom))
+
+                # 3. Si ça a réussi, on programme la restauration (une nouvelle blague repousse l'échéance)
+                heures = random.randint(*DUREE_BLAGUE_HEURES)
+                self.programmer_restauration(cle, ancien_nom, time.time() + heures * 3600)
+
+                await outbound.run(Priority.FUN, f"reactions:{message.channel.id}", lambda: message.add_reaction("👋"))
+
+            except (discord.Forbidden, OutboundDropped):
+                # Le bot n'a pas les permissions (ex: membre trop haut gradé), ou la blague est arrivée trop tard
                 pass
 
         # ---------------------------------------------------------
         # QUOI / OUI / NON
         # ---------------------------------------------------------
-        if re.search(r'quoi[\s\W]*$', content, re.IGNORECASE):
+        reponse = None
+        if terminaison == "quoi":
             if random.randint(1, 4) == 1:
-                await message.reply(random.choice(self.reponses_quoi))
+                reponse = random.choice(self.reponses_quoi)
 
-        elif re.search(r'oui[\s\W]*$', content, re.IGNORECASE):
+        elif terminaison == "oui":
             if random.randint(1, 4) == 1:
-                await message.reply("stiti !")
+                reponse = "stiti !"
 
-        elif re.search(r'non[\s\W]*$', content, re.IGNORECASE):
+        elif terminaison == "non":
             if random.randint(1, 4) == 1:
-                await message.reply("bril !")
+                reponse = "bril !"
+
+        if reponse:
+            try:
+                await self.bot.outbound.run(Priority.FUN, f"messages:{message.channel.id}", lambda: message.reply(reponse))
+            except OutboundDropped:
+                pass
 
 async def setup(bot):
     await bot.add_cog(Quoifeur(bot))
\ No newline at end of file
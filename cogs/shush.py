@@ -1,60 +1,91 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
 import os
 import random
 from datetime import datetime
 
+from core.checks import is_owner
+from core.outbound import Priority
+
 class ShushCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.fichier_logs = "cogs/shush_logs.json" # Nom du fichier de sauvegarde
+        self.fichier_logs = "cogs/shush_logs.jsonl" # Nom du fichier de sauvegarde (une ligne JSON par message)
+        self.ancien_fichier_logs = "cogs/shush_logs.json" # Ancien format, repris au premier démarrage
+        # Nombre de messages conservés (réglable dans le .env)
+        self.retention = int(os.getenv("SHUSH_LOG_RETENTION", 50))
+        self.logs = None
+
+    async def cog_load(self):
+        # Journal tenu par le service de stockage (il survit au rechargement du Cog)
+        self.logs = await self.bot.storage.log(
+            "shush_logs", self.fichier_logs, retention=self.retention, legacy_path=self.ancien_fichier_logs
+        )
 
-    def save_log(self, interaction: discord.Interaction, message: str):
-        """Fonction qui gère la sauvegarde dans le fichier JSON."""
+    async def save_log(self, interaction: discord.Interaction, message: str):
+        """Ajoute le message au journal (écriture en fin de fichier, hors de la boucle)."""
         
         new_log = {
             "date": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
             "author_name": str(interaction.user),
             "author_id": interaction.user.id,
             "channel": interaction.channel.name if interaction.channel else "Inconnu",
+            "channel_id": interaction.channel.id if interaction.channel else None,
             "message": message
         }
-
-        logs = []
-        
-        if os.path.exists(self.fichier_logs):
-            with open(self.fichier_logs, "r", encoding="utf-8") as f:
-                try:
-                    logs = json.load(f)
-                except json.JSONDecodeError:
-                    logs = []
-
-        logs.append(new_log)
-
-        # On garde uniquement les 50 derniers éléments
-        if len(logs) > 50:
-            logs = logs[-50:]
-        
-        with open(self.fichier_logs, "w", encoding="utf-8") as f:
-            # indent=4 permet de rendre le fichier lisible pour un humain
-            json.dump(logs, f, indent=4, ensure_ascii=False)
+        await self.logs.append(new_log)
 
 
     @app_commands.command(name="chuchoter", description="Envoie un message 83,33% anonyme !")
     @app_commands.describe(message="Le message que tu veux envoyer")
     async def chuchoter(self, interaction: discord.Interaction, message: str):
         
-        self.save_log(interaction, message)
         chance = random.randint(1, 6)
         
+        # Réponse d'abord : l'écriture du journal attend son tour dans le thread de stockage
         await interaction.response.send_message("🤫 Ton message a bien été envoyé !", ephemeral=True)
+        await self.save_log(interaction, message)
            
         if chance == 1:
-            await interaction.channel.send(f'Quelqu\'un m\'a chuchoté : "{message}"\nJe balance, c\'est {interaction.user.mention} !')
+            texte = f'Quelqu\'un m\'a chuchoté : "{message}"\nJe balance, c\'est {interaction.user.mention} !'
         else:
-            await interaction.channel.send(f'Quelqu\'un m\'a chuchoté : "{message}"')
+            texte = f'Quelqu\'un m\'a chuchoté : "{message}"'
+        channel = interaction.channel
+        await self.bot.outbound.run(Priority.INTERACTION, f"messages:{channel.id}", lambda: channel.send(texte))
+
+    @app_commands.command(name="chuchotements", description="[Admin] Derniers messages chuchotés")
+    @app_commands.describe(auteur="Filtrer par auteur", salon="Filtrer par salon", nombre="Nombre de messages (25 max)")
+    @app_commands.default_permissions(administrator=True)
+    @is_owner()
+    async def chuchotements(
+        self,
+        interaction: discord.Interaction,
+        auteur: discord.User = None,
+        salon: discord.TextChannel = None,
+        nombre: app_commands.Range[int, 1, 25] = 10
+    ):
+        """Consulte le journal en mémoire, sans relire le fichier."""
+        def correspond(entry: dict) -> bool:
+            if auteur and entry.get("author_id") != auteur.id:
+                return False
+            if salon:
+                # Les anciennes entrées n'ont que le nom du salon
+                if "channel_id" in entry:
+                    return entry["channel_id"] == salon.id
+                return entry.get("channel") == salon.name
+            return True
+
+        entries = self.logs.recent(nombre, correspond)
+        if not entries:
+            await interaction.response.send_message("📭 Aucun message chuchoté ne correspond.", ephemeral=True)
+            return
+
+        lines = [f"`{e['date']}` **{e['author_name']}** dans #{e['channel']} : {e['message'][:200]}" for e in entries]
+        text = "\n".join(lines)
+        if len(text) > 2000:
+            text = text[:1999] + "…"
+        await interaction.response.send_message(text, ephemeral=True)
 
 async def setup(bot):
-    await bot.add_cog(ShushCog(bot))
\ No newline at end of file
+    await bot.add_cog(ShushCog(bot))
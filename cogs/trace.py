@@ -0,0 +1,82 @@
+import os
+import time
+from typing import Literal
+
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+from core import trace
+from core.checks import is_owner
+
+# Fichier de trace par défaut (TRACE_FILE dans le .env lance l'enregistrement dès le démarrage)
+DEFAULT_TRACE_FILE = "traces/gateway.jsonl"
+
+
+class TraceRecorder(commands.Cog):
+    """
+    Enregistre les événements gateway (commandes slash, présences, états vocaux, messages)
+    dans une trace compacte, rejouable hors-ligne avec `python -m benchmarks.replay`.
+    Les lignes sont ajoutées par le thread du service de stockage, jamais sur la boucle.
+    """
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.log = None
+        self._started_at = 0.0
+
+    async def cog_load(self):
+        path = os.getenv("TRACE_FILE")
+        if path:
+            await self.start(path)
+
+    async def start(self, path: str):
+        # Écriture seule : une trace reprise n'est pas relue (elle n'est jamais consultée par le bot)
+        self.log = await self.bot.storage.log(f"trace:{path}", path, retention=1, append_only=True)
+        self._started_at = time.monotonic()
+        await self.log.append(trace.start_event(time.time()))
+
+    async def _record(self, event: dict | None):
+        if self.log is None or event is None:
+            return
+        event["t"] = round(time.monotonic() - self._started_at, 3)
+        await self.log.append(event)
+
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction: discord.Interaction):
+        await self._record(trace.interaction_event(interaction))
+
+    @commands.Cog.listener()
+    async def on_presence_update(self, before: discord.Member, after: discord.Member):
+        await self._record(trace.presence_event(before, after))
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        await self._record(trace.voice_event(member, before, after))
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        await self._record(trace.message_event(message))
+
+    @app_commands.command(name="trace", description="[Admin] Démarre ou arrête l'enregistrement des événements gateway")
+    @app_commands.describe(action="start ou stop", fichier="Fichier de trace (JSON Lines)")
+    @app_commands.default_permissions(administrator=True)
+    @is_owner()
+    async def trace_cmd(self, interaction: discord.Interaction, action: Literal["start", "stop"], fichier: str = DEFAULT_TRACE_FILE):
+        if action == "stop":
+            if self.log is None:
+                await interaction.response.send_message("ℹ️ Aucun enregistrement en cours.", ephemeral=True)
+                return
+            path, self.log = self.log.path, None
+            await interaction.response.send_message(f"⏹️ Enregistrement arrêté (`{path}`).", ephemeral=True)
+            return
+
+        # Accusé de réception d'abord : l'ouverture passe par le thread de stockage, qui peut être occupé
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        await self.start(fichier)
+        await interaction.followup.send(
+            f"⏺️ Enregistrement dans `{fichier}`. Rejouer : `python -m benchmarks.replay --trace {fichier}`", ephemeral=True
+        )
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(TraceRecorder(bot))
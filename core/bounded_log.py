@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from core import codec
+from core.metrics import metrics
+
+
+class BoundedLog:
+    """
+    Journal borné au format JSON Lines (une entrée JSON par ligne).
+
+    - Ajout en O(1) : une ligne écrite en fin de fichier, jamais de relecture.
+    - Les écritures passent par un unique thread (dédié, ou celui du service de
+      stockage) : elles ne bloquent pas la boucle et restent dans l'ordre d'arrivée.
+    - Quand le fichier dépasse `retention * compact_factor` lignes, il est
+      réécrit (atomiquement) avec seulement les `retention` dernières entrées.
+      Avec `compact_factor=None`, le fichier garde tout l'historique.
+    - Les `retention` dernières entrées restent en mémoire : les consultations
+      ne relisent jamais le fichier.
+    - Avec `append_only=True`, le fichier existant n'est pas relu à l'ouverture
+      (trace, historique jamais consulté) ni compacté : seules les entrées
+      ajoutées depuis sont en mémoire.
+    """
+    def __init__(self, path: str | Path, retention: int = 50, compact_factor: int | None = 2, name: str | None = None,
+                 executor: ThreadPoolExecutor | None = None, append_only: bool = False):
+        self.path = Path(path)
+        self.retention = retention
+        self.append_only = append_only
+        # Compacter demanderait les entrées déjà sur le disque, qu'un journal en écriture seule ne charge pas
+        self.compact_factor = None if append_only else compact_factor
+        self.name = name or self.path.stem
+        self.entries: deque[dict] = deque(maxlen=retention)
+        self._lines_on_disk = 0
+        # Taille du fichier une fois les écritures programmées faites (tenue sur la boucle ; exacte sans compaction)
+        self.size = 0
+        # Thread partagé (fourni par le service de stockage) ou dédié à ce journal
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"log-{self.name}")
+
+    # - - - Côté thread d'écriture - - - #
+
+    def _load(self, legacy_path: Path | None):
+        if not self.path.exists() and legacy_path and legacy_path.exists():
+            self._import_legacy(legacy_path)
+            return
+
+        if not self.path.exists():
+            return
+
+        self.size = self.path.stat().st_size
+        # Journal en écriture seule : l'historique n'est pas rechargé
+        if self.append_only:
+            return
+
+        with open(self.path, "rb") as f:
+            for line in f:
+                self._lines_on_disk += 1
+                try:
+                    self.entries.append(codec.loads(line))
+                except json.JSONDecodeError:
+                    # Ligne tronquée (arrêt brutal pendant une écriture) : on l'ignore
+                    continue
+
+    def _import_legacy(self, legacy_path: Path):
+        """Reprend un ancien journal au format liste JSON."""
+        try:
+            with open(legacy_path, "rb") as f:
+                old_entries = codec.loads(f.read())
+        except (json.JSONDecodeError, OSError):
+            return
+        self.entries.extend(old_entries)
+        self._compact(list(self.entries))
+        self.size = self.path.stat().st_size
+
+    def _append(self, line: bytes, snapshot: list[dict] | None):
+        with metrics.timer("storage_seconds", file=self.name, op="append"):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(line)
+            self._lines_on_disk += 1
+        if snapshot is not None:
+            self._compact(snapshot)
+
+    def _read_all(self, predicate: Callable[[dict], bool] | None, offset: int) -> list[dict]:
+        if not self.path.exists():
+            return []
+        entries = []
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    entry = codec.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if predicate is None or predicate(entry):
+                    entries.append(entry)
+        return entries
+
+    def _compact(self, snapshot: list[dict]):
+        with metrics.timer("storage_seconds", file=self.name, op="compact"):
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "wb") as f:
+                f.writelines(codec.dumps(entry) + b"\n" for entry in snapshot)
+            os.replace(tmp_path, self.path)
+            self._lines_on_disk = len(snapshot)
+
+    # - - - Côté boucle - - - #
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def open(self, legacy_path: str | Path | None = None):
+        """Charge les dernières entrées (et reprend l'ancien format si besoin)."""
+        await self._run(self._load, Path(legacy_path) if legacy_path else None)
+
+    async def append(self, entry: dict):
+        """Ajoute une entrée : mise à jour immédiate en mémoire, écriture disque en arrière-plan."""
+        self.entries.append(entry)
+        line = codec.dumps(entry) + b"\n"
+        self.size += len(line)
+        # La compaction se décide ici pour qu'elle parte avec un instantané cohérent de la mémoire
+        pending_lines = self._lines_on_disk + 1
+        must_compact = self.compact_factor is not None and pending_lines > self.retention * self.compact_factor
+        snapshot = list(self.entries) if must_compact else None
+        await self._run(self._append, line, snapshot)
+
+    def recent(self, limit: int = 10, predicate: Callable[[dict], bool] | None = None) -> list[dict]:
+        """Les `limit` entrées les plus récentes (de la plus récente à la plus ancienne) qui vérifient `predicate`."""
+        results = []
+        for entry in reversed(self.entries):
+            if predicate is None or predicate(entry):
+                results.append(entry)
+                if len(results) >= limit:
+                    break
+        return results
+
+    async def read(self, predicate: Callable[[dict], bool] | None = None, offset: int = 0) -> list[dict]:
+        """
+        Relit le fichier (hors de la boucle), au-delà des entrées gardées en mémoire.
+        `offset` : position (en octets, début d'une ligne) à partir de laquelle lire, par exemple
+        une valeur de `size` notée plus tôt.
+        """
+        return await self._run(self._read_all, predicate, offset)
+
+    async def close(self):
+        """Attend la fin des écritures en cours puis libère le thread (s'il est dédié)."""
+        if self._owns_executor:
+            await asyncio.to_thread(self._executor.shutdown, wait=True)
+        else:
+            # Le thread traite les tâches dans l'ordre : celle-ci passe après les écritures en attente
+            await self._run(lambda: None)
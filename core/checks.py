@@ -0,0 +1,9 @@
+import discord
+from discord import app_commands
+
+
+def is_owner():
+    """Réserve une commande slash au propriétaire du bot (celui de l'application Discord)."""
+    async def predicate(interaction: discord.Interaction) -> bool:
+        return await interaction.client.is_owner(interaction.user)
+    return app_commands.check(predicate)
@@ -0,0 +1,76 @@
+"""
+Sérialisation JSON de tout le bot (stockage, journaux JSON Lines, réponses HTTP).
+
+Le codec actif est choisi par le profil d'exécution (voir core.runtime.RuntimeConfig) :
+- json   : module standard, fichiers indentés comme ils l'ont toujours été ;
+- orjson : bien plus rapide, sortie compacte (l'indentation demandée est ignorée).
+
+Les deux lisent indifféremment les fichiers écrits par l'autre : changer de profil
+ne demande aucune migration. Les erreurs de lecture restent des json.JSONDecodeError
+(orjson.JSONDecodeError en hérite).
+"""
+import json
+from typing import Any, Callable
+
+
+class JsonCodec:
+    """Module json de la bibliothèque standard."""
+    name = "json"
+
+    def dumps(self, obj: Any, indent: int | None = None, default: Callable | None = None) -> bytes:
+        return json.dumps(obj, indent=indent, ensure_ascii=False, default=default).encode("utf-8")
+
+    def loads(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """orjson : sortie compacte en UTF-8, clés non textuelles converties comme le fait json."""
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj: Any, indent: int | None = None, default: Callable | None = None) -> bytes:
+        return self._orjson.dumps(obj, default=default, option=self._options)
+
+    def loads(self, data: bytes | str) -> Any:
+        return self._orjson.loads(data)
+
+
+# Codecs disponibles, par nom (un codec est instancié au moment où il est choisi)
+CODECS: dict[str, Callable[[], Any]] = {
+    "json": JsonCodec,
+    "orjson": OrjsonCodec,
+}
+
+_current = JsonCodec()
+
+
+def use_codec(name: str) -> str:
+    """
+    Active le codec `name` pour tout le processus. Si sa dépendance manque, le module
+    standard reste en place. Retourne le nom du codec effectivement actif.
+    """
+    global _current
+    if name not in CODECS:
+        raise ValueError(f"Codec JSON inconnu : {name} (attendu : {', '.join(CODECS)})")
+    try:
+        _current = CODECS[name]()
+    except ImportError:
+        _current = JsonCodec()
+    return _current.name
+
+
+def current() -> str:
+    return _current.name
+
+
+def dumps(obj: Any, indent: int | None = None, default: Callable | None = None) -> bytes:
+    return _current.dumps(obj, indent, default)
+
+
+def loads(data: bytes | str) -> Any:
+    return _current.loads(data)
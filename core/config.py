@@ -0,0 +1,114 @@
+import os
+from dataclasses import dataclass
+from typing import Mapping
+
+import discord
+
+# Profils prédéfinis : "full" reproduit le comportement historique (tout en cache),
+# "lean" ne télécharge pas la liste des membres et charge à la demande ceux dont le bot a besoin.
+# ("voice" seul est plus petit encore, mais discord.py retire du cache un membre qui quitte
+# le vocal : on perdrait alors le suivi de présence des joueurs prêts.)
+PROFILES: dict[str, dict] = {
+    "full": {"member_cache": "all", "chunk_guilds_at_startup": True, "max_messages": 1000},
+    "lean": {"member_cache": "joined", "chunk_guilds_at_startup": False, "max_messages": 200},
+}
+
+MEMBER_CACHE_MODES = ("all", "joined", "voice", "none")
+
+
+def _env_bool(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "oui")
+
+
+@dataclass(frozen=True)
+class GatewayConfig:
+    """
+    Réglages de la connexion à la gateway Discord et du cache de membres.
+
+    - member_cache : quels membres restent en mémoire
+        all    : tous (nécessite le chunking pour être complet)
+        joined : ceux reçus à la connexion (en vocal, pour un grand serveur), arrivés depuis ou chargés à la demande
+        voice  : seulement ceux présents dans un salon vocal
+        none   : aucun (hors le bot lui-même)
+    - chunk_guilds_at_startup : télécharger la liste complète des membres à la connexion
+    - max_messages : taille du cache de messages (None pour le désactiver)
+    - sharded / shard_count : utiliser AutoShardedBot (shard_count=None : nombre choisi par Discord)
+
+    Les membres absents du cache sont récupérés à la demande (voir core.members).
+    """
+    profile: str = "full"
+    members_intent: bool = True
+    presences_intent: bool = True
+    message_content_intent: bool = True
+    member_cache: str = "all"
+    chunk_guilds_at_startup: bool = True
+    max_messages: int | None = 1000
+    sharded: bool = False
+    shard_count: int | None = None
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "GatewayConfig":
+        """
+        Lit la configuration depuis l'environnement (.env) :
+        GATEWAY_PROFILE (full|lean), puis surcharges individuelles MEMBER_CACHE,
+        CHUNK_GUILDS_AT_STARTUP, MESSAGE_CACHE_SIZE, INTENT_PRESENCES, SHARDED, SHARD_COUNT.
+        """
+        profile = environ.get("GATEWAY_PROFILE", "full")
+        if profile not in PROFILES:
+            raise ValueError(f"GATEWAY_PROFILE inconnu : {profile} (attendu : {', '.join(PROFILES)})")
+        settings = dict(PROFILES[profile], profile=profile)
+
+        if "MEMBER_CACHE" in environ:
+            settings["member_cache"] = environ["MEMBER_CACHE"]
+        if "CHUNK_GUILDS_AT_STARTUP" in environ:
+            settings["chunk_guilds_at_startup"] = _env_bool(environ["CHUNK_GUILDS_AT_STARTUP"])
+        if "MESSAGE_CACHE_SIZE" in environ:
+            size = int(environ["MESSAGE_CACHE_SIZE"])
+            settings["max_messages"] = size if size > 0 else None
+        if "INTENT_PRESENCES" in environ:
+            settings["presences_intent"] = _env_bool(environ["INTENT_PRESENCES"])
+        if "SHARDED" in environ:
+            settings["sharded"] = _env_bool(environ["SHARDED"])
+        if environ.get("SHARD_COUNT"):
+            settings["shard_count"] = int(environ["SHARD_COUNT"])
+
+        if settings["member_cache"] not in MEMBER_CACHE_MODES:
+            raise ValueError(f"MEMBER_CACHE inconnu : {settings['member_cache']} (attendu : {', '.join(MEMBER_CACHE_MODES)})")
+        return cls(**settings)
+
+    def intents(self) -> discord.Intents:
+        intents = discord.Intents.default()
+        intents.message_content = self.message_content_intent
+        intents.members = self.members_intent
+        intents.presences = self.presences_intent
+        return intents
+
+    def member_cache_flags(self) -> discord.MemberCacheFlags:
+        if self.member_cache == "all":
+            return discord.MemberCacheFlags.all()
+        flags = discord.MemberCacheFlags.none()
+        if self.member_cache == "joined":
+            flags.joined = True
+        elif self.member_cache == "voice":
+            flags.voice = True
+        return flags
+
+    def client_kwargs(self) -> dict:
+        """Arguments à transmettre au constructeur de commands.Bot / AutoShardedBot."""
+        kwargs = {
+            "intents": self.intents(),
+            "member_cache_flags": self.member_cache_flags(),
+            "chunk_guilds_at_startup": self.chunk_guilds_at_startup,
+            "max_messages": self.max_messages,
+        }
+        if self.sharded and self.shard_count:
+            kwargs["shard_count"] = self.shard_count
+        return kwargs
+
+    def describe(self) -> str:
+        shards = f", shards={self.shard_count or 'auto'}" if self.sharded else ""
+        return (
+            f"profil {self.profile} (cache membres={self.member_cache}, "
+            f"chunking={'oui' if self.chunk_guilds_at_startup else 'non'}, "
+            f"messages={self.max_messages or 0}{shards})"
+        )
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import os
+import re
+from pathlib import Path
+
+from discord.ext import commands
+
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+COGS_DIR = Path("./cogs")
+
+metrics.describe("cog_reloads_total", "Rechargements à chaud d'extensions, par extension et résultat")
+
+_SETUP = re.compile(r"^async def setup\(", re.MULTILINE)
+
+
+def discover_extensions(root: Path = COGS_DIR) -> list[str]:
+    """
+    Extensions de cogs/ (ex: cogs.R2P.ready), dans l'ordre alphabétique. Seuls les modules qui
+    définissent `setup` en sont : les modules utilitaires (game_data, mosaic...) ne passent jamais
+    par load_extension, dont l'échec retirerait le module de sys.modules et donnerait aux Cogs
+    chargés ensuite une seconde copie de son état.
+    """
+    extensions = []
+    for folder, dirs, files in os.walk(root):
+        for filename in files:
+            if not filename.endswith(".py"):
+                continue
+            path = os.path.join(folder, filename)
+            with open(path, encoding="utf-8") as f:
+                if not _SETUP.search(f.read()):
+                    continue
+            extensions.append(os.path.relpath(path, ".").replace(os.sep, ".")[:-3])
+    return sorted(extensions)
+
+
+class HotReloader:
+    """
+    Rechargement à chaud d'une extension sans redémarrer le bot.
+
+    Avant le rechargement, chaque Cog de l'extension qui définit `export_state()`
+    confie son état vivant au rechargeur. La nouvelle instance le récupère dans
+    son `cog_load` via `take_state()`, *avant* que ses écouteurs ne soient
+    branchés : aucun événement ne la voit avec un état vide.
+
+    Si le nouveau code ne se charge pas, discord.py recharge l'ancien module :
+    l'état, toujours en attente, est alors repris par l'ancienne version.
+
+    Mode surveillance (optionnel) : les fichiers de cogs/ sont scrutés et une
+    extension modifiée est rechargée automatiquement.
+    """
+    def __init__(self, bot: commands.Bot, interval: float = 2.0):
+        self.bot = bot
+        self.interval = interval
+        # Nom du Cog -> état exporté par l'instance sortante
+        self._handoff: dict[str, dict] = {}
+        # Un seul rechargement à la fois (commande /reload et surveillance)
+        self._lock = asyncio.Lock()
+        self._watch_task: asyncio.Task | None = None
+
+    def take_state(self, cog: commands.Cog) -> dict | None:
+        """État laissé par l'instance précédente de ce Cog (None au premier chargement)."""
+        return self._handoff.pop(cog.qualified_name, None)
+
+    def _cogs_of(self, extension: str) -> list[commands.Cog]:
+        return [
+            cog for cog in self.bot.cogs.values()
+            if cog.__module__ == extension or cog.__module__.startswith(extension + ".")
+        ]
+
+    async def reload(self, extension: str) -> list[str]:
+        """
+        Recharge une extension déjà chargée en transmettant l'état de ses Cogs.
+        Retourne les noms des Cogs dont l'état a été transmis.
+        Lève les erreurs de discord.py (ExtensionNotLoaded, ExtensionFailed...).
+        """
+        async with self._lock:
+            handed_over = []
+            for cog in self._cogs_of(extension):
+                export_state = getattr(cog, "export_state", None)
+                if export_state is not None:
+                    self._handoff[cog.qualified_name] = export_state()
+                    handed_over.append(cog.qualified_name)
+
+            try:
+                await self.bot.reload_extension(extension)
+            except Exception:
+                metrics.counter("cog_reloads_total", extension=extension, result="error").inc()
+                raise
+            finally:
+                # Un état non repris (Cog renommé, ancienne version sans take_state) est abandonné
+                for name in handed_over:
+                    if self._handoff.pop(name, None) is not None:
+                        logger.warning("Rechargement de %s : l'état de %s n'a pas été repris", extension, name)
+
+            metrics.counter("cog_reloads_total", extension=extension, result="ok").inc()
+            return handed_over
+
+    # --- SURVEILLANCE DE cogs/ ---
+
+    def start_watching(self):
+        if self._watch_task is None:
+            self._watch_task = asyncio.get_running_loop().create_task(self._watch())
+
+    def stop(self):
+        if self._watch_task:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    @staticmethod
+    def _scan() -> dict[str, float]:
+        """Date de modification de chaque module de cogs/, indexée par nom d'extension."""
+        mtimes = {}
+        for root, dirs, files in os.walk(COGS_DIR):
+            for filename in files:
+                if filename.endswith(".py"):
+                    path = os.path.join(root, filename)
+                    extension = os.path.relpath(path, ".").replace(os.sep, ".")[:-3]
+                    try:
+                        mtimes[extension] = os.stat(path).st_mtime
+                    except FileNotFoundError:
+                        continue
+        return mtimes
+
+    async def _watch(self):
+        known = await asyncio.to_thread(self._scan)
+        while True:
+            await asyncio.sleep(self.interval)
+            current = await asyncio.to_thread(self._scan)
+            changed = [ext for ext, mtime in current.items() if known.get(ext) not in (None, mtime)]
+            known = current
+
+            for extension in changed:
+                if extension not in self.bot.extensions:
+                    # Module utilitaire (ex: game_data) : son état est partagé, un redémarrage est nécessaire
+                    logger.info("%s modifié, mais ce n'est pas une extension chargée : ignoré", extension)
+                    continue
+                try:
+                    handed_over = await self.reload(extension)
+                    await self.bot.sync_tree_if_changed()
+                    logger.info("%s rechargé (état transmis : %s)", extension, ", ".join(handed_over) or "aucun")
+                except Exception as e:
+                    logger.exception("Rechargement de %s impossible : %s", extension, e)
@@ -0,0 +1,256 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from core import codec
+from core.metrics import metrics
+
+if TYPE_CHECKING:
+    # aiohttp n'est importé qu'à la première requête (démarrage plus rapide)
+    import aiohttp
+
+
+# - - - Réglages par hôte - - - #
+
+@dataclass(frozen=True)
+class HostPolicy:
+    """Réglages réseau appliqués à toutes les requêtes vers un même hôte."""
+    # Nombre maximum de connexions simultanées vers l'hôte (taille du pool)
+    max_connections: int = 4
+    # Délais (en secondes) : établissement de la connexion et requête complète
+    connect_timeout: float = 3.0
+    total_timeout: float = 10.0
+    # Nouvelles tentatives après la première requête
+    retries: int = 2
+    # Backoff exponentiel : base * 2^tentative, plafonné à backoff_max
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    # Disjoncteur : nombre d'échecs consécutifs avant ouverture, puis durée de pause
+    breaker_threshold: int = 5
+    breaker_cooldown: float = 30.0
+
+
+DEFAULT_POLICY = HostPolicy()
+
+# Chaque hôte a son propre pool : un SteamGridDB lent ne bloque pas les avatars Discord
+HOST_POLICIES: dict[str, HostPolicy] = {
+    "cdn.discordapp.com": HostPolicy(max_connections=8, total_timeout=5.0),
+    "media.discordapp.net": HostPolicy(max_connections=8, total_timeout=5.0),
+    "www.steamgriddb.com": HostPolicy(max_connections=4, total_timeout=8.0, retries=3),
+    "cdn2.steamgriddb.com": HostPolicy(max_connections=6, total_timeout=10.0),
+}
+
+# Codes HTTP pour lesquels une nouvelle tentative a du sens
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+# - - - Erreurs - - - #
+
+class HttpError(Exception):
+    """Échec réseau définitif (toutes les tentatives ont échoué)."""
+
+
+class CircuitOpenError(HttpError):
+    """L'hôte est en panne : la requête est refusée sans être envoyée."""
+
+
+# - - - Réponse - - - #
+
+@dataclass
+class HttpResponse:
+    """Réponse entièrement lue : elle reste utilisable une fois la connexion rendue au pool."""
+    status: int
+    headers: dict[str, str]
+    body: bytes = field(repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def json(self):
+        return codec.loads(self.body)
+
+
+# - - - Disjoncteur - - - #
+
+class CircuitBreaker:
+    """
+    Disjoncteur classique à trois états :
+    - fermé : les requêtes passent
+    - ouvert : les requêtes sont refusées pendant `cooldown` secondes
+    - semi-ouvert : une seule requête test passe, son résultat décide de la suite
+    """
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool | str:
+        """True si la requête passe, "probe" si elle est la requête test (à libérer si elle n'aboutit pas), False sinon."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probing:
+            self._probing = True
+            return "probe"
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        """Requête test terminée sans verdict (annulée, erreur inattendue) : la suivante pourra tester à son tour."""
+        self._probing = False
+
+
+# - - - Client - - - #
+
+class HttpClient:
+    """
+    Client HTTP partagé par tout le bot (avatars du CDN Discord, SteamGridDB...).
+    Chaque hôte dispose de son pool de connexions, de ses délais, de ses
+    nouvelles tentatives avec backoff + jitter et de son disjoncteur.
+    """
+    def __init__(self, policies: dict[str, HostPolicy] | None = None):
+        self.policies = HOST_POLICIES if policies is None else policies
+        self._sessions: dict[str, "aiohttp.ClientSession"] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _policy(self, host: str) -> HostPolicy:
+        return self.policies.get(host, DEFAULT_POLICY)
+
+    def _session(self, host: str) -> "aiohttp.ClientSession":
+        """Crée à la demande la session (et donc le pool) dédiée à un hôte."""
+        import aiohttp
+
+        session = self._sessions.get(host)
+        if session is None or session.closed:
+            policy = self._policy(host)
+            connector = aiohttp.TCPConnector(limit=policy.max_connections, limit_per_host=policy.max_connections)
+            timeout = aiohttp.ClientTimeout(total=policy.total_timeout, connect=policy.connect_timeout)
+            session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._sessions[host] = session
+        return session
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self._breakers:
+            policy = self._policy(host)
+            self._breakers[host] = CircuitBreaker(policy.breaker_threshold, policy.breaker_cooldown)
+        return self._breakers[host]
+
+    @staticmethod
+    def _backoff(policy: HostPolicy, attempt: int) -> float:
+        """Backoff exponentiel avec « full jitter » pour éviter les rafales synchronisées."""
+        cap = min(policy.backoff_max, policy.backoff_base * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    @staticmethod
+    def _retry_after(headers: dict[str, str]) -> float | None:
+        """Lit l'en-tête Retry-After (en secondes) s'il est présent."""
+        value = headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+
+    async def request(self, method: str, url: str, **kwargs) -> HttpResponse:
+        """
+        Envoie une requête avec la politique de l'hôte ciblé.
+        Retourne la réponse finale (même si son code n'est pas 2xx).
+        Lève CircuitOpenError si l'hôte est coupé, HttpError si le réseau a échoué à chaque tentative.
+        """
+        if self._closed:
+            raise HttpError("Le client HTTP est fermé.")
+
+        import aiohttp
+
+        host = urlsplit(url).hostname or ""
+        policy = self._policy(host)
+        breaker = self.breaker(host)
+        last_error: Exception | None = None
+
+        for attempt in range(policy.retries + 1):
+            allowed = breaker.allow()
+            if not allowed:
+                metrics.counter("http_rejected_total", host=host).inc()
+                raise CircuitOpenError(f"Disjoncteur ouvert pour {host}")
+            if attempt:
+                metrics.counter("http_retries_total", host=host).inc()
+
+            try:
+                with metrics.timer("http_request_seconds", host=host):
+                    async with self._session(host).request(method, url, **kwargs) as resp:
+                        response = HttpResponse(resp.status, dict(resp.headers), await resp.read())
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                metrics.counter("http_requests_total", host=host, status="error").inc()
+                breaker.record_failure()
+                last_error = e
+                delay = self._backoff(policy, attempt)
+            except BaseException:
+                # Annulation (wait_for, déchargement d'un Cog...) de la requête test : sans ça, l'hôte resterait coupé pour de bon.
+                # Une requête partie disjoncteur fermé ne libère rien : la requête test en cours est peut-être une autre.
+                if allowed == "probe":
+                    breaker.release_probe()
+                raise
+            else:
+                metrics.counter("http_requests_total", host=host, status=response.status).inc()
+                if response.status >= 500:
+                    breaker.record_failure()
+                else:
+                    # Un 429 n'est pas une panne : l'hôte répond, il nous demande juste de ralentir
+                    breaker.record_success()
+
+                if response.status not in RETRY_STATUSES or attempt == policy.retries:
+                    return response
+
+                delay = self._retry_after(response.headers)
+                if delay is None:
+                    delay = self._backoff(policy, attempt)
+                elif delay > policy.backoff_max:
+                    # Attendre plus longtemps bloquerait l'appelant : on rend la main
+                    return response
+
+            if attempt < policy.retries:
+                await asyncio.sleep(delay)
+
+        raise HttpError(f"{method} {url} : échec après {policy.retries + 1} tentative(s)") from last_error
+
+    async def get(self, url: str, **kwargs) -> HttpResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def close(self):
+        """Ferme toutes les sessions (à appeler à l'arrêt du bot)."""
+        self._closed = True
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for session in sessions:
+            if not session.closed:
+                await session.close()
@@ -0,0 +1,74 @@
+import functools
+import logging
+import time
+
+import discord
+from discord import app_commands
+
+from core.logs import bind_context
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+metrics.describe("app_command_seconds", "Durée d'exécution des commandes slash")
+metrics.describe("app_command_errors_total", "Commandes slash terminées en erreur")
+metrics.describe("listener_seconds", "Durée d'exécution des écouteurs d'événements")
+metrics.describe("listener_errors_total", "Écouteurs d'événements terminés en erreur")
+
+
+class InstrumentedTree(app_commands.CommandTree):
+    """
+    Arbre de commandes qui chronomètre chaque commande slash.
+    Le départ est pris dans interaction_check, la fin dans LeBotaFG.on_app_command_completion
+    (ou dans on_error si la commande échoue).
+    interaction_check renseigne aussi le contexte de journalisation (serveur, utilisateur,
+    commande) de la tâche qui exécute la commande.
+    """
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["started_at"] = time.perf_counter()
+        bind_context(
+            guild=interaction.guild_id,
+            user=interaction.user.id,
+            command=interaction.command.qualified_name if interaction.command else None,
+        )
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        command_name = interaction.command.qualified_name if interaction.command else "inconnue"
+        record_command(interaction, command_name, error=True)
+
+        if isinstance(error, app_commands.CheckFailure):
+            if not interaction.response.is_done():
+                await interaction.response.send_message("⛔ Tu n'as pas le droit d'utiliser cette commande.", ephemeral=True)
+            return
+
+        await super().on_error(interaction, error)
+
+
+def record_command(interaction: discord.Interaction, command_name: str, error: bool = False):
+    """Enregistre la durée d'une commande à partir du départ noté dans interaction_check."""
+    started_at = interaction.extras.get("started_at")
+    if started_at is not None:
+        duration = time.perf_counter() - started_at
+        metrics.histogram("app_command_seconds", command=command_name).observe(duration)
+        logger.debug("Commande %s terminée%s", command_name, " en erreur" if error else "",
+                     extra={"command": command_name, "duration_ms": round(duration * 1000, 1)})
+    if error:
+        metrics.counter("app_command_errors_total", command=command_name).inc()
+
+
+def instrument_listener(func, event_name: str):
+    """Enveloppe un écouteur (on_message, on_presence_update...) pour mesurer sa durée."""
+    owner = getattr(func, "__self__", None)
+    cog_name = type(owner).__name__ if owner is not None else func.__module__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            with metrics.timer("listener_seconds", cog=cog_name, event=event_name):
+                return await func(*args, **kwargs)
+        except Exception:
+            metrics.counter("listener_errors_total", cog=cog_name, event=event_name).inc()
+            raise
+
+    return wrapper
@@ -0,0 +1,194 @@
+"""
+Journalisation du bot.
+
+Les modules écrivent via `logging.getLogger(__name__)` ; les enregistrements passent par
+une file (QueueHandler) et sont formatés puis écrits par un thread dédié (QueueListener) :
+la boucle asyncio n'attend jamais la sortie standard ni le disque.
+
+Chaque ligne est un objet JSON :
+    {"ts": "2025-01-01T20:00:00.123+00:00", "level": "INFO", "logger": "cogs.R2P.ready",
+     "msg": "...", "guild": 1234, "user": 5678, "command": "ready", "duration_ms": 12.3}
+Les champs guild / user / command viennent du contexte de l'interaction en cours
+(voir log_context), duration_ms est renseigné à la fin d'une commande slash.
+
+Réglages (.env) :
+    LOG_LEVEL       niveau global (INFO par défaut)
+    LOG_LEVELS      niveaux par module, ex: « cogs.R2P.ready=DEBUG,discord.gateway=WARNING »
+    LOG_FORMAT      json (par défaut) ou text (lisible dans un terminal)
+    LOG_FILE        fichier de sortie (sortie d'erreur par défaut)
+    LOG_RATE_LIMIT  messages identiques tolérés par fenêtre, ex: « 5/60 » (0 pour désactiver)
+"""
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Mapping
+
+from core import codec
+from core.metrics import metrics
+
+metrics.describe("log_records_suppressed_total", "Messages de journal identiques écartés par la limitation de débit")
+
+# Champs structurés reconnus (passés via `extra=` ou le contexte courant)
+CONTEXT_FIELDS = ("guild", "user", "command", "duration_ms")
+
+_context: ContextVar[dict] = ContextVar("log_context", default={})
+
+
+def bind_context(**fields):
+    """Ajoute des champs au contexte de la tâche courante (et des tâches qu'elle lance)."""
+    return _context.set({**_context.get(), **fields})
+
+
+@contextmanager
+def log_context(**fields):
+    token = bind_context(**fields)
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Recopie le contexte courant sur l'enregistrement, dans le thread qui journalise."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Laisse passer au plus `burst` messages identiques (même module, niveau et gabarit)
+    par fenêtre de `period` secondes. Le premier message de la fenêtre suivante indique
+    combien ont été écartés (champ `suppressed`). Les erreurs critiques passent toujours.
+    """
+    MAX_KEYS = 1000
+
+    def __init__(self, burst: int = 5, period: float = 60.0):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        # (module, niveau, gabarit) -> [début de fenêtre, messages émis, messages écartés]
+        self._windows: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.CRITICAL:
+            return True
+        now = time.monotonic()
+        key = (record.name, record.levelno, str(record.msg))
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                if window is not None and window[2]:
+                    record.suppressed = window[2]
+                elif window is None and len(self._windows) >= self.MAX_KEYS:
+                    self._purge(now)
+                self._windows[key] = [now, 1, 0]
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+        metrics.counter("log_records_suppressed_total", logger=record.name).inc()
+        return False
+
+    def _purge(self, now: float):
+        for key in [k for k, w in self._windows.items() if now - w[0] >= self.period]:
+            del self._windows[key]
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON compacte par enregistrement."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in (*CONTEXT_FIELDS, "suppressed"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return codec.dumps(entry, default=str).decode("utf-8")
+
+
+class TextFormatter(logging.Formatter):
+    """Format lisible pour le développement, avec les champs structurés en fin de ligne."""
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s : %(message)s", datefmt="%H:%M:%S")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = [f"{key}={getattr(record, key)}" for key in (*CONTEXT_FIELDS, "suppressed") if getattr(record, key, None) is not None]
+        return f"{line}  [{' '.join(fields)}]" if fields else line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui garde les champs structurés mais laisse le formatage au thread d'écriture."""
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Le message est figé ici (les arguments peuvent changer après l'appel), la pile d'erreur aussi
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_levels(spec: str) -> dict[str, int]:
+    """« cogs.R2P.ready=DEBUG,discord=WARNING » -> {"cogs.R2P.ready": 10, "discord": 30}"""
+    levels = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, level = item.partition("=")
+        value = logging.getLevelName(level.strip().upper())
+        if not isinstance(value, int):
+            raise ValueError(f"LOG_LEVELS : niveau inconnu pour {name.strip()} : {level.strip()}")
+        levels[name.strip()] = value
+    return levels
+
+
+def setup_logging(environ: Mapping[str, str] = os.environ) -> logging.handlers.QueueListener:
+    """
+    Installe la file de journalisation sur le logger racine et démarre le thread d'écriture.
+    Retourne le QueueListener, à arrêter à la fin du programme (il vide la file).
+    """
+    if environ.get("LOG_FILE"):
+        output = logging.FileHandler(environ["LOG_FILE"], encoding="utf-8")
+    else:
+        output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(TextFormatter() if environ.get("LOG_FORMAT", "json") == "text" else JsonFormatter())
+
+    handler = _QueueHandler(queue.SimpleQueue())
+    handler.addFilter(ContextFilter())
+    burst, _, period = environ.get("LOG_RATE_LIMIT", "5/60").partition("/")
+    if int(burst) > 0:
+        handler.addFilter(RateLimitFilter(int(burst), float(period or 60)))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(environ.get("LOG_LEVEL", "INFO").upper())
+    for name, level in parse_levels(environ.get("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level)
+
+    listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    listener.start()
+    return listener
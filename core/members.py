@@ -0,0 +1,51 @@
+import asyncio
+from typing import Iterable
+
+import discord
+
+from core.metrics import metrics
+
+metrics.describe("member_lazy_fetch_total", "Membres absents du cache récupérés à la demande via la gateway")
+
+# Limite Discord du nombre d'identifiants par requête « Request Guild Members »
+QUERY_BATCH = 100
+
+
+async def resolve_members(guild: discord.Guild, user_ids: Iterable[int], presences: bool = False) -> dict[int, discord.Member]:
+    """
+    Retrouve des membres : d'abord dans le cache, puis via la gateway pour les absents
+    (100 par requête, pas d'appel REST). Les membres récupérés sont ajoutés au cache,
+    si bien qu'ils reçoivent ensuite les mises à jour de présence.
+
+    `presences=True` récupère aussi leur statut (nécessite l'intent presences).
+    Les membres introuvables (partis du serveur, délai dépassé) sont absents du résultat :
+    voir lookup_members pour distinguer les deux.
+    """
+    found, _ = await lookup_members(guild, user_ids, presences)
+    return found
+
+
+async def lookup_members(guild: discord.Guild, user_ids: Iterable[int], presences: bool = False) -> tuple[dict[int, discord.Member], set[int]]:
+    """
+    Comme resolve_members, mais retourne aussi les identifiants non vérifiés : ceux d'une
+    requête dont le délai a expiré. Un identifiant absent des deux n'est plus sur le serveur.
+    """
+    found: dict[int, discord.Member] = {}
+    missing = []
+    unresolved: set[int] = set()
+    for user_id in user_ids:
+        member = guild.get_member(user_id)
+        if member is None:
+            missing.append(user_id)
+        else:
+            found[user_id] = member
+
+    for i in range(0, len(missing), QUERY_BATCH):
+        batch = missing[i:i + QUERY_BATCH]
+        metrics.counter("member_lazy_fetch_total").inc(len(batch))
+        try:
+            for member in await guild.query_members(user_ids=batch, limit=len(batch), presences=presences, cache=True):
+                found[member.id] = member
+        except asyncio.TimeoutError:
+            unresolved.update(batch)
+    return found, unresolved
@@ -0,0 +1,182 @@
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# - - - Types de métriques - - - #
+
+# Bornes (en secondes) des histogrammes de latence, au format Prometheus
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    """Compteur qui ne fait qu'augmenter (nombre d'appels, d'erreurs...)."""
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Gauge:
+    """Valeur instantanée qui peut monter et descendre (taille d'un cache, d'une file...)."""
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+
+class Histogram:
+    """
+    Distribution de durées.
+    Les seaux cumulés servent à l'export Prometheus, la fenêtre des dernières
+    mesures sert au calcul des percentiles affichés par /stats.
+    """
+    kind = "histogram"
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS, window: int = 2048):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.recent: deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def percentile(self, p: float) -> float:
+        """Percentile (0-100) calculé sur la fenêtre des dernières mesures."""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+# - - - Registre - - - #
+
+class MetricsRegistry:
+    """
+    Registre en mémoire de toutes les métriques du bot.
+    Une métrique est identifiée par son nom et ses étiquettes (ex: command="ready").
+    """
+    def __init__(self, prefix: str = "lebotafg"):
+        self.prefix = prefix
+        self._metrics: dict[tuple[str, tuple], Counter | Gauge | Histogram] = {}
+        self._help: dict[str, str] = {}
+        # Certaines métriques peuvent être publiées depuis un autre thread
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, labels: dict):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(key, cls())
+        return metric
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._get(Counter, name, labels)
+
+    def gauge(self, name: str, **labels) -> Gauge:
+        return self._get(Gauge, name, labels)
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        return self._get(Histogram, name, labels)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Mesure la durée du bloc `with` (fonctionne aussi autour d'un `await`)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name, **labels).observe(time.perf_counter() - start)
+
+    def collect(self, name: str) -> list[tuple[dict, Counter | Gauge | Histogram]]:
+        """Toutes les séries d'une métrique : [(étiquettes, métrique), ...]."""
+        with self._lock:
+            items = list(self._metrics.items())
+        return [(dict(labels), metric) for (metric_name, labels), metric in items if metric_name == name]
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return sorted({name for name, _ in self._metrics})
+
+    # - - - Export - - - #
+
+    @staticmethod
+    def _format_labels(labels: dict, extra: dict | None = None) -> str:
+        merged = {**labels, **(extra or {})}
+        if not merged:
+            return ""
+        escaped = ",".join(
+            f'{k}="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ") + '"'
+            for k, v in merged.items()
+        )
+        return "{" + escaped + "}"
+
+    def render_prometheus(self) -> str:
+        """Exporte le registre au format texte de Prometheus."""
+        lines = []
+        for name in self.names():
+            series = self.collect(name)
+            full_name = f"{self.prefix}_{name}"
+            if name in self._help:
+                lines.append(f"# HELP {full_name} {self._help[name]}")
+            lines.append(f"# TYPE {full_name} {series[0][1].kind}")
+            for labels, metric in series:
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets, metric.bucket_counts):
+                        cumulative += count
+                        lines.append(f"{full_name}_bucket{self._format_labels(labels, {'le': bound})} {cumulative}")
+                    lines.append(f"{full_name}_bucket{self._format_labels(labels, {'le': '+Inf'})} {metric.count}")
+                    lines.append(f"{full_name}_sum{self._format_labels(labels)} {metric.sum}")
+                    lines.append(f"{full_name}_count{self._format_labels(labels)} {metric.count}")
+                else:
+                    lines.append(f"{full_name}{self._format_labels(labels)} {metric.value}")
+        return "\n".join(lines) + "\n"
+
+
+# Registre global partagé par tout le bot (comme les dictionnaires de game_data)
+metrics = MetricsRegistry()
+
+
+# - - - Endpoint Prometheus (optionnel) - - - #
+
+async def start_prometheus_server(registry: MetricsRegistry, port: int, host: str = "127.0.0.1"):
+    """
+    Démarre un petit serveur HTTP local qui expose /metrics.
+    Retourne le runner aiohttp, à arrêter avec `await runner.cleanup()`.
+    """
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(text=registry.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,289 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable
+
+from core.metrics import metrics
+
+metrics.describe("outbound_queue_depth", "Appels REST sortants en attente, par priorité")
+metrics.describe("outbound_in_flight", "Appels REST sortants en cours")
+metrics.describe("outbound_requests_total", "Appels REST sortants par priorité, type de seau et résultat (sent, error, cancelled, expired, shed)")
+metrics.describe("outbound_wait_seconds", "Attente dans la file sortante avant l'envoi, par priorité")
+
+
+class Priority(IntEnum):
+    """Classes de priorité (la plus petite valeur passe en premier)."""
+    INTERACTION = 0     # réponse directe à une commande (ex: message chuchoté)
+    ANNOUNCEMENT = 1    # annonce LFG, anniversaires
+    ROLE_SYNC = 2       # rôles et pseudos à remettre en ordre
+    FUN = 3             # blagues, réactions : sans intérêt si elles arrivent en retard
+
+
+# Durée de vie par défaut d'une demande : au-delà, elle est abandonnée sans être envoyée
+DEFAULT_TTL: dict[Priority, float | None] = {
+    Priority.INTERACTION: None,
+    Priority.ANNOUNCEMENT: None,
+    Priority.ROLE_SYNC: None,
+    Priority.FUN: 30.0,
+}
+
+
+# - - - Seaux de rate-limit - - - #
+
+@dataclass(frozen=True)
+class BucketPolicy:
+    """Débit autorisé pour un seau : `rate` appels par fenêtre de `per` secondes."""
+    rate: int = 5
+    per: float = 5.0
+
+
+DEFAULT_BUCKET_POLICY = BucketPolicy()
+
+# Le type de seau est le préfixe du nom (« messages:1234 » -> « messages »),
+# calqué sur les limites publiées par Discord pour chaque route
+BUCKET_POLICIES: dict[str, BucketPolicy] = {
+    "messages": BucketPolicy(rate=5, per=5.0),      # envoi / modification dans un salon
+    "delete": BucketPolicy(rate=5, per=1.0),        # suppression de message dans un salon
+    "reactions": BucketPolicy(rate=1, per=0.25),    # ajout de réaction dans un salon
+    "roles": BucketPolicy(rate=10, per=10.0),       # ajout / retrait de rôle sur un serveur
+    "members": BucketPolicy(rate=10, per=10.0),     # modification de membre (pseudo) sur un serveur
+}
+
+
+class Bucket:
+    """Seau à jetons non bloquant, avec ses compteurs (pour /stats)."""
+    def __init__(self, name: str, policy: BucketPolicy):
+        self.name = name
+        self.kind = name.split(":", 1)[0]
+        self.policy = policy
+        self._tokens = float(policy.rate)
+        self._updated_at = time.monotonic()
+        self.sent = 0
+        self.dropped = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.policy.rate, self._tokens + (now - self._updated_at) * self.policy.rate / self.policy.per)
+        self._updated_at = now
+
+    def delay(self, now: float) -> float:
+        """Secondes avant qu'un jeton soit disponible (0 s'il y en a un)."""
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) * self.policy.per / self.policy.rate
+
+    def take(self):
+        self._tokens -= 1
+        self.sent += 1
+
+
+# - - - Demandes - - - #
+
+class OutboundDropped(Exception):
+    """La demande n'a pas été envoyée : périmée, ou écartée parce que la file était pleine."""
+
+
+@dataclass(eq=False)
+class Job:
+    priority: Priority
+    bucket: str
+    func: Callable[[], Awaitable[Any]]
+    deadline: float | None
+    future: asyncio.Future
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class OutboundScheduler:
+    """
+    File unique pour les appels REST sortants de tout le bot (bot.outbound).
+
+    - Les demandes passent par ordre de priorité, puis d'arrivée.
+    - Chaque seau (route + salon ou serveur, ex: « messages:1234 ») a son propre débit :
+      une rafale sur un salon ne retarde pas les demandes des autres seaux.
+    - Une demande dont la durée de vie est dépassée est abandonnée sans être envoyée.
+    - Quand la file est pleine, la demande la plus ancienne de la priorité la plus basse
+      est écartée (ou la nouvelle, si c'est elle la moins prioritaire).
+    - L'appelant attend le résultat : les erreurs de discord.py (Forbidden...) lui reviennent
+      telles quelles, une demande abandonnée lève OutboundDropped.
+
+    Utilisation :
+        await bot.outbound.run(Priority.FUN, f"reactions:{channel.id}", lambda: message.add_reaction("👋"))
+    """
+    def __init__(self, max_queue: int = 500, max_in_flight: int = 8, policies: dict[str, BucketPolicy] | None = None):
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight
+        self.policies = BUCKET_POLICIES if policies is None else policies
+        self._queues: dict[Priority, deque[Job]] = {priority: deque() for priority in Priority}
+        self._buckets: dict[str, Bucket] = {}
+        self._in_flight = 0
+        self._wakeup = asyncio.Event()
+        self._dispatcher: asyncio.Task | None = None
+        # asyncio ne garde qu'une référence faible aux tâches : on tient celles des appels en cours
+        self._tasks: set[asyncio.Task] = set()
+        self._closed = False
+
+    # - - - Côté appelant - - - #
+
+    async def run(self, priority: Priority, bucket: str, func: Callable[[], Awaitable[Any]], ttl: float | None = ...) -> Any:
+        """
+        Met l'appel `func()` en file et attend son résultat.
+        `ttl` : durée de vie en secondes (par défaut celle de la priorité, None = illimitée).
+        """
+        if self._closed:
+            raise OutboundDropped("La file sortante est fermée.")
+        if ttl is ...:
+            ttl = DEFAULT_TTL[priority]
+
+        loop = asyncio.get_running_loop()
+        job = Job(priority, bucket, func, time.monotonic() + ttl if ttl is not None else None, loop.create_future())
+        if self.depth >= self.max_queue and not self._shed_for(job):
+            self._drop(job, "shed")
+            return await job.future
+
+        self._queues[priority].append(job)
+        self._update_depth(priority)
+        self._ensure_dispatcher()
+        self._wakeup.set()
+        return await job.future
+
+    @property
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def bucket_stats(self) -> list[Bucket]:
+        """Seaux les plus sollicités d'abord."""
+        return sorted(self._buckets.values(), key=lambda b: b.sent + b.dropped, reverse=True)
+
+    # - - - Côté répartiteur - - - #
+
+    def _bucket(self, name: str) -> Bucket:
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            policy = self.policies.get(name.split(":", 1)[0], DEFAULT_BUCKET_POLICY)
+            bucket = self._buckets[name] = Bucket(name, policy)
+        return bucket
+
+    def _update_depth(self, priority: Priority):
+        metrics.gauge("outbound_queue_depth", priority=priority.name.lower()).set(len(self._queues[priority]))
+
+    def _drop(self, job: Job, reason: str):
+        self._bucket(job.bucket).dropped += 1
+        metrics.counter("outbound_requests_total", priority=job.priority.name.lower(),
+                        bucket=job.bucket.split(":", 1)[0], result=reason).inc()
+        if not job.future.done():
+            job.future.set_exception(OutboundDropped(f"{job.bucket} : demande abandonnée ({reason})"))
+
+    def _shed_for(self, job: Job) -> bool:
+        """File pleine : écarte la plus ancienne demande moins prioritaire que `job`. Retourne False s'il n'y en a pas."""
+        for priority in reversed(Priority):
+            if priority <= job.priority:
+                return False
+            queue = self._queues[priority]
+            if queue:
+                self._drop(queue.popleft(), "shed")
+                self._update_depth(priority)
+                return True
+        return False
+
+    def _next_job(self) -> tuple[Job | None, float | None]:
+        """
+        Première demande prête : par priorité, puis par ordre d'arrivée, dont le seau a un jeton.
+        Sinon, retourne le délai avant le prochain jeton utile (None si la file est vide).
+        """
+        now = time.monotonic()
+        wait = None
+        for priority, queue in self._queues.items():
+            blocked: set[str] = set()
+            i = 0
+            while i < len(queue):
+                job = queue[i]
+                if job.deadline is not None and now >= job.deadline:
+                    del queue[i]
+                    self._update_depth(priority)
+                    self._drop(job, "expired")
+                    continue
+                if job.future.cancelled():
+                    # L'appelant a abandonné (ex: Cog déchargé)
+                    del queue[i]
+                    self._update_depth(priority)
+                    continue
+                if job.bucket not in blocked:
+                    bucket = self._bucket(job.bucket)
+                    delay = bucket.delay(now)
+                    if delay == 0:
+                        del queue[i]
+                        self._update_depth(priority)
+                        bucket.take()
+                        return job, None
+                    # Les demandes suivantes du même seau attendent leur tour (ordre d'arrivée)
+                    blocked.add(job.bucket)
+                    wait = delay if wait is None else min(wait, delay)
+                i += 1
+        return None, wait
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def _dispatch(self):
+        while True:
+            job, wait = self._next_job() if self._in_flight < self.max_in_flight else (None, None)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._in_flight += 1
+            metrics.gauge("outbound_in_flight").set(self._in_flight)
+            task = asyncio.get_running_loop().create_task(self._execute(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, job: Job):
+        priority = job.priority.name.lower()
+        metrics.histogram("outbound_wait_seconds", priority=priority).observe(time.monotonic() - job.queued_at)
+        result = "sent"
+        try:
+            if job.future.cancelled():
+                # L'appelant a abandonné entre la sortie de file et l'envoi : rien à envoyer
+                result = "cancelled"
+                return
+            value = await job.func()
+        except asyncio.CancelledError:
+            # Tâche annulée (arrêt du bot...) : l'appelant ne doit pas attendre indéfiniment
+            result = "cancelled"
+            job.future.cancel()
+            raise
+        except Exception as e:
+            result = "error"
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(value)
+        finally:
+            metrics.counter("outbound_requests_total", priority=priority, bucket=job.bucket.split(":", 1)[0], result=result).inc()
+            self._in_flight -= 1
+            metrics.gauge("outbound_in_flight").set(self._in_flight)
+            # Une place s'est libérée
+            self._wakeup.set()
+
+    async def close(self):
+        """Abandonne les demandes en attente, annule celles en cours et arrête le répartiteur (à l'arrêt du bot)."""
+        self._closed = True
+        if self._dispatcher:
+            self._dispatcher.cancel()
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for priority, queue in self._queues.items():
+            while queue:
+                self._drop(queue.popleft(), "shed")
+            self._update_depth(priority)
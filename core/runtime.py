@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Mapping
+
+from core import codec
+
+logger = logging.getLogger(__name__)
+
+# Profils d'exécution : "default" reproduit le comportement historique (boucle asyncio,
+# module json, fichiers indentés), "fast" installe uvloop et orjson (sortie compacte).
+# Une dépendance absente n'empêche pas le démarrage : on retombe sur la bibliothèque standard.
+PROFILES: dict[str, dict] = {
+    "default": {"event_loop": "asyncio", "codec": "json"},
+    "fast": {"event_loop": "uvloop", "codec": "orjson"},
+}
+
+EVENT_LOOPS = ("asyncio", "uvloop")
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    """
+    Boucle d'événements et codec JSON du processus.
+
+    - event_loop : asyncio (standard) ou uvloop (si installé, hors Windows)
+    - codec      : nom d'un codec de core.codec (json, orjson)
+    """
+    profile: str = "default"
+    event_loop: str = "asyncio"
+    codec: str = "json"
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "RuntimeConfig":
+        """RUNTIME_PROFILE (default|fast), puis surcharges individuelles EVENT_LOOP et JSON_CODEC."""
+        return cls.from_profile(environ.get("RUNTIME_PROFILE", "default"), environ)
+
+    @classmethod
+    def from_profile(cls, profile: str, environ: Mapping[str, str] | None = None) -> "RuntimeConfig":
+        if profile not in PROFILES:
+            raise ValueError(f"RUNTIME_PROFILE inconnu : {profile} (attendu : {', '.join(PROFILES)})")
+        settings = dict(PROFILES[profile], profile=profile)
+        environ = environ or {}
+        if environ.get("EVENT_LOOP"):
+            settings["event_loop"] = environ["EVENT_LOOP"]
+        if environ.get("JSON_CODEC"):
+            settings["codec"] = environ["JSON_CODEC"]
+
+        if settings["event_loop"] not in EVENT_LOOPS:
+            raise ValueError(f"EVENT_LOOP inconnu : {settings['event_loop']} (attendu : {', '.join(EVENT_LOOPS)})")
+        if settings["codec"] not in codec.CODECS:
+            raise ValueError(f"JSON_CODEC inconnu : {settings['codec']} (attendu : {', '.join(codec.CODECS)})")
+        return cls(**settings)
+
+    def apply(self) -> str:
+        """
+        Installe la boucle et le codec demandés (avant la création de la boucle, donc avant bot.run).
+        Retourne la description de ce qui est réellement actif.
+        """
+        loop = "asyncio"
+        if self.event_loop == "uvloop":
+            try:
+                import uvloop
+            except ImportError:
+                logger.warning("uvloop n'est pas installé : boucle asyncio standard")
+            else:
+                asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+                loop = "uvloop"
+        if loop == "asyncio":
+            asyncio.set_event_loop_policy(None)
+
+        active_codec = codec.use_codec(self.codec)
+        if active_codec != self.codec:
+            logger.warning("%s n'est pas installé : codec JSON standard", self.codec)
+        return f"profil {self.profile} (boucle={loop}, codec={active_codec})"
@@ -0,0 +1,253 @@
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from core import codec
+from core.bounded_log import BoundedLog
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Attente maximale entre deux tentatives quand les commits échouent à répétition
+MAX_RETRY_DELAY = 60.0
+
+
+class Namespace(ABC):
+    """Un fichier JSON géré par le service de stockage."""
+    def __init__(self, storage: "Storage", name: str, path: Path, indent: int | None):
+        self.storage = storage
+        self.name = name
+        self.path = path
+        self.indent = indent
+
+    def mark_dirty(self):
+        """Signale une modification : le fichier sera réécrit au prochain commit."""
+        self.storage._mark_dirty(self)
+
+    @abstractmethod
+    def _snapshot(self) -> Any:
+        """Copie des données prête à sérialiser (prise sur la boucle, écrite par le thread)."""
+
+
+class KeyValueStore(Namespace, MutableMapping):
+    """
+    Dictionnaire persistant : toute affectation ou suppression programme l'écriture.
+    Les valeurs sont traitées comme immuables : pour modifier une valeur composée,
+    on la réaffecte (`store[cle] = valeur`) plutôt que de la modifier sur place.
+    """
+    def __init__(self, storage: "Storage", name: str, path: Path, indent: int | None, data: dict):
+        super().__init__(storage, name, path, indent)
+        self._data = data
+
+    def __getitem__(self, key: str):
+        return self._data[key]
+
+    def __setitem__(self, key: str, value):
+        self._data[key] = value
+        self.mark_dirty()
+
+    def __delitem__(self, key: str):
+        del self._data[key]
+        self.mark_dirty()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def _snapshot(self) -> dict:
+        return dict(self._data)
+
+
+class DocumentCollection(KeyValueStore):
+    """Collection de documents (dictionnaires) indexés par identifiant."""
+
+    def patch(self, doc_id: str, **fields) -> dict:
+        """Remplace le document par une copie modifiée (les lecteurs en cours gardent l'ancienne)."""
+        document = {**self._data[doc_id], **fields}
+        self[doc_id] = document
+        return document
+
+    def find(self, predicate: Callable[[dict], bool]) -> list[tuple[str, dict]]:
+        return [(doc_id, doc) for doc_id, doc in self._data.items() if predicate(doc)]
+
+
+class BoundDocument(Namespace):
+    """Fichier dont les données vivent ailleurs (ex: dictionnaires d'un module) : `snapshot` les sérialise."""
+    def __init__(self, storage: "Storage", name: str, path: Path, indent: int | None, snapshot: Callable[[], Any]):
+        super().__init__(storage, name, path, indent)
+        self._snapshot_func = snapshot
+
+    def _snapshot(self) -> Any:
+        return self._snapshot_func()
+
+
+class Storage:
+    """
+    Service de stockage partagé par tous les Cogs (bot.storage).
+
+    - Les données chaudes restent en mémoire : les lectures ne touchent jamais le disque.
+    - Toutes les entrées/sorties passent par un unique thread dédié, dans l'ordre d'arrivée.
+    - Les modifications sont regroupées : `flush_delay` secondes après la première,
+      tous les fichiers modifiés sont écrits en un seul commit (fichiers temporaires
+      écrits et synchronisés d'abord, puis renommés).
+    - `close()` écrit ce qui reste à l'arrêt du bot.
+
+    Un espace de noms survit au rechargement d'un Cog : la nouvelle instance
+    retrouve les mêmes données en mémoire, sans relire le fichier.
+    """
+    def __init__(self, flush_delay: float = 2.0):
+        self.flush_delay = flush_delay
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+        self._namespaces: dict[str, Namespace] = {}
+        self._logs: dict[str, BoundedLog] = {}
+        self._dirty: dict[str, Namespace] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._commit_lock = asyncio.Lock()
+        # Commits ratés d'affilée : l'attente avant la nouvelle tentative double à chaque fois
+        self._failures = 0
+        # Arrêt en cours : plus de commit programmé, le thread d'écriture va être libéré
+        self._closing = False
+
+    # - - - Côté thread d'écriture - - - #
+
+    @staticmethod
+    def _read(name: str, path: Path, default):
+        if not path.exists():
+            return default
+        with metrics.timer("storage_seconds", file=name, op="load"):
+            with open(path, "rb") as f:
+                return codec.loads(f.read())
+
+    @staticmethod
+    def _write_batch(batch: list[tuple[str, Path, Any, int | None]]):
+        """Écrit tous les fichiers temporaires, puis les renomme : un arrêt brutal ne laisse aucun fichier à moitié écrit."""
+        replacements = []
+        for name, path, data, indent in batch:
+            with metrics.timer("storage_seconds", file=name, op="commit"):
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(path.name + ".tmp")
+                with open(tmp_path, "wb") as f:
+                    f.write(codec.dumps(data, indent))
+                    f.flush()
+                    os.fsync(f.fileno())
+                replacements.append((tmp_path, path))
+        for tmp_path, path in replacements:
+            os.replace(tmp_path, path)
+
+    # - - - Côté boucle - - - #
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def read_json(self, name: str, path: str | Path, default=None):
+        """Lit un fichier JSON dans le thread de stockage (`default` s'il n'existe pas)."""
+        try:
+            return await self._run(self._read, name, Path(path), default)
+        except json.JSONDecodeError:
+            logger.error("Le fichier %s est corrompu : démarrage avec des données vides", path)
+            return default
+
+    async def _open(self, cls, name: str, path: str | Path, indent: int | None):
+        namespace = self._namespaces.get(name)
+        if namespace is None:
+            data = await self.read_json(name, path, {})
+            # Un autre Cog a pu ouvrir le même espace pendant la lecture
+            namespace = self._namespaces.setdefault(name, cls(self, name, Path(path), indent, data))
+        return namespace
+
+    async def kv(self, name: str, path: str | Path, indent: int | None = 4) -> KeyValueStore:
+        """Espace clé/valeur `name`, chargé depuis `path` à la première ouverture."""
+        return await self._open(KeyValueStore, name, path, indent)
+
+    async def documents(self, name: str, path: str | Path, indent: int | None = 4) -> DocumentCollection:
+        """Collection de documents `name`, chargée depuis `path` à la première ouverture."""
+        return await self._open(DocumentCollection, name, path, indent)
+
+    def bind(self, name: str, path: str | Path, snapshot: Callable[[], Any], indent: int | None = 4) -> BoundDocument:
+        """Rattache au service des données gérées ailleurs : `snapshot()` est appelé à chaque commit."""
+        namespace = self._namespaces.get(name)
+        if namespace is None:
+            namespace = self._namespaces[name] = BoundDocument(self, name, Path(path), indent, snapshot)
+        else:
+            # Cog rechargé : les données à sérialiser sont désormais celles de la nouvelle instance
+            namespace._snapshot_func = snapshot
+        return namespace
+
+    async def log(self, name: str, path: str | Path, retention: int = 50, compact_factor: int | None = 2,
+                  legacy_path: str | Path | None = None, append_only: bool = False) -> BoundedLog:
+        """
+        Journal (JSON Lines) écrit par le thread de stockage ; `compact_factor=None` garde tout l'historique sur le disque.
+        `append_only=True` : l'historique n'est pas relu à l'ouverture (voir BoundedLog).
+        """
+        log = self._logs.get(name)
+        if log is None:
+            log = BoundedLog(path, retention=retention, compact_factor=compact_factor, name=name, executor=self._executor,
+                             append_only=append_only)
+            self._logs[name] = log
+            await log.open(legacy_path=legacy_path)
+        return log
+
+    def _mark_dirty(self, namespace: Namespace):
+        self._dirty[namespace.name] = namespace
+        if self._closing:
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._commit_later())
+
+    async def _commit_later(self):
+        await asyncio.sleep(min(self.flush_delay * 2 ** self._failures, MAX_RETRY_DELAY))
+        # Les modifications faites pendant l'écriture programmeront un nouveau commit
+        self._flush_task = None
+        await self.commit()
+
+    async def commit(self):
+        """Écrit immédiatement tous les espaces modifiés."""
+        async with self._commit_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, {}
+            try:
+                # Les instantanés sont pris sur la boucle : les données ne bougent pas pendant l'écriture
+                batch = [(ns.name, ns.path, ns._snapshot(), ns.indent) for ns in dirty.values()]
+                await self._run(self._write_batch, batch)
+            except Exception as e:
+                self._failures += 1
+                if isinstance(e, OSError):
+                    logger.error("Erreur lors de la sauvegarde (%s) : %s", ", ".join(dirty), e)
+                else:
+                    # Données non sérialisables, instantané en erreur... : la trace aide à trouver le Cog fautif
+                    logger.exception("Erreur lors de la sauvegarde (%s)", ", ".join(dirty))
+                if self._closing:
+                    # Dernier commit avant l'arrêt : pas de nouvelle tentative possible
+                    logger.error("Modifications perdues à l'arrêt : %s", ", ".join(dirty))
+                    return
+                # Nouvelle tentative au prochain commit (sans écraser une modification arrivée entre-temps)
+                for name, namespace in dirty.items():
+                    if name not in self._dirty:
+                        self._mark_dirty(namespace)
+            else:
+                self._failures = 0
+
+    async def close(self):
+        """À appeler à l'arrêt du bot : écrit ce qui attend encore puis libère le thread."""
+        self._closing = True
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.commit()
+        # Un commit programmé pendant le dernier (avant l'arrêt) n'aurait plus de thread pour écrire
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        for log in self._logs.values():
+            await log.close()
+        await asyncio.to_thread(self._executor.shutdown, wait=True)
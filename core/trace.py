@@ -0,0 +1,104 @@
+"""
+Format des traces d'événements gateway : enregistrées par cogs/trace.py,
+rejouées par benchmarks/replay.py (ou générées par benchmarks/synthetic.make_trace).
+
+Une trace est un fichier JSON Lines compact, une ligne par événement :
+    {"t": 12.345, "k": "p", "u": 1234, "g": 5678, "s": "offline"}
+- t : secondes écoulées depuis le début de l'enregistrement (à la milliseconde)
+- k : type d'événement (voir ci-dessous), les autres clés dépendent du type
+Chaque session d'enregistrement commence par une ligne {"k": "start", "at": timestamp}
+et ses instants repartent de 0.
+"""
+from typing import Any
+
+TRACE_VERSION = 1
+
+START = "start"
+INTERACTION = "i"   # commande slash : c = nom complet, o = options {nom: valeur}
+PRESENCE = "p"      # changement de statut : s = nouveau statut
+VOICE = "v"         # état vocal : b = salon avant, a = salon après (None hors vocal)
+MESSAGE = "m"       # message : ch = salon, c = contenu, n = pseudo de l'auteur, b = auteur bot
+
+KINDS = (INTERACTION, PRESENCE, VOICE, MESSAGE)
+
+
+def start_event(at: float) -> dict:
+    return {"k": START, "v": TRACE_VERSION, "at": round(at, 3)}
+
+
+def _flatten_options(options: list[dict], path: list[str], values: dict[str, Any]) -> list[str]:
+    """Aplatit les options d'une commande : les sous-commandes allongent le nom, les autres deviennent des valeurs."""
+    for option in options or []:
+        if "value" in option:
+            values[option["name"]] = option["value"]
+        else:
+            # Sous-commande ou groupe de sous-commandes
+            path.append(option["name"])
+            _flatten_options(option.get("options", []), path, values)
+    return path
+
+
+def interaction_event(interaction) -> dict | None:
+    """Commande slash (les autres interactions - boutons, autocomplétion - ne sont pas enregistrées)."""
+    data = interaction.data or {}
+    # 2 = InteractionType.application_command
+    if interaction.type.value != 2 or "name" not in data:
+        return None
+    values: dict[str, Any] = {}
+    path = _flatten_options(data.get("options", []), [data["name"]], values)
+    return {
+        "k": INTERACTION,
+        "u": interaction.user.id,
+        "g": interaction.guild_id,
+        "ch": interaction.channel_id,
+        "c": " ".join(path),
+        "o": values,
+    }
+
+
+def presence_event(before, after) -> dict | None:
+    """Seuls les changements de statut intéressent les Cogs (les activités ne sont pas gardées)."""
+    if before.status == after.status:
+        return None
+    return {"k": PRESENCE, "u": after.id, "g": after.guild.id, "s": str(after.status)}
+
+
+def voice_event(member, before, after) -> dict | None:
+    before_id = before.channel.id if before.channel else None
+    after_id = after.channel.id if after.channel else None
+    if before_id == after_id:
+        return None
+    return {"k": VOICE, "u": member.id, "g": member.guild.id, "b": before_id, "a": after_id}
+
+
+def message_event(message) -> dict | None:
+    if message.guild is None:
+        return None
+    return {
+        "k": MESSAGE,
+        "u": message.author.id,
+        "g": message.guild.id,
+        "ch": message.channel.id,
+        "c": message.content,
+        "n": getattr(message.author, "nick", None),
+        "b": message.author.bot,
+    }
+
+
+def sessions(events: list[dict]) -> list[dict]:
+    """
+    Remet bout à bout les sessions d'un fichier de trace : les instants deviennent
+    relatifs au début du fichier (les pauses entre deux enregistrements disparaissent).
+    """
+    timeline = []
+    offset = 0.0
+    last = 0.0
+    for event in events:
+        if event.get("k") == START:
+            offset = last
+            continue
+        if event.get("k") not in KINDS:
+            continue
+        last = offset + event.get("t", 0.0)
+        timeline.append({**event, "t": last})
+    return timeline
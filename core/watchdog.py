@@ -0,0 +1,150 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from core.metrics import MetricsRegistry, metrics
+
+# Racine du projet : sert à repérer, dans une pile d'appels, les frames qui viennent de notre code
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+COGS_ROOT = PROJECT_ROOT / "cogs"
+
+metrics.describe("loop_lag_seconds", "Retard de planification de la boucle asyncio")
+metrics.describe("loop_stalls_total", "Blocages de la boucle au-delà du seuil, par Cog et gestionnaire")
+
+
+@dataclass
+class Offender:
+    """Code identifié comme bloquant la boucle, avec le cumul des blocages observés."""
+    cog: str
+    handler: str
+    location: str
+    count: int = 0
+    total: float = 0.0
+    worst: float = 0.0
+    last_stack: str = field(default="", repr=False)
+
+
+class LoopWatchdog:
+    """
+    Chien de garde de la boucle asyncio.
+
+    - Une tâche sur la boucle se réveille toutes les `interval` secondes et mesure
+      le retard de son réveil (le « lag ») : c'est le temps pendant lequel la
+      boucle était occupée par du code bloquant.
+    - Un thread auxiliaire surveille le battement de cette tâche. Si la boucle ne
+      répond plus depuis `threshold` secondes, il capture la pile d'appels du
+      thread de la boucle *pendant* le blocage et l'attribue au Cog fautif.
+    """
+    def __init__(self, interval: float = 0.25, threshold: float = 0.2, registry: MetricsRegistry = metrics):
+        self.interval = interval
+        self.threshold = threshold
+        self.registry = registry
+        self.offenders: dict[tuple[str, str, str], Offender] = {}
+
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._loop_thread_id: int | None = None
+        self._heartbeat = time.monotonic()
+        # Dernière capture du thread auxiliaire, consommée par la tâche de mesure
+        self._capture: tuple[tuple[str, str, str], str] | None = None
+
+    def start(self):
+        """À appeler depuis la boucle (ex: setup_hook)."""
+        if self._task:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    # - - - Côté boucle - - - #
+
+    async def _probe(self):
+        loop = asyncio.get_running_loop()
+        lag_histogram = self.registry.histogram("loop_lag_seconds")
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._heartbeat = time.monotonic()
+            lag_histogram.observe(lag)
+
+            if lag >= self.threshold:
+                self._record_stall(lag)
+
+    def _record_stall(self, lag: float):
+        capture, self._capture = self._capture, None
+        if capture:
+            key, stack = capture
+        else:
+            # Blocage trop court pour que le thread auxiliaire ait eu le temps de le voir
+            key, stack = ("inconnu", "inconnu", "inconnu"), ""
+
+        offender = self.offenders.get(key)
+        if offender is None:
+            offender = self.offenders[key] = Offender(*key)
+        offender.count += 1
+        offender.total += lag
+        offender.worst = max(offender.worst, lag)
+        if stack:
+            offender.last_stack = stack
+
+        self.registry.counter("loop_stalls_total", cog=key[0], handler=key[1]).inc()
+
+    # - - - Côté thread auxiliaire - - - #
+
+    def _monitor(self):
+        captured_for = None
+        while not self._stop.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            if time.monotonic() - heartbeat < self.interval + self.threshold:
+                continue
+            # Une seule capture par blocage (le battement n'a pas bougé depuis)
+            if captured_for == heartbeat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            self._capture = (self.attribute(stack), "".join(traceback.format_list(stack)))
+            captured_for = heartbeat
+
+    @staticmethod
+    def attribute(stack: traceback.StackSummary) -> tuple[str, str, str]:
+        """
+        Trouve le responsable d'une pile d'appels :
+        - cog / handler : la première frame (la plus externe) située dans cogs/
+        - location : la frame la plus profonde de notre code (cogs/ ou core/)
+        """
+        cog, handler, location = "hors cogs", "?", "?"
+        found_handler = False
+        for summary in stack:
+            path = Path(summary.filename).resolve()
+            if not path.is_relative_to(PROJECT_ROOT):
+                continue
+            if path.is_relative_to(COGS_ROOT) and not found_handler:
+                cog = ".".join(path.relative_to(PROJECT_ROOT).with_suffix("").parts)
+                handler = summary.name
+                found_handler = True
+            if path != Path(__file__).resolve():
+                location = f"{path.relative_to(PROJECT_ROOT)}:{summary.lineno} ({summary.name})"
+        return cog, handler, location
+
+    # - - - Consultation - - - #
+
+    def worst_offenders(self, limit: int = 5) -> list[Offender]:
+        """Les responsables ayant cumulé le plus de temps de blocage."""
+        return sorted(self.offenders.values(), key=lambda o: o.total, reverse=True)[:limit]